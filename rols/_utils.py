@@ -1,11 +1,17 @@
 # Copyright 2017 Palantir Technologies, Inc.
 import functools
+import heapq
 import inspect
+import itertools
+import json
 import logging
 import os
+import queue
+import re
+import subprocess
 import sys
 import threading
-from distutils.version import LooseVersion
+import time
 
 import jedi
 
@@ -19,45 +25,216 @@ else:
 
 log = logging.getLogger(__name__)
 
+# Seconds a worker process has to answer a request before it's restarted
+WORKER_TIMEOUT = 60
 
-def debounce(interval_s, keyed_by=None):
+
+class Scheduler(object):
+    """Run delayed calls on a single thread.
+
+    Calls are kept in a heap ordered by their deadline and run one after the
+    other by a daemon thread started on the first call, so callbacks must be
+    short and hand any longer work off to another thread. Each call has a key;
+    scheduling a call with the key of a pending one replaces it.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        # (deadline, sequence number, key) entries, cancelled ones are skipped when popped
+        self._heap = []
+        # Keys of the pending calls mapped to their (deadline, sequence number, func, args, kwargs)
+        self._calls = {}
+        self._seq = itertools.count()
+        self._thread = None
+
+    def call_later(self, delay, func, *args, key=None, **kwargs):
+        """Call func(*args, **kwargs) on the scheduler thread in delay seconds.
+
+        Args:
+            delay (float): Seconds to wait before the call.
+            func (callable): The function to call.
+            key (hashable): Replaces the pending call with the same key if any.
+
+        Returns:
+            The key of the call, which may be given to cancel().
+        """
+        if key is None:
+            key = object()
+        with self._cond:
+            deadline = time.monotonic() + delay
+            seq = next(self._seq)
+            self._calls[key] = (deadline, seq, func, args, kwargs)
+            heapq.heappush(self._heap, (deadline, seq, key))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="rols-scheduler")
+                self._thread.daemon = True
+                self._thread.start()
+            self._cond.notify()
+        return key
+
+    def cancel(self, key):
+        """Cancel the pending call with the given key, returning whether there was one."""
+        with self._cond:
+            return self._calls.pop(key, None) is not None
+
+    def deadline(self, key):
+        """Return the time.monotonic() deadline of the pending call with the given key, or None."""
+        with self._cond:
+            call = self._calls.get(key)
+            return call[0] if call else None
+
+    def _next_call(self):
+        with self._cond:
+            while True:
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+
+                deadline, seq, key = self._heap[0]
+                call = self._calls.get(key)
+                if call is None or call[1] != seq:
+                    # Cancelled or replaced
+                    heapq.heappop(self._heap)
+                    continue
+
+                remaining = deadline - time.monotonic()
+                if remaining > 0:
+                    self._cond.wait(remaining)
+                    continue
+
+                heapq.heappop(self._heap)
+                del self._calls[key]
+                return call[2:]
+
+    def _run(self):
+        while True:
+            func, args, kwargs = self._next_call()
+            try:
+                func(*args, **kwargs)
+            except Exception:  # pylint: disable=broad-except
+                log.exception("Failed to run scheduled call %s", func)
+
+
+SCHEDULER = Scheduler()
+
+
+def debounce(interval_s, keyed_by=None, scheduler=SCHEDULER):
     """Debounce calls to this function until interval_s seconds have passed."""
 
     def wrapper(func):
-        timers = {}
-        lock = threading.Lock()
+        # Calls of different debounced functions must not replace each other
+        token = object()
+        if keyed_by:
+            # Resolved once rather than binding the arguments on every call
+            params = inspect.signature(func).parameters
+            key_index = list(params).index(keyed_by)
+            key_default = params[keyed_by].default
 
         @functools.wraps(func)
         def debounced(*args, **kwargs):
-            call_args = inspect.getcallargs(func, *args, **kwargs)
-            key = call_args[keyed_by] if keyed_by else None
+            if not keyed_by:
+                key = None
+            elif keyed_by in kwargs:
+                key = kwargs[keyed_by]
+            elif key_index < len(args):
+                key = args[key_index]
+            else:
+                key = key_default
+            scheduler.call_later(interval_s, functools.partial(func, *args, **kwargs), key=(token, key))
 
-            def run():
-                with lock:
-                    del timers[key]
-                return func(*args, **kwargs)
+        return debounced
 
-            with lock:
-                old_timer = timers.get(key)
-                if old_timer:
-                    old_timer.cancel()
+    return wrapper
 
-                timer = threading.Timer(interval_s, run)
-                timers[key] = timer
-                timer.start()
 
-        return debounced
+class WorkerTimeout(Exception):
+    """A worker didn't answer a request in time, and was restarted."""
 
-    return wrapper
 
+class WorkerProcess(object):
+    """A long-lived helper process answering JSON requests.
+
+    The script is run with the current interpreter and receives one JSON
+    object per line on stdin, answering each of them with one JSON object
+    per line on stdout. The process is (re)started on demand, and killed if
+    it doesn't answer a request within timeout seconds.
+    """
+
+    def __init__(self, script, timeout=WORKER_TIMEOUT):
+        self._script = script
+        self._timeout = timeout
+        self._process = None
+        # The lines of the process stdout, read by a thread so requests can time out
+        self._responses = None
+        self._lock = threading.RLock()
 
-def find_parents(root, path, names):
+    def request(self, message):
+        """Send a message to the worker and return its response, or None if the worker died.
+
+        Raises:
+            WorkerTimeout: If the worker didn't answer in time.
+        """
+        request = json.dumps(message) + "\n"
+        with self._lock:
+            if self._process is None or self._process.poll() is not None:
+                self._start()
+
+            try:
+                self._process.stdin.write(request.encode("utf-8"))
+                self._process.stdin.flush()
+                response = self._responses.get(timeout=self._timeout)
+            except queue.Empty:
+                log.warning("Worker %s didn't answer within %ss, restarting it", self._script, self._timeout)
+                self.stop()
+                raise WorkerTimeout(self._script)
+            except (IOError, OSError) as e:
+                log.error("Error communicating with worker %s: %s", self._script, e)
+                response = None
+
+            if not response:
+                self.stop()
+                return None
+
+        return json.loads(response.decode("utf-8"))
+
+    def stop(self):
+        with self._lock:
+            if self._process is not None:
+                if self._process.poll() is None:
+                    self._process.kill()
+                self._process.wait()
+            self._process = None
+
+    def _start(self):
+        log.debug("Starting worker %s", self._script)
+        self._process = subprocess.Popen(
+            [sys.executable, self._script], stdin=subprocess.PIPE, stdout=subprocess.PIPE
+        )
+        self._responses = queue.Queue()
+        reader = threading.Thread(
+            target=_read_lines, args=(self._process.stdout, self._responses), name="rols-worker-reader"
+        )
+        reader.daemon = True
+        reader.start()
+
+
+def _read_lines(stream, lines):
+    """Put the lines of the stream in the queue, then an empty line once it's closed."""
+    for line in iter(stream.readline, b""):
+        lines.put(line)
+    lines.put(b"")
+    stream.close()
+
+
+def find_parents(root, path, names, existing=None):
     """Find files matching the given names relative to the given path.
 
     Args:
         path (str): The file path to start searching up from.
         names (List[str]): The file/directory names to look for.
         root (str): The directory at which to stop recursing upwards.
+        existing (callable): Returns the paths of the names that exist in a
+            directory, given the directory and the names.
 
     Note:
         The path MUST be within the root.
@@ -75,19 +252,22 @@ def find_parents(root, path, names):
     dirs = [root] + os.path.relpath(os.path.dirname(path), root).split(os.path.sep)
 
     # Search each of /a/b/c, /a/b, /a
+    existing = existing or _existing_names
     while dirs:
         search_dir = os.path.join(*dirs)
-        existing = list(
-            filter(os.path.exists, [os.path.join(search_dir, n) for n in names])
-        )
-        if existing:
-            return existing
+        found = existing(search_dir, names)
+        if found:
+            return found
         dirs.pop()
 
     # Otherwise nothing
     return []
 
 
+def _existing_names(directory, names):
+    return list(filter(os.path.exists, [os.path.join(directory, n) for n in names]))
+
+
 def path_to_dot_name(path):
     """Given a path to a module, derive its dot-separated full name."""
     directory = os.path.dirname(path)
@@ -151,6 +331,31 @@ def merge_dicts(dict_a, dict_b):
     return dict(_merge_dicts_(dict_a, dict_b))
 
 
+def to_hashable(value):
+    """Recursively convert dicts and lists into tuples so the value can be used as a key."""
+    if isinstance(value, dict):
+        return tuple(sorted((key, to_hashable(val)) for key, val in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(to_hashable(val) for val in value)
+    return value
+
+
+def version_tuple(version):
+    """Return the leading numbers of a version string, e.g. (0, 18, 0) for "0.18.0rc1".
+
+    distutils' LooseVersion isn't used, since importing distutils imports pkg_resources.
+    """
+    numbers = []
+    for part in version.split("."):
+        match = re.match(r"\d+", part)
+        if match is None:
+            break
+        numbers.append(int(match.group()))
+        if match.end() != len(part):
+            break
+    return tuple(numbers)
+
+
 def format_docstring(contents):
     """Python doc strings come in a number of formats, but LSP wants markdown.
 
@@ -159,7 +364,7 @@ def format_docstring(contents):
     """
     contents = contents.replace("\t", u"\u00A0" * 4)
     contents = contents.replace("  ", u"\u00A0" * 2)
-    if LooseVersion(JEDI_VERSION) < LooseVersion("0.15.0"):
+    if version_tuple(JEDI_VERSION) < (0, 15):
         contents = contents.replace("*", "\\*")
     return contents
 
@@ -0,0 +1,150 @@
+"""Completion sessions reused while the user narrows the completed word.
+
+Every keystroke in an identifier asks for completions again, although the
+candidates for "nump" are the candidates for "num" that still match. The
+CompletionCache keeps the candidates of the latest completion along with
+its context: the document, the start of the completed word and the buffer
+revision it was computed for. As long as the edits made since only touched
+the completed word and the word only grows, the cached candidates are
+filtered with a fuzzy scorer instead of running the completion plugins again.
+
+Responses are limited to MAX_ITEMS items and marked incomplete when there
+are more candidates, so the client asks again as the user types.
+"""
+import re
+import threading
+
+# Items sent in one completion response
+MAX_ITEMS = 200
+
+# The identifier ending at the cursor
+_WORD_END = re.compile(r"\w*$")
+_WORD_START = re.compile(r"\w*")
+
+
+class CompletionCache(object):
+    """Serve narrowing completions from the candidates of the previous one."""
+
+    def __init__(self, max_items=MAX_ITEMS):
+        self._max_items = max_items
+        self._lock = threading.Lock()
+        # The context, completed word and candidates of the latest completion
+        self._session = None
+        self.hits = 0
+        self.misses = 0
+
+    def complete(self, document, position, compute):
+        """Return the completion list at the given position.
+
+        Args:
+            document (Document): The document being completed.
+            position (dict): The LSP position of the cursor.
+            compute (callable): Returns the completion items of the plugins.
+
+        Returns:
+            dict: The LSP CompletionList.
+        """
+        context, word = _context(document, position)
+        with self._lock:
+            session = self._session
+        if context is not None and session is not None and _same_context(session[0], context) \
+                and word.startswith(session[1]):
+            self.hits += 1
+            items = filter_items(session[2], word)
+            with self._lock:
+                if self._session is session:
+                    # The next completion only has to check the edits made after this one
+                    self._session = (context,) + session[1:]
+        else:
+            self.misses += 1
+            items = compute() or []
+            with self._lock:
+                self._session = (context, word, items) if context is not None else None
+
+        return {
+            "isIncomplete": len(items) > self._max_items,
+            "items": items[:self._max_items],
+        }
+
+    def clear(self):
+        with self._lock:
+            self._session = None
+
+
+def filter_items(items, word):
+    """Return copies of the items matching the word, best matches first.
+
+    Clients sort the items by their sortText, which is rewritten from the rank.
+    """
+    scored = []
+    for index, item in enumerate(items):
+        text = item.get("filterText") or _WORD_START.match(item["label"]).group() or item["label"]
+        score = fuzzy_score(word, text)
+        if score is not None:
+            scored.append((-score, index, item))
+    scored.sort(key=lambda entry: entry[:2])
+    return [dict(item, sortText="%05d" % rank) for rank, (_score, _index, item) in enumerate(scored)]
+
+
+def fuzzy_score(pattern, text):
+    """Return how well the pattern matches the text, or None if it doesn't.
+
+    The pattern must match a subsequence of the text, ignoring case. Prefix
+    matches, consecutive characters, characters starting a word and
+    characters of the same case score higher.
+    """
+    if not pattern:
+        return 0
+
+    lower = text.lower()
+    score = 10 if lower.startswith(pattern.lower()) else 0
+    start, previous = 0, -2
+    for char in pattern:
+        index = lower.find(char.lower(), start)
+        if index < 0:
+            return None
+        if index == previous + 1:
+            score += 2
+        if index == 0 or text[index - 1] == "_" or (text[index].isupper() and text[index - 1].islower()):
+            score += 3
+        if text[index] == char:
+            score += 1
+        start, previous = index + 1, index
+    return score
+
+
+def _context(document, position):
+    """Return the context of a completion and the completed word.
+
+    The context is the document, its buffer and revision, and the line, start
+    and end columns of the word. Only the line of the cursor is looked at, so
+    this doesn't depend on the size of the document.
+    """
+    buffer_line = document.buffer_line(position["line"])
+    if buffer_line is None:
+        return None, ""
+    buffer, revision, text = buffer_line
+    word = _WORD_END.search(text[:position["character"]]).group()
+
+    start = position["character"] - len(word)
+    context = (document.uri, buffer, revision, position["line"], start, position["character"])
+    return context, word
+
+
+def _same_context(previous, context):
+    """Whether the edits made since the previous context only changed the completed word."""
+    uri, buffer, revision, line, start, end = previous
+    if context[:2] != (uri, buffer) or context[3:5] != (line, start):
+        return False
+
+    edits = buffer.edits_since(revision)
+    if edits is None or context[2] != revision + len(edits):
+        return False
+    # Follow the end of the word through the edits, which must all be within it
+    for start_line, start_col, end_line, end_col, text in edits:
+        if start_line != line or end_line != line or start_col < start or end_col > end:
+            return False
+        if "\n" in text or "\r" in text:
+            return False
+        end += len(text) - (end_col - start_col)
+    return end == context[5]
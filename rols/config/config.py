@@ -1,23 +1,95 @@
 # Copyright 2017 Palantir Technologies, Inc.
 import logging
+import os
+import threading
+import time
 
-import pkg_resources
 import pluggy
 
 from rols import ROLS, _utils, hookspecs, uris
+from rols.stats import STATS
 
-try:
-    from functools import lru_cache
-except ImportError:
-    from backports.functools_lru_cache import lru_cache
-
-
+from .manifest import load_entry_point, plugin_manifest
+from .plugins import LazyPlugin
+from .source import CONFIG_FILES
 
 log = logging.getLogger(__name__)
 
 # Sources of config, first source overrides next source
 DEFAULT_CONFIG_SOURCES = ["pycodestyle"]
 
+# Seconds the resolved settings are used without checking their config files on disk. Changes
+# reported by didSave and didChangeWatchedFiles are seen right away.
+CHECK_INTERVAL = 2
+
+
+class PluginRegistry(object):
+    """The rols plugins of the process, discovered and loaded once.
+
+    The Config of every workspace folder shares the plugin manager and the
+    default plugin settings, and only keeps its own settings and disabled
+    plugins.
+    """
+
+    def __init__(self, config):
+        self.plugin_manager = pluggy.PluginManager(ROLS)
+        if log.isEnabledFor(logging.DEBUG):
+            self.plugin_manager.trace.root.setwriter(log.debug)
+            self.plugin_manager.enable_tracing()
+        STATS.instrument(self.plugin_manager)
+        self.plugin_manager.add_hookspecs(hookspecs)
+
+        # Plugins are registered from their metadata and only imported when one of their hooks is called.
+        # Plugins that import modules that aren't installed are blocked, like the ones failing to import.
+        for plugin in plugin_manifest(ROLS):
+            if plugin["metadata"] is None:
+                self._load_entry_point(plugin["name"], plugin["value"])
+            elif plugin["missing"]:
+                log.warning(
+                    "Failed to load %s entry point '%s': missing %s", ROLS, plugin["name"], ", ".join(plugin["missing"])
+                )
+                self.plugin_manager.set_blocked(plugin["name"])
+            else:
+                self.plugin_manager.register(LazyPlugin(plugin["metadata"]), name=plugin["name"])
+
+        for name, plugin in self.plugin_manager.list_name_plugin():
+            if plugin is not None:
+                log.info("Loaded rols plugin %s from %s", name, plugin)
+
+        # The settings of the plugins are the defaults of every Config, they are
+        # collected with the Config that created the registry.
+        self.plugin_settings = {}
+        for plugin_conf in self.plugin_manager.hook.rols_settings(config=config):
+            self.plugin_settings = _utils.merge_dicts(
+                self.plugin_settings, plugin_conf
+            )
+
+    def _load_entry_point(self, name, value):
+        # I don't want all plugins to have to catch ImportError and re-throw. So here we'll filter
+        # out any entry points that throw ImportError assuming one or more of their dependencies isn't present.
+        try:
+            plugin = load_entry_point(value)
+        except ImportError as e:
+            log.warning(
+                "Failed to load %s entry point '%s': %s", ROLS, name, e
+            )
+            self.plugin_manager.set_blocked(name)
+            return
+        self.plugin_manager.register(plugin, name=name)
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def plugin_registry(config):
+    """Return the plugin registry of the process, creating it for the given Config on first use."""
+    global _registry  # pylint: disable=global-statement
+    with _registry_lock:
+        if _registry is None:
+            _registry = PluginRegistry(config)
+        return _registry
+
 
 class Config(object):
     def __init__(self, root_uri, init_opts, process_id, capabilities):
@@ -28,7 +100,10 @@ class Config(object):
         self._capabilities = capabilities
 
         self._settings = {}
-        self._plugin_settings = {}
+        # The directory of a document -> (the config files and directories it depends on, settings,
+        # the time they were last checked)
+        self._resolved = {}
+        self._resolved_lock = threading.Lock()
 
         self._config_sources = {}
         try:
@@ -44,34 +119,9 @@ class Config(object):
         except ImportError:
             pass
 
-        self._pm = pluggy.PluginManager(ROLS)
-        self._pm.trace.root.setwriter(log.debug)
-        self._pm.enable_tracing()
-        self._pm.add_hookspecs(hookspecs)
-
-        # Pluggy will skip loading a plugin if it throws a DistributionNotFound exception.
-        # However I don't want all plugins to have to catch ImportError and re-throw. So here we'll filter
-        # out any entry points that throw ImportError assuming one or more of their dependencies isn't present.
-        for entry_point in pkg_resources.iter_entry_points(ROLS):
-            try:
-                entry_point.load()
-            except ImportError as e:
-                log.warning(
-                    "Failed to load %s entry point '%s': %s", ROLS, entry_point.name, e
-                )
-                self._pm.set_blocked(entry_point.name)
-
-        # Load the entry points into pluggy, having blocked any failing ones
-        self._pm.load_setuptools_entrypoints(ROLS)
-
-        for name, plugin in self._pm.list_name_plugin():
-            if plugin is not None:
-                log.info("Loaded rols plugin %s from %s", name, plugin)
-
-        for plugin_conf in self._pm.hook.rols_settings(config=self):
-            self._plugin_settings = _utils.merge_dicts(
-                self._plugin_settings, plugin_conf
-            )
+        registry = plugin_registry(self)
+        self._pm = registry.plugin_manager
+        self._plugin_settings = registry.plugin_settings
 
         self._update_disabled_plugins()
 
@@ -99,7 +149,6 @@ class Config(object):
     def capabilities(self):
         return self._capabilities
 
-    @lru_cache(maxsize=32)
     def settings(self, document_path=None):
         """Settings are constructed from a few sources:
 
@@ -108,9 +157,33 @@ class Config(object):
             3. LSP settings, given to us from didChangeConfiguration
             4. Project settings, found in config files in the current project.
 
-        Since this function is nondeterministic, it is important to call
-        settings.cache_clear() when the config is updated
+        Project settings only depend on the directory of the document, so
+        settings are resolved once per directory. They are resolved again
+        when one of the config files they were read from, or one of the
+        directories searched for config files, changes on disk, which is
+        checked at most every CHECK_INTERVAL seconds.
         """
+        directory = os.path.dirname(document_path) if document_path else None
+        now = time.monotonic()
+        with self._resolved_lock:
+            resolved = self._resolved.get(directory)
+        if resolved is not None:
+            dependencies, settings, checked = resolved
+            if now - checked < CHECK_INTERVAL:
+                return settings
+            if CONFIG_FILES.is_current(dependencies):
+                with self._resolved_lock:
+                    if self._resolved.get(directory) is resolved:
+                        self._resolved[directory] = (dependencies, settings, now)
+                return settings
+
+        with CONFIG_FILES.dependencies() as dependencies:
+            settings = self._resolve_settings(document_path)
+        with self._resolved_lock:
+            self._resolved[directory] = (dependencies, settings, now)
+        return settings
+
+    def _resolve_settings(self, document_path):
         settings = {}
         sources = self._settings.get("configurationSources", DEFAULT_CONFIG_SOURCES)
 
@@ -157,10 +230,22 @@ class Config(object):
             .get(plugin, {})
         )
 
+    def config_files_changed(self, paths):
+        """Resolve the settings depending on the given config files again."""
+        directories = set()
+        for path in paths:
+            CONFIG_FILES.invalidate(path)
+            directories.add(os.path.dirname(path))
+        with self._resolved_lock:
+            for directory, (dependencies, _settings, _checked) in list(self._resolved.items()):
+                if any(path in dependencies for path in directories.union(paths)):
+                    del self._resolved[directory]
+
     def update(self, settings):
         """Recursively merge the given settings into the current settings."""
-        self.settings.cache_clear()
         self._settings = settings
+        with self._resolved_lock:
+            self._resolved.clear()
         log.info("Updated settings to %s", self._settings)
         self._update_disabled_plugins()
 
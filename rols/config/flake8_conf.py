@@ -2,8 +2,6 @@
 import logging
 import os
 
-from rols._utils import find_parents
-
 from .source import ConfigSource
 
 log = logging.getLogger(__name__)
@@ -45,6 +43,6 @@ class Flake8Config(ConfigSource):
         return os.path.join(self.xdg_home, "flake8")
 
     def project_config(self, document_path):
-        files = find_parents(self.root_path, document_path, PROJECT_CONFIGS)
+        files = self.find_parents(document_path, PROJECT_CONFIGS)
         config = self.read_config_from_files(files)
         return self.parse_config(config, CONFIG_KEY, OPTIONS)
@@ -0,0 +1,180 @@
+"""The rols entry points, discovered with importlib.metadata and cached between launches.
+
+Listing the entry points means scanning the metadata of every distribution
+installed in the environment, and importing pkg_resources to do it scans
+them all again up front. The entry points of the group are instead listed
+with importlib.metadata, and written along with the metadata of their
+plugins to a manifest in the user cache. Later launches read the manifest
+as long as the directories of sys.path are unchanged, since installing or
+removing a distribution modifies the directory it is installed in, and
+skip the scan entirely.
+"""
+import hashlib
+import importlib
+import io
+import json
+import logging
+import os
+import re
+import sys
+
+from rols import ROLS
+
+from .plugins import missing_requirements, read_plugin_metadata
+
+log = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+
+_ENTRY_POINT = re.compile(r"^\s*(?P<module>[\w.]+)\s*(?::\s*(?P<attrs>[\w.]+))?\s*(?:\[.*\])?\s*$")
+
+
+def plugin_manifest(group=ROLS, cache_dir=None):
+    """Return the entry points of the group, with the metadata of their plugins.
+
+    Args:
+        group (str): The entry point group.
+        cache_dir (str): The directory of the manifest, by default in the user cache.
+
+    Returns:
+        List[dict]: The name and value of every entry point, the metadata of its plugin,
+            or None if it has to be imported, and the modules it requires that aren't installed.
+    """
+    path = _manifest_path(group, cache_dir)
+    path_stamps = _path_stamps()
+
+    manifest = _read_manifest(path)
+    if manifest is not None and manifest["paths"] == path_stamps:
+        plugins = manifest["plugins"]
+        # The sources of plugins installed in development mode change without changing sys.path
+        stale = [i for i, plugin in enumerate(plugins) if plugin["stamp"] != _stamp(plugin["origin"])]
+        for i in stale:
+            plugins[i] = _describe(plugins[i]["name"], plugins[i]["value"])
+        if stale:
+            _write_manifest(path, dict(manifest, plugins=plugins))
+        return plugins
+
+    plugins = [_describe(name, value) for name, value in entry_points(group)]
+    _write_manifest(path, {"version": MANIFEST_VERSION, "paths": path_stamps, "plugins": plugins})
+    return plugins
+
+
+def entry_points(group):
+    """Return the (name, value) of the entry points in the group, the first one of every name only."""
+    try:
+        from importlib import metadata
+    except ImportError:  # Python < 3.8
+        import pkg_resources
+        found = [
+            (entry_point.name, str(entry_point).split("=", 1)[1].strip())
+            for entry_point in pkg_resources.iter_entry_points(group)
+        ]
+    else:
+        selected = metadata.entry_points()
+        if hasattr(selected, "select"):
+            selected = selected.select(group=group)
+        else:
+            selected = selected.get(group, [])
+        found = [(entry_point.name, entry_point.value) for entry_point in selected]
+
+    names = set()
+    unique = []
+    for name, value in found:
+        if name not in names:
+            names.add(name)
+            unique.append((name, value))
+    return unique
+
+
+def load_entry_point(value):
+    """Import the object an entry point refers to, raising ImportError if it fails."""
+    match = _ENTRY_POINT.match(value)
+    if match is None:
+        raise ImportError("Invalid entry point %r" % value)
+    obj = importlib.import_module(match.group("module"))
+    attrs = match.group("attrs")
+    for attr in attrs.split(".") if attrs else []:
+        try:
+            obj = getattr(obj, attr)
+        except AttributeError:
+            raise ImportError("%r has no %r attribute" % (obj, attr)) from None
+    return obj
+
+
+def _describe(name, value):
+    match = _ENTRY_POINT.match(value)
+    metadata = None
+    if match is not None and not match.group("attrs"):
+        metadata = read_plugin_metadata(match.group("module"))
+
+    plugin = {"name": name, "value": value, "metadata": None, "missing": [], "origin": None, "stamp": None}
+    if metadata is not None:
+        for hook in metadata["hooks"]:
+            if "result" in hook and not _survives_json(hook["result"]):
+                # Served by the plugin itself rather than changed by the manifest, e.g. tuples into lists
+                del hook["result"]
+        plugin.update(
+            metadata=metadata,
+            missing=missing_requirements(metadata),
+            origin=metadata["origin"],
+            stamp=_stamp(metadata["origin"]),
+        )
+    return plugin
+
+
+def _survives_json(value):
+    try:
+        return json.loads(json.dumps(value)) == value
+    except (TypeError, ValueError):
+        return False
+
+
+def _manifest_path(group, cache_dir):
+    if cache_dir is None:
+        cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+        cache_dir = os.path.join(cache_home, "rols", "plugins")
+    # Every interpreter and sys.path gets its own manifest
+    key = json.dumps([group, sys.executable, sys.version, sys.path])
+    return os.path.join(cache_dir, hashlib.sha1(key.encode("utf-8")).hexdigest() + ".json")
+
+
+def _path_stamps():
+    """The modification times of the directories of sys.path, which distributions are installed in."""
+    stamps = {}
+    for entry in sys.path:
+        stamp = _stamp(entry or os.getcwd())
+        if stamp is not None:
+            stamps[entry] = stamp
+    return stamps
+
+
+def _stamp(path):
+    if not path:
+        return None
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def _read_manifest(path):
+    try:
+        with io.open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(manifest, dict) or manifest.get("version") != MANIFEST_VERSION:
+        return None
+    return manifest
+
+
+def _write_manifest(path, manifest):
+    tmp_path = "%s.%d.tmp" % (path, os.getpid())
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with io.open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        log.warning("Failed to write the plugin manifest %s: %s", path, e)
@@ -0,0 +1,219 @@
+"""Plugins registered from their metadata and imported on first use.
+
+Importing every plugin at startup imports pylint, rope, yapf and the other
+tools they wrap, even for plugins that are disabled. Instead, the source
+of a plugin module is read without importing it, and its hook
+implementations are described by their names, arguments and hookimpl
+options. A LazyPlugin registers hook implementations with the same
+signatures into pluggy, and imports the real module the first time one of
+them is called, so the modules of disabled plugins are never imported.
+
+The rols_settings of a plugin is usually a literal, which is returned from
+the metadata without importing the plugin at all.
+"""
+import ast
+import copy
+import importlib
+import importlib.util
+import inspect
+import io
+import logging
+import threading
+
+from rols import ROLS, hookimpl
+
+log = logging.getLogger(__name__)
+
+
+def read_plugin_metadata(module_name):
+    """Describe the hook implementations of a plugin module, without importing it.
+
+    Args:
+        module_name (str): The dotted name of the plugin module.
+
+    Returns:
+        dict: The module name and source file, the top-level modules it imports
+            and its hooks, or None if the plugin has to be imported to know its hooks.
+    """
+    try:
+        spec = importlib.util.find_spec(module_name)
+    except (ImportError, ValueError):
+        return None
+    if spec is None or not spec.has_location or not (spec.origin or "").endswith(".py"):
+        return None
+
+    try:
+        with io.open(spec.origin, "rb") as f:
+            tree = ast.parse(f.read(), spec.origin)
+    except (OSError, SyntaxError, ValueError):
+        return None
+
+    try:
+        metadata = _metadata(module_name, tree)
+    except (ValueError, TypeError, SyntaxError):
+        # Options of a hookimpl that aren't literals
+        return None
+    if metadata is not None:
+        metadata["origin"] = spec.origin
+    return metadata
+
+
+def missing_requirements(metadata):
+    """Return the top-level modules imported by the plugin that aren't installed."""
+    missing = []
+    for name in metadata["requires"]:
+        try:
+            if importlib.util.find_spec(name) is None:
+                missing.append(name)
+        except (ImportError, ValueError):
+            missing.append(name)
+    return missing
+
+
+def _metadata(module_name, tree):
+    markers = {"hookimpl"}
+    constants = {}
+    requires = set()
+    hooks = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            requires.update(alias.name.split(".")[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+            requires.add(node.module.split(".")[0])
+            markers.update(alias.asname for alias in node.names if alias.name == "hookimpl" and alias.asname)
+        elif isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+            try:
+                constants[node.targets[0].id] = _literal(node.value, constants)
+            except (ValueError, TypeError, SyntaxError):
+                constants.pop(node.targets[0].id, None)
+        elif isinstance(node, ast.FunctionDef):
+            opts = _hookimpl_opts(node, markers)
+            if opts is not None:
+                hooks.append((node, opts))
+
+    # Hooks defined conditionally, async or wrapping other hooks need the real module
+    defined = [
+        node for node in ast.walk(tree)
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and _hookimpl_opts(node, markers) is not None
+    ]
+    if not hooks or len(defined) != len(hooks):
+        return None
+    if any(opts.get("hookwrapper") or opts.get("wrapper") for _node, opts in hooks):
+        return None
+
+    return {
+        "module": module_name,
+        "requires": sorted(requires),
+        "hooks": [_hook_metadata(node, opts, constants) for node, opts in hooks],
+    }
+
+
+class LazyPlugin(object):
+    """A plugin registered from its metadata, whose module is imported on the first call to one of its hooks."""
+
+    def __init__(self, metadata):
+        self.__name__ = metadata["module"]
+        self._lock = threading.Lock()
+        self._module = None
+        self._failed = False
+        for hook in metadata["hooks"]:
+            setattr(self, hook["function"], self._hook(hook))
+
+    def __repr__(self):
+        state = "imported" if self._module is not None else "not imported"
+        return "<LazyPlugin %s (%s)>" % (self.__name__, state)
+
+    @property
+    def imported(self):
+        return self._module is not None
+
+    def load(self):
+        """Import the plugin module, returning None if it fails."""
+        with self._lock:
+            if self._module is None and not self._failed:
+                try:
+                    self._module = importlib.import_module(self.__name__)
+                    log.debug("Imported rols plugin %s", self.__name__)
+                except ImportError as e:
+                    log.warning("Failed to load %s plugin '%s': %s", ROLS, self.__name__, e)
+                    self._failed = True
+            return self._module
+
+    def _hook(self, hook):
+        function_name = hook["function"]
+
+        if "result" in hook:
+            result = hook["result"]
+
+            def call(*_args):
+                return copy.deepcopy(result)
+        else:
+            def call(*args):
+                module = self.load()
+                if module is None:
+                    return None
+                return getattr(module, function_name)(*args)
+
+        args, defaults = hook["args"], hook["defaults"]
+        required = len(args) - defaults
+        call.__name__ = call.__qualname__ = function_name
+        call.__signature__ = inspect.Signature([
+            inspect.Parameter(
+                arg, inspect.Parameter.POSITIONAL_OR_KEYWORD,
+                default=None if index >= required else inspect.Parameter.empty,
+            )
+            for index, arg in enumerate(args)
+        ])
+        return hookimpl(**hook["opts"])(call)
+
+
+def _hookimpl_opts(node, markers):
+    """Return the hookimpl options of a function definition, or None if it isn't a hook implementation."""
+    for decorator in node.decorator_list:
+        target = decorator.func if isinstance(decorator, ast.Call) else decorator
+        name = target.attr if isinstance(target, ast.Attribute) else getattr(target, "id", None)
+        if name not in markers:
+            continue
+        if not isinstance(decorator, ast.Call):
+            return {}
+        return {keyword.arg: ast.literal_eval(keyword.value) for keyword in decorator.keywords}
+    return None
+
+
+def _hook_metadata(node, opts, constants):
+    args = getattr(node.args, "posonlyargs", []) + node.args.args
+    hook = {
+        "function": node.name,
+        "args": [arg.arg for arg in args],
+        "defaults": len(node.args.defaults),
+        "opts": opts,
+    }
+    if (opts.get("specname") or node.name) == ROLS + "_settings":
+        body = node.body
+        if body and isinstance(body[0], ast.Expr) and isinstance(body[0].value, ast.Constant):
+            # The docstring
+            body = body[1:]
+        if len(body) == 1 and isinstance(body[0], ast.Return) and body[0].value is not None:
+            try:
+                hook["result"] = _literal(body[0].value, constants)
+            except (ValueError, TypeError, SyntaxError):
+                pass
+    return hook
+
+
+def _literal(node, constants):
+    """Evaluate a literal expression, which may refer to the given module constants."""
+    if isinstance(node, ast.Name):
+        if node.id not in constants:
+            raise ValueError("Unknown name %s" % node.id)
+        return copy.deepcopy(constants[node.id])
+    if isinstance(node, ast.Dict):
+        if any(key is None for key in node.keys):
+            raise ValueError("Dict unpacking")
+        return {_literal(key, constants): _literal(value, constants) for key, value in zip(node.keys, node.values)}
+    if isinstance(node, (ast.List, ast.Tuple, ast.Set)):
+        if any(isinstance(element, ast.Starred) for element in node.elts):
+            raise ValueError("Starred element")
+        values = [_literal(element, constants) for element in node.elts]
+        return {ast.List: list, ast.Tuple: tuple, ast.Set: set}[type(node)](values)
+    return ast.literal_eval(node)
@@ -1,8 +1,6 @@
 # Copyright 2017 Palantir Technologies, Inc.
 import pycodestyle
 
-from rols._utils import find_parents
-
 from .source import ConfigSource
 
 CONFIG_KEY = "pycodestyle"
@@ -26,6 +24,6 @@ class PyCodeStyleConfig(ConfigSource):
         return self.parse_config(config, CONFIG_KEY, OPTIONS)
 
     def project_config(self, document_path):
-        files = find_parents(self.root_path, document_path, PROJECT_CONFIGS)
+        files = self.find_parents(document_path, PROJECT_CONFIGS)
         config = self.read_config_from_files(files)
         return self.parse_config(config, CONFIG_KEY, OPTIONS)
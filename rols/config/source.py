@@ -1,8 +1,12 @@
 # Copyright 2017 Palantir Technologies, Inc.
 import configparser
+import contextlib
 import logging
 import os
 import sys
+import threading
+
+from rols import _utils
 
 log = logging.getLogger(__name__)
 
@@ -27,12 +31,11 @@ class ConfigSource(object):
 
     @staticmethod
     def read_config_from_files(files):
-        config = configparser.RawConfigParser()
-        for filename in files:
-            if os.path.exists(filename) and not os.path.isdir(filename):
-                config.read(filename)
+        return CONFIG_FILES.read(files)
 
-        return config
+    def find_parents(self, document_path, names):
+        """Find the config files with the given names in the closest directory above the document."""
+        return CONFIG_FILES.find_parents(self.root_path, document_path, names)
 
     @staticmethod
     def parse_config(config, key, options):
@@ -45,6 +48,118 @@ class ConfigSource(object):
         return conf
 
 
+class ConfigFiles(object):
+    """Config files looked up and parsed once, until they change on disk.
+
+    The files found in a directory are cached until the modification time
+    of the directory changes, which happens when files are created or
+    removed in it, and every file is parsed once until its own modification
+    time or size changes. Within dependencies(), the directories searched and
+    the files read are recorded along with their state, so that what is
+    derived from them can be cached until is_current() says otherwise.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (directory, names) -> (stamp of the directory, paths of the names that exist)
+        self._found = {}
+        # path -> (stamp of the file, RawConfigParser)
+        self._parsed = {}
+        self._recording = threading.local()
+
+    @contextlib.contextmanager
+    def dependencies(self):
+        """Record the stamps of the directories and files used within the block, by path."""
+        previous = getattr(self._recording, "dependencies", None)
+        dependencies = self._recording.dependencies = {}
+        try:
+            yield dependencies
+        finally:
+            self._recording.dependencies = previous
+            if previous is not None:
+                previous.update(dependencies)
+
+    @staticmethod
+    def is_current(dependencies):
+        """Whether none of the recorded directories and files changed."""
+        return all(_stamp(path) == stamp for path, stamp in dependencies.items())
+
+    def find_parents(self, root, path, names):
+        return _utils.find_parents(root, path, names, existing=self._existing)
+
+    def read(self, files):
+        """Return a RawConfigParser with the content of the files, later files overriding earlier ones."""
+        config = configparser.RawConfigParser()
+        for filename in files:
+            parser = self._parse(filename)
+            if parser is None:
+                continue
+            defaults = parser.defaults()
+            config.read_dict({configparser.DEFAULTSECT: defaults})
+            config.read_dict({
+                section: {key: value for key, value in parser.items(section) if defaults.get(key) != value}
+                for section in parser.sections()
+            })
+        return config
+
+    def invalidate(self, path):
+        """Forget what is known about a config file and the directory containing it."""
+        directory = os.path.dirname(path)
+        with self._lock:
+            self._parsed.pop(path, None)
+            for key in [key for key in self._found if key[0] == directory]:
+                del self._found[key]
+
+    def _existing(self, directory, names):
+        stamp = self._record(directory)
+        key = (directory, tuple(names))
+        with self._lock:
+            cached = self._found.get(key)
+        if cached is not None and stamp is not None and cached[0] == stamp:
+            return list(cached[1])
+
+        existing = [os.path.join(directory, name) for name in names if os.path.exists(os.path.join(directory, name))]
+        with self._lock:
+            self._found[key] = (stamp, existing)
+        return list(existing)
+
+    def _parse(self, filename):
+        stamp = self._record(filename)
+        if stamp is None or os.path.isdir(filename):
+            return None
+        with self._lock:
+            cached = self._parsed.get(filename)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+
+        log.debug("Parsing config file %s", filename)
+        parser = configparser.RawConfigParser()
+        parser.read(filename)
+        with self._lock:
+            self._parsed[filename] = (stamp, parser)
+        return parser
+
+    def _record(self, path):
+        stamp = _stamp(path)
+        dependencies = getattr(self._recording, "dependencies", None)
+        if dependencies is not None:
+            dependencies[path] = stamp
+        return stamp
+
+
+def _stamp(path):
+    """The state of a file or directory, None if it doesn't exist."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+
+# Config files are shared by all the workspaces and config sources
+CONFIG_FILES = ConfigFiles()
+
+
 def _get_opt(config, key, option, opt_type):
     """Get an option from a configparser with the given type."""
     for opt_key in [option, option.replace("-", "_")]:
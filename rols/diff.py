@@ -0,0 +1,185 @@
+"""Minimal TextEdits between two versions of a document.
+
+Formatters and refactorings produce the new source of a whole file, but
+sending it back as one edit replacing the file makes the client transfer
+and re-tokenize the whole buffer. text_edits() diffs the lines of the old
+and new source with Myers' O(ND) algorithm, then trims every changed hunk,
+or every line of the hunks changed in place, down to the characters that
+actually differ.
+
+Lines are split on the LSP line endings ('\\n', '\\r\\n' and '\\r') only, so
+the positions of the edits are the ones the client sees.
+"""
+import bisect
+import itertools
+import re
+
+# Past this many inserted and deleted lines, the changed region is replaced at once
+MAX_DISTANCE = 1000
+
+_LINE = re.compile(r"[^\r\n]*(?:\r\n|\r|\n)|[^\r\n]+")
+
+
+def text_edits(old, new, by_line=False):
+    """Return the LSP TextEdits turning the old source into the new one.
+
+    Args:
+        old (str): The source the edits apply to.
+        new (str): The source once the edits are applied.
+        by_line (bool): Whether to replace whole lines rather than only the characters that changed.
+
+    Returns:
+        List[dict]: The TextEdits, in document order. They don't overlap and all refer to the old source.
+    """
+    if old == new:
+        return []
+
+    old_lines = split_lines(old)
+    new_lines = split_lines(new)
+    starts = list(itertools.accumulate(itertools.chain([0], (len(line) for line in old_lines))))
+    if old and old[-1] not in "\r\n":
+        # The end of the file is on its last line, not at the start of the next one
+        starts.pop()
+
+    edits = []
+    for i1, i2, j1, j2 in diff_sequences(old_lines, new_lines):
+        if by_line or i2 - i1 != j2 - j1:
+            pairs = [(i1, i2, j1, j2)]
+        else:
+            # Lines changed in place, like a rename, are edited one by one
+            pairs = [(i, i + 1, j, j + 1) for i, j in zip(range(i1, i2), range(j1, j2))]
+
+        for old_start, old_end, new_start, new_end in pairs:
+            old_text = "".join(old_lines[old_start:old_end])
+            new_text = "".join(new_lines[new_start:new_end])
+            start = starts[old_start]
+            if not by_line:
+                prefix, suffix = _common_affixes(old_text, new_text)
+                old_text = old_text[prefix:len(old_text) - suffix]
+                new_text = new_text[prefix:len(new_text) - suffix]
+                start += prefix
+            if old_text or new_text:
+                edits.append({
+                    "range": {
+                        "start": _position(starts, start),
+                        "end": _position(starts, start + len(old_text)),
+                    },
+                    "newText": new_text,
+                })
+    return edits
+
+
+def split_lines(text):
+    """Split the text into lines, keeping their line endings."""
+    return _LINE.findall(text)
+
+
+def diff_sequences(a, b, max_distance=MAX_DISTANCE):
+    """Return the hunks that differ between two sequences, with Myers' diff algorithm.
+
+    Args:
+        a (Sequence): The old sequence.
+        b (Sequence): The new sequence.
+        max_distance (int): Past this many insertions and deletions, the remaining
+            region is returned as one changed hunk rather than diffed further.
+
+    Returns:
+        List[Tuple[int, int, int, int]]: The (i1, i2, j1, j2) hunks, in order,
+            where a[i1:i2] is replaced with b[j1:j2].
+    """
+    # Common leading and trailing items are frequent and cheap to skip
+    lo, a_end, b_end = 0, len(a), len(b)
+    while lo < a_end and lo < b_end and a[lo] == b[lo]:
+        lo += 1
+    while a_end > lo and b_end > lo and a[a_end - 1] == b[b_end - 1]:
+        a_end -= 1
+        b_end -= 1
+
+    if lo == a_end and lo == b_end:
+        return []
+    if lo == a_end or lo == b_end:
+        return [(lo, a_end, lo, b_end)]
+
+    blocks = _matching_blocks(a[lo:a_end], b[lo:b_end], max_distance)
+    if blocks is None:
+        return [(lo, a_end, lo, b_end)]
+
+    hunks = []
+    i = j = 0
+    for x, y, size in blocks + [(a_end - lo, b_end - lo, 0)]:
+        if i < x or j < y:
+            hunks.append((lo + i, lo + x, lo + j, lo + y))
+        i, j = x + size, y + size
+    return hunks
+
+
+def _matching_blocks(a, b, max_distance):
+    """Return the (i, j, size) blocks where a and b match, or None past max_distance edits."""
+    n, m = len(a), len(b)
+    v = {1: 0}
+    trace = []
+    for d in range(min(n + m, max_distance) + 1):
+        trace.append(dict(v))
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and v[k - 1] < v[k + 1]):
+                x = v[k + 1]
+            else:
+                x = v[k - 1] + 1
+            y = x - k
+            while x < n and y < m and a[x] == b[y]:
+                x += 1
+                y += 1
+            v[k] = x
+            if x >= n and y >= m:
+                return _backtrack(trace, n, m)
+    return None
+
+
+def _backtrack(trace, x, y):
+    """Walk the furthest reaching paths back from the end to find the diagonals of the edit script."""
+    blocks = []
+    for d in range(len(trace) - 1, -1, -1):
+        v = trace[d]
+        k = x - y
+        if k == -d or (k != d and v[k - 1] < v[k + 1]):
+            prev_k = k + 1
+        else:
+            prev_k = k - 1
+        prev_x = v[prev_k]
+        prev_y = prev_x - prev_k
+        # The diagonal run from the end of the edit out of (prev_x, prev_y) to (x, y)
+        if d == 0:
+            size = x
+        elif prev_k == k + 1:
+            size = x - prev_x
+        else:
+            size = y - prev_y
+        if size > 0:
+            blocks.append((x - size, y - size, size))
+        x, y = prev_x, prev_y
+    blocks.reverse()
+    return blocks
+
+
+def _common_affixes(old, new):
+    """Return the length of the common prefix and suffix, without splitting a '\\r\\n'."""
+    limit = min(len(old), len(new))
+    prefix = 0
+    while prefix < limit and old[prefix] == new[prefix]:
+        prefix += 1
+    if 0 < prefix and old[prefix - 1] == "\r" and (old[prefix:prefix + 1] == "\n" or new[prefix:prefix + 1] == "\n"):
+        prefix -= 1
+
+    limit -= prefix
+    suffix = 0
+    while suffix < limit and old[-1 - suffix] == new[-1 - suffix]:
+        suffix += 1
+    if 0 < suffix and old[-suffix] == "\n" and (old[-1 - suffix:-suffix] == "\r" or new[-1 - suffix:-suffix] == "\r"):
+        suffix -= 1
+    return prefix, suffix
+
+
+def _position(starts, offset):
+    """Return the LSP position of an offset, given the offsets at which lines start."""
+    line = bisect.bisect_right(starts, offset) - 1
+    return {"line": line, "character": offset - starts[line]}
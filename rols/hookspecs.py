@@ -27,6 +27,15 @@ def rols_completions(config, workspace, document, position):
     pass
 
 
+@hookspec(firstresult=True)
+def rols_completion_item_resolve(config, workspace, document, completion_item):
+    """Fill in the details of a completion item left out of the completions.
+
+    Returns:
+        dict: The resolved completion item.
+    """
+
+
 @hookspec
 def rols_definitions(config, workspace, document, position):
     pass
@@ -93,7 +102,7 @@ def rols_initialize(config, workspace):
 
 
 @hookspec
-def rols_initialized():
+def rols_initialized(config, workspace):
     pass
 
 
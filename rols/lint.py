@@ -0,0 +1,160 @@
+"""Concurrent execution of the rols_lint hook.
+
+Calling the rols_lint hook through pluggy runs every linter one after the
+other, so the slowest of them decides when any diagnostics are shown.
+The LintExecutor calls each rols_lint implementation on its own worker and
+publishes the merged diagnostics every time one of them finishes. Linters
+whose inputs didn't change since their last run aren't run again.
+"""
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from .stats import STATS
+
+log = logging.getLogger(__name__)
+
+MAX_WORKERS = 8
+
+
+class LintExecutor(object):
+    """Run the rols_lint implementations of all plugins concurrently.
+
+    The linters are run on a thread pool. Only the ones waiting on a
+    subprocess (flake8, pylint) actually overlap; the in-process linters
+    (pyflakes, pycodestyle, mccabe, pydocstyle) are pure Python and hold the
+    GIL, so they still run one at a time, but no longer wait for the slower
+    ones. Diagnostics of every plugin are kept per document, so a slow
+    linter keeps showing its previous diagnostics until it finishes.
+    """
+
+    def __init__(self, max_workers=MAX_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._lock = threading.Lock()
+        # Documents mapped to the id of their latest lint run. Ids are never reused, even
+        # once a document is forgotten, so runs still in flight can't pass for newer ones.
+        self._runs = {}
+        self._run_ids = itertools.count(1)
+        # Documents mapped to the inputs and last diagnostics of each plugin
+        self._diagnostics = {}
+        # Lint runs mapped to their start time, and the CPU time, linters left and diagnostics so far
+        self._timings = {}
+
+    def lint(self, hook_caller, publish, doc_uri, cache_key=None, **kwargs):
+        """Lint the given document with every implementation of the hook.
+
+        Args:
+            hook_caller: The (subset) pluggy hook caller of rols_lint.
+            publish (callable): Called with the document uri and the merged
+                diagnostics every time a linter finishes.
+            doc_uri (str): The document being linted.
+            cache_key (callable): Given a plugin name, returns a key of the
+                inputs of its linter. The previous diagnostics of the plugin
+                are reused while the key doesn't change.
+            **kwargs: The hook arguments.
+
+        The implementations are called directly rather than through pluggy,
+        and concurrently, so tryfirst and trylast only decide the order of the
+        merged diagnostics. Hook wrappers need pluggy's call loop and are skipped.
+        """
+        started = time.perf_counter()
+        hookimpls = []
+        for hookimpl in hook_caller.get_hookimpls():
+            if hookimpl.hookwrapper or getattr(hookimpl, "wrapper", False):
+                log.warning("Skipping the rols_lint hook wrapper of %s", hookimpl.plugin_name)
+                continue
+            hookimpls.append(hookimpl)
+        plugin_names = [hookimpl.plugin_name for hookimpl in hookimpls]
+        keys = {name: cache_key(name) if cache_key else None for name in plugin_names}
+
+        with self._lock:
+            run = next(self._run_ids)
+            self._runs[doc_uri] = run
+            previous = self._diagnostics.get(doc_uri, {})
+            results = {name: previous.get(name, (None, [])) for name in plugin_names}
+            self._diagnostics[doc_uri] = results
+
+            stale = []
+            for hookimpl in hookimpls:
+                key = keys[hookimpl.plugin_name]
+                if key is None or results[hookimpl.plugin_name][0] != key:
+                    stale.append(hookimpl)
+                else:
+                    log.debug("Reusing %s diagnostics of %s", hookimpl.plugin_name, doc_uri)
+
+            if not stale:
+                diagnostics = _merge(results, plugin_names)
+                publish(doc_uri, diagnostics)
+                STATS.record(None, "rols_lint", time.perf_counter() - started, 0, diagnostics)
+                return
+            self._timings[(doc_uri, run)] = [started, 0, len(stale), []]
+
+        for hookimpl in stale:
+            name = hookimpl.plugin_name
+            future = self._executor.submit(_call_hookimpl, hookimpl, kwargs)
+            future.add_done_callback(
+                partial(self._linter_done, publish, doc_uri, run, name, keys[name], plugin_names)
+            )
+
+    def invalidate(self):
+        """Forget the inputs of all the linters, e.g. when files they may depend on changed."""
+        with self._lock:
+            for results in self._diagnostics.values():
+                for name, (_key, diagnostics) in list(results.items()):
+                    results[name] = (None, diagnostics)
+
+    def forget(self, doc_uri):
+        """Drop the state kept for a document, e.g. once it's closed."""
+        with self._lock:
+            self._runs.pop(doc_uri, None)
+            self._diagnostics.pop(doc_uri, None)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+    def _linter_done(self, publish, doc_uri, run, plugin_name, key, plugin_names, future):
+        cpu = 0
+        try:
+            diagnostics, cpu = future.result()
+            diagnostics = diagnostics or []
+        except Exception:  # pylint: disable=broad-except
+            log.exception("Failed to run %s linter on %s", plugin_name, doc_uri)
+            # Run it again next time
+            key, diagnostics = None, []
+
+        with self._lock:
+            self._record_run(doc_uri, run, cpu, diagnostics)
+            if self._runs.get(doc_uri) != run:
+                # A newer lint run has been started, or the document was closed
+                return
+            results = self._diagnostics[doc_uri]
+            results[plugin_name] = (key, diagnostics)
+            # Publish while holding the lock so the notifications can't be reordered
+            publish(doc_uri, _merge(results, plugin_names))
+
+    def _record_run(self, doc_uri, run, cpu, diagnostics):
+        """Record the whole lint run in the rols_lint hook statistics once its last linter finished."""
+        timing = self._timings[(doc_uri, run)]
+        timing[1] += cpu
+        timing[2] -= 1
+        timing[3].extend(diagnostics)
+        if timing[2] == 0:
+            del self._timings[(doc_uri, run)]
+            STATS.record(None, "rols_lint", time.perf_counter() - timing[0], timing[1], timing[3])
+
+
+def _merge(results, plugin_names):
+    return [diag for name in plugin_names for diag in results[name][1]]
+
+
+def _call_hookimpl(hookimpl, kwargs):
+    """Call the implementation, recorded in the statistics of its plugin, and return its result and CPU time."""
+    cpu = time.thread_time()
+    function = hookimpl.function
+    if not getattr(function, "rols_measured", False):
+        function = STATS.measure(hookimpl.plugin_name, "rols_lint", function)
+    result = function(*[kwargs[argname] for argname in hookimpl.argnames])
+    return result, time.thread_time() - cpu
@@ -0,0 +1,106 @@
+"""Resident flake8 process used by the flake8 plugin.
+
+Spawning flake8 for every lint pays for the interpreter startup and the
+plugin discovery each time. This worker keeps one initialized flake8
+Application per set of arguments and lints the jobs it receives on stdin,
+one JSON object per line:
+
+    {"args": ["-", "--max-line-length=100"], "source": "..."}
+
+For each job a line with the flake8 output is written to stdout:
+
+    {"stdout": "stdin:1:1: F401 'os' imported but unused\\n", "stderr": ""}
+
+or {"error": "..."} when flake8 couldn't be run, in which case the plugin
+falls back to spawning flake8.
+"""
+import io
+import json
+import os
+import sys
+
+# Initialized flake8 applications, by their arguments
+MAX_APPLICATIONS = 16
+# Files flake8 reads its configuration from, see flake8.options.config
+PROJECT_CONFIGS = ("setup.cfg", "tox.ini", ".flake8")
+
+
+def main():
+    if sys.path and os.path.abspath(sys.path[0]) == os.path.dirname(os.path.abspath(__file__)):
+        # Don't let the plugin modules shadow the modules flake8 imports
+        sys.path.pop(0)
+
+    # Anything printed while linting must not corrupt the responses
+    responses = os.fdopen(os.dup(sys.stdout.fileno()), "w")
+    sys.stdout = sys.stderr
+
+    applications = {}
+    for line in sys.stdin:
+        job = json.loads(line)
+        key = (tuple(job["args"]), _config_stamp(job["args"]))
+        try:
+            response = _lint(applications, key, job["source"])
+        except BaseException as e:  # pylint: disable=broad-except
+            # flake8 raises SystemExit on bad arguments
+            applications.pop(key, None)
+            response = {"error": repr(e)}
+
+        responses.write(json.dumps(response) + "\n")
+        responses.flush()
+
+
+def _lint(applications, key, source):
+    from flake8 import utils
+
+    stdout, stderr = io.StringIO(), io.StringIO()
+    old_stdout, old_stderr = sys.stdout, sys.stderr
+    old_stdin_get_value = utils.stdin_get_value
+    sys.stdout, sys.stderr = stdout, stderr
+    utils.stdin_get_value = lambda: source
+    try:
+        app = _application(applications, key)
+        app.run_checks()
+        app.report_errors()
+    finally:
+        sys.stdout, sys.stderr = old_stdout, old_stderr
+        utils.stdin_get_value = old_stdin_get_value
+    return {"stdout": stdout.getvalue(), "stderr": stderr.getvalue()}
+
+
+def _application(applications, key):
+    app = applications.get(key)
+    if app is None:
+        from flake8.main import application
+
+        if len(applications) >= MAX_APPLICATIONS:
+            applications.pop(next(iter(applications)))
+        app = application.Application()
+        app.initialize(list(key[0]))
+        applications[key] = app
+    return app
+
+
+def _config_stamp(args):
+    """Return the modification times of the files flake8 would read its configuration from."""
+    paths = [arg.split("=", 1)[1] for arg in args if arg.startswith("--config=")]
+    paths.append(os.path.join(os.environ.get("XDG_CONFIG_HOME", os.path.expanduser("~/.config")), "flake8"))
+
+    directory = os.getcwd()
+    while True:
+        paths.extend(os.path.join(directory, name) for name in PROJECT_CONFIGS)
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            break
+        directory = parent
+
+    stamp = []
+    for path in paths:
+        try:
+            stamp.append(os.stat(path).st_mtime)
+        except OSError:
+            stamp.append(None)
+    return tuple(stamp)
+
+
+if __name__ == "__main__":
+    main()
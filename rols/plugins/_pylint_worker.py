@@ -0,0 +1,89 @@
+"""Long-lived pylint process used by the pylint plugin.
+
+Spawning pylint for every save means importing pylint and rebuilding
+astroid's module cache each time. This worker stays alive and lints the
+jobs it receives on stdin, one JSON object per line:
+
+    {"path": "/path/to/file.py", "source": "...", "args": ["--disable=..."]}
+
+For each job a line with the JSON output of pylint is written to stdout:
+
+    {"stdout": "<pylint JSON report>", "stderr": "..."}
+
+astroid's MANAGER cache is kept between jobs; only the modules whose file
+changed since they were cached are dropped from it.
+"""
+import io
+import json
+import os
+import sys
+
+
+def main():
+    if sys.path and os.path.abspath(sys.path[0]) == os.path.dirname(os.path.abspath(__file__)):
+        # Don't let the plugin modules shadow the modules pylint imports
+        sys.path.pop(0)
+
+    # Anything printed while linting must not corrupt the responses
+    responses = os.fdopen(os.dup(sys.stdout.fileno()), "w")
+    sys.stdout = sys.stderr
+
+    from astroid import MANAGER
+
+    mtimes = {}
+    for line in sys.stdin:
+        job = json.loads(line)
+        _invalidate_modules(MANAGER.astroid_cache, mtimes, job["path"])
+        stdout, stderr = _lint(job["path"], job["source"], job["args"])
+        _invalidate_modules(MANAGER.astroid_cache, mtimes)
+
+        responses.write(json.dumps({"stdout": stdout, "stderr": stderr}) + "\n")
+        responses.flush()
+
+
+def _lint(path, source, args):
+    from pylint import lint
+    from pylint.reporters import JSONReporter
+    try:
+        from pylint.lint import pylinter as stdin_module
+    except ImportError:
+        stdin_module = lint
+
+    stdout, stderr = io.StringIO(), io.StringIO()
+    old_stdout, old_stderr = sys.stdout, sys.stderr
+    old_read_stdin = stdin_module._read_stdin
+    sys.stdout, sys.stderr = stdout, stderr
+    stdin_module._read_stdin = lambda: source
+    try:
+        lint.Run(list(args) + ["--from-stdin", path], reporter=JSONReporter(stdout), exit=False)
+    except BaseException as e:  # pylint: disable=broad-except
+        # pylint raises SystemExit on bad arguments
+        stderr.write("Failed to run pylint: %r\n" % e)
+    finally:
+        sys.stdout, sys.stderr = old_stdout, old_stderr
+        stdin_module._read_stdin = old_read_stdin
+    return stdout.getvalue(), stderr.getvalue()
+
+
+def _invalidate_modules(astroid_cache, mtimes, linted_path=None):
+    """Drop the modules whose files changed since they were cached.
+
+    The module of the linted file is always dropped since its source
+    comes from the job and not from the disk.
+    """
+    for modname, module in list(astroid_cache.items()):
+        path = getattr(module, "file", None)
+        if not path:
+            continue
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            mtime = None
+
+        if path == linted_path or mtimes.setdefault(modname, mtime) != mtime:
+            del astroid_cache[modname]
+            mtimes.pop(modname, None)
+
+
+if __name__ == "__main__":
+    main()
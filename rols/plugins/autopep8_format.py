@@ -3,6 +3,7 @@ import logging
 import pycodestyle
 from autopep8 import fix_code, continued_indentation as autopep8_c_i
 from rols import hookimpl
+from rols.diff import text_edits
 
 log = logging.getLogger(__name__)
 
@@ -36,27 +37,14 @@ def _format(config, document, line_range=None):
     del pycodestyle._checks['logical_line'][pycodestyle.continued_indentation]
     pycodestyle.register_check(autopep8_c_i)
 
-    new_source = fix_code(document.source, options=options)
+    source = document.source
+    new_source = fix_code(source, options=options)
 
     # Switch it back
     del pycodestyle._checks['logical_line'][autopep8_c_i]
     pycodestyle.register_check(pycodestyle.continued_indentation)
 
-    if new_source == document.source:
-        return []
-
-    # I'm too lazy at the moment to parse diffs into TextEdit items
-    # So let's just return the entire file...
-    return [
-        {
-            "range": {
-                "start": {"line": 0, "character": 0},
-                # End char 0 of the line after our document
-                "end": {"line": len(document.lines), "character": 0},
-            },
-            "newText": new_source,
-        }
-    ]
+    return text_edits(source, new_source)
 
 
 def _autopep8_config(config, document=None):
@@ -6,16 +6,21 @@ import re
 import sys
 from subprocess import PIPE, Popen
 
-from rols import hookimpl, lsp
+from rols import _utils, hookimpl, lsp
 
 log = logging.getLogger(__name__)
 FIX_IGNORES_RE = re.compile(r'([^a-zA-Z0-9_,]*;.*(\W+||$))')
 
+# Keeps flake8 and its plugins loaded between lint runs
+WORKER = _utils.WorkerProcess(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "_flake8_worker.py")
+)
+
 
 @hookimpl
 def rols_settings():
     # Default flake8 to disabled
-    return {"plugins": {"flake8": {"enabled": False}}}
+    return {"plugins": {"flake8": {"enabled": False, "daemon": False}}}
 
 
 @hookimpl
@@ -44,20 +49,39 @@ def rols_lint(workspace, document):
 
     # Call the flake8 utility then parse diagnostics from stdout
     flake8_executable = settings.get('executable', 'flake8')
+    # The daemon runs the flake8 installed along with us, so it can't be
+    # used when a specific executable is configured
+    use_daemon = settings.get('daemon') and not settings.get('executable')
 
     args = build_args(opts)
-    output = run_flake8(flake8_executable, args, document)
+    output = run_flake8(flake8_executable, args, document, use_daemon=use_daemon)
     return parse_stdout(document, output)
 
 
-def run_flake8(flake8_executable, args, document):
+def run_flake8(flake8_executable, args, document, use_daemon=False):
     """Run flake8 with the provided arguments, logs errors
     from stderr if any.
+
+    When use_daemon is set, the document is linted by the resident flake8
+    worker, falling back to spawning flake8 if the worker fails.
     """
     # a quick temporary fix to deal with Atom
     args = [(i if not i.startswith('--ignore=') else FIX_IGNORES_RE.sub('', i))
             for i in args if i is not None]
 
+    if use_daemon:
+        log.debug("Calling the flake8 daemon with args: '%s'", args)
+        try:
+            response = WORKER.request({"args": args, "source": document.source})
+        except _utils.WorkerTimeout:
+            # Don't spawn flake8 to hang on the same file again
+            return ""
+        if response is not None and "error" not in response:
+            if response["stderr"]:
+                log.error("Error while running flake8 '%s'", response["stderr"])
+            return response["stdout"]
+        log.debug("flake8 daemon failed (%s), spawning %s", response, flake8_executable)
+
     # if executable looks like a path resolve it
     if not os.path.isfile(flake8_executable) and os.sep in flake8_executable:
         flake8_executable = os.path.abspath(
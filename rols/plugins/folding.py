@@ -14,10 +14,13 @@ IDENTATION_REGEX = re.compile(r"(\s+).+")
 
 @hookimpl
 def rols_folding_range(document):
-    program = document.source + "\n"
-    lines = program.splitlines()
-    tree = parso.parse(program)
-    ranges = __compute_folding_ranges(tree, lines)
+    source = document.source
+    if source.endswith(("\n", "\r")):
+        with document.borrowed_parso_tree() as tree:
+            ranges = __compute_folding_ranges(tree, document)
+    else:
+        # The last node only ends on the line after it when the file ends with a line break
+        ranges = __compute_folding_ranges(parso.parse(source + "\n"), document)
 
     results = []
     for (start_line, end_line) in ranges:
@@ -44,7 +47,7 @@ def __empty_identation_stack(
     identation_stack, level_limits, current_line, folding_ranges
 ):
     while identation_stack != []:
-        upper_level = identation_stack.pop(0)
+        upper_level = identation_stack.pop()
         level_start = level_limits.pop(upper_level)
         folding_ranges.append((level_start, current_line))
     return folding_ranges
@@ -53,27 +56,29 @@ def __empty_identation_stack(
 def __match_identation_stack(
     identation_stack, level, level_limits, folding_ranges, current_line
 ):
-    upper_level = identation_stack.pop(0)
+    upper_level = identation_stack.pop()
     while upper_level >= level:
         level_start = level_limits.pop(upper_level)
         folding_ranges.append((level_start, current_line))
-        upper_level = identation_stack.pop(0)
-    identation_stack.insert(0, upper_level)
+        upper_level = identation_stack.pop()
+    identation_stack.append(upper_level)
     return identation_stack, folding_ranges
 
 
-def __compute_folding_ranges_identation(text):
-    lines = text.splitlines()
+def __compute_folding_ranges_identation(lines, first_line=0):
+    """Fold the lines from first_line on by their indentation, in a single pass.
+
+    The identation stack holds the enclosing levels, innermost last.
+    """
     folding_ranges = []
     identation_stack = []
     level_limits = {}
     current_level = 0
-    current_line = 0
-    while lines[current_line] == "":
+    current_line = first_line
+    while current_line < len(lines) and lines[current_line] == "":
         current_line += 1
-    for i, line in enumerate(lines):
-        if i < current_line:
-            continue
+    for i in range(current_line, len(lines)):
+        line = lines[i]
         i += 1
         identation_match = IDENTATION_REGEX.match(line)
         if identation_match is not None:
@@ -81,7 +86,7 @@ def __compute_folding_ranges_identation(text):
             level = len(whitespace)
             if level > current_level:
                 level_limits[current_level] = current_line
-                identation_stack.insert(0, current_level)
+                identation_stack.append(current_level)
                 current_level = level
             elif level < current_level:
                 identation_stack, folding_ranges = __match_identation_stack(
@@ -118,14 +123,10 @@ def __check_if_node_is_valid(node):
 
 
 def __handle_skip(stack, skip):
-    body = stack[skip]
-    children = [body]
-    if hasattr(body, "children"):
-        children = body.children
-    stack = stack[:skip] + children + stack[skip + 1 :]
-    node = body
+    # The stack is reversed, the node to visit `skip` nodes after the next one is at -1 - skip
+    body = stack[-1 - skip]
     end_line, _ = body.end_pos
-    return node, end_line
+    return body, end_line
 
 
 def __handle_flow_nodes(node, end_line, stack):
@@ -135,7 +136,7 @@ def __handle_flow_nodes(node, end_line, stack):
         if node.value in {"if", "elif", "with", "while"}:
             node, end_line = __handle_skip(stack, 2)
         elif node.value in {"except"}:
-            first_node = stack[0]
+            first_node = stack[-1]
             if isinstance(first_node, tree_nodes.Operator):
                 node, end_line = __handle_skip(stack, 1)
             else:
@@ -144,14 +145,14 @@ def __handle_flow_nodes(node, end_line, stack):
             node, end_line = __handle_skip(stack, 4)
         elif node.value in {"else"}:
             node, end_line = __handle_skip(stack, 1)
-    return end_line, from_keyword, node, stack
+    return end_line, from_keyword, node
 
 
 def __compute_start_end_lines(node, stack):
     start_line, _ = node.start_pos
     end_line, _ = node.end_pos
     modified = False
-    end_line, from_keyword, node, stack = __handle_flow_nodes(node, end_line, stack)
+    end_line, from_keyword, node = __handle_flow_nodes(node, end_line, stack)
 
     last_leaf = node.get_last_leaf()
     last_newline = isinstance(last_leaf, tree_nodes.Newline)
@@ -165,43 +166,46 @@ def __compute_start_end_lines(node, stack):
         kind = node.type
         if kind in {"suite", "atom", "atom_expr", "arglist"}:
             if len(stack) > 0:
-                next_node = stack[0]
+                next_node = stack[-1]
                 next_line, _ = next_node.start_pos
                 if next_line > end_line:
                     end_line += 1
                     modified = True
     if not last_newline and not modified and not last_operator:
         end_line += 1
-    return start_line, end_line, stack
+    return start_line, end_line
+
 
+def __compute_folding_ranges(tree, document):
+    """Walk the tree once, in pre-order, and fold its compound nodes.
 
-def __compute_folding_ranges(tree, lines):
+    The nodes left to visit are kept in a list in reverse order, so visiting
+    the next node and scheduling its children are cheap at the end of the list.
+    """
     folding_ranges = {}
     stack = [tree]
 
     while len(stack) > 0:
-        node = stack.pop(0)
+        node = stack.pop()
         if isinstance(node, tree_nodes.Newline):
             # Skip newline nodes
             continue
         elif isinstance(node, tree_nodes.PythonErrorNode):
-            # Fallback to identation-based (best-effort) folding
+            # Fallback to identation-based (best-effort) folding of the remaining lines
             start_line, _ = node.start_pos
-            start_line -= 1
-            padding = [""] * start_line
-            text = "\n".join(padding + lines[start_line:]) + "\n"
-            identation_ranges = __compute_folding_ranges_identation(text)
+            lines = (document.source + "\n").splitlines()
+            identation_ranges = __compute_folding_ranges_identation(lines, start_line - 1)
             folding_ranges = __merge_folding_ranges(folding_ranges, identation_ranges)
             break
         elif not isinstance(node, SKIP_NODES):
             valid = __check_if_node_is_valid(node)
             if valid:
-                start_line, end_line, stack = __compute_start_end_lines(node, stack)
+                start_line, end_line = __compute_start_end_lines(node, stack)
                 if end_line > start_line:
                     current_end = folding_ranges.get(start_line, -1)
                     folding_ranges[start_line] = max(current_end, end_line)
         if hasattr(node, "children"):
-            stack = node.children + stack
+            stack.extend(reversed(node.children))
 
     folding_ranges = sorted(folding_ranges.items())
     return folding_ranges
@@ -1,12 +1,13 @@
 # Copyright 2017 Palantir Technologies, Inc.
 import logging
-from rols import hookimpl, lsp, _utils
+from rols import hookimpl, lsp, scheduling, _utils
 
 log = logging.getLogger(__name__)
 
 
 @hookimpl
 def rols_document_highlight(document, position):
+    scheduling.check_cancelled()
     code_position = _utils.position_to_jedi_linecolumn(document, position)
     usages = document.rope_script().get_references(**code_position)
 
@@ -1,19 +1,19 @@
 # Copyright 2017 Palantir Technologies, Inc.
 import logging
-from distutils.version import LooseVersion
 
-from rols import _utils, hookimpl
+from rols import _utils, hookimpl, scheduling
 
 log = logging.getLogger(__name__)
 
 
 @hookimpl
 def rols_hover(document, position):
+    scheduling.check_cancelled()
     code_position = _utils.position_to_jedi_linecolumn(document, position)
     definitions = document.rope_script().infer(**code_position)
     word = document.word_at_position(position)
 
-    if LooseVersion(_utils.JEDI_VERSION) >= LooseVersion("0.15.0"):
+    if _utils.version_tuple(_utils.JEDI_VERSION) >= (0, 15):
         # Find first exact matching definition
         definition = next((x for x in definitions if x.name == word), None)
 
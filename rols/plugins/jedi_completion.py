@@ -1,10 +1,12 @@
 # Copyright 2017 Palantir Technologies, Inc.
+import itertools
 import logging
 import os.path as osp
+import threading
 
 import parso
 
-from rols import _utils, hookimpl, lsp
+from rols import _utils, hookimpl, lsp, scheduling
 
 log = logging.getLogger(__name__)
 
@@ -49,6 +51,9 @@ _IMPORTS = ("import_name", "import_from")
 # Types of parso node for errors
 _ERRORS = ("error_node",)
 
+# Number of completions whose label and snippet are computed right away, None for all of them
+RESOLVE_AT_MOST = None
+
 
 @hookimpl
 def rols_completions(config, document, position):
@@ -58,6 +63,7 @@ def rols_completions(config, document, position):
 
     code_position["fuzzy"] = settings.get("fuzzy", False)
     completions = document.rope_script(use_document_path=True).complete(**code_position)
+    scheduling.check_cancelled()
 
     if not completions:
         return None
@@ -67,26 +73,98 @@ def rols_completions(config, document, position):
 
     should_include_params = settings.get('include_params')
     should_include_class_objects = settings.get('include_class_objects', True)
+    resolve_at_most = settings.get('resolve_at_most', RESOLVE_AT_MOST)
 
     include_params = snippet_support and should_include_params and use_snippets(document, position)
     include_class_objects = snippet_support and should_include_class_objects and use_snippets(document, position)
 
-    ready_completions = [
-        _format_completion(c, include_params)
-        for c in completions
-    ]
+    if resolve_at_most is None or (include_params and not _resolves_insert_text(config)):
+        # Snippets are only left to the resolution of the items by the clients resolving insertText
+        resolve_at_most = len(completions)
+
+    session = _SESSION.start(document.uri, completions)
+    ready_completions = []
+    for index, c in enumerate(completions):
+        # Computing the labels and snippets of all the completions takes a while
+        scheduling.check_cancelled()
+        completion = _format_completion(c, include_params, resolve=index < resolve_at_most)
+        completion['data'] = _completion_data(document, session, index,
+                                              include_params and index >= resolve_at_most)
+        ready_completions.append(completion)
 
     if include_class_objects:
-        for c in completions:
+        for index, c in enumerate(completions):
             if c.type == 'class':
-                completion_dict = _format_completion(c, False)
+                scheduling.check_cancelled()
+                completion_dict = _format_completion(c, False, resolve=index < resolve_at_most)
                 completion_dict['kind'] = lsp.CompletionItemKind.TypeParameter
                 completion_dict['label'] += ' object'
+                completion_dict['data'] = _completion_data(document, session, index, False)
                 ready_completions.append(completion_dict)
 
     return ready_completions or None
 
 
+@hookimpl
+def rols_completion_item_resolve(config, completion_item):
+    """Add the documentation, detail and deferred snippet to a completion item"""
+    data = completion_item.get('data') or {}
+    d = _SESSION.get(data.get('doc_uri'), data.get('session'), data.get('index'))
+    if d is None:
+        return None
+
+    completion_item['detail'] = _detail(d)
+    completion_item['documentation'] = _utils.format_docstring(d.docstring())
+    if data.get('params') and _resolves_insert_text(config):
+        _add_snippet(completion_item, d)
+    return completion_item
+
+
+class _CompletionSession(object):
+    """The jedi completions of the latest completion request.
+
+    Completion items only get the documentation and detail of their
+    completion once the client resolves them, which it does while the user
+    goes through the list of the latest completion request.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        self._session = None
+
+    def start(self, doc_uri, completions):
+        with self._lock:
+            session_id = next(self._ids)
+            self._session = (doc_uri, session_id, completions)
+        return session_id
+
+    def get(self, doc_uri, session_id, index):
+        with self._lock:
+            if self._session is None or self._session[:2] != (doc_uri, session_id):
+                return None
+            completions = self._session[2]
+        if not isinstance(index, int) or not 0 <= index < len(completions):
+            return None
+        return completions[index]
+
+
+_SESSION = _CompletionSession()
+
+
+def _completion_data(document, session, index, params):
+    data = {'doc_uri': document.uri, 'session': session, 'index': index}
+    if params:
+        # The snippet is left to the resolution of the item
+        data['params'] = True
+    return data
+
+
+def _resolves_insert_text(config):
+    completion_item = config.capabilities.get('textDocument', {}).get('completion', {}).get('completionItem', {})
+    return 'insertText' in completion_item.get('resolveSupport', {}).get('properties', [])
+
+
 def is_exception_class(name):
     """
     Determine if a class name is an instance of an Exception.
@@ -138,12 +216,15 @@ def use_snippets(document, position):
     return expr_type not in _IMPORTS and not (expr_type in _ERRORS and "import" in code)
 
 
-def _format_completion(d, include_params=True):
+def _format_completion(d, include_params=True, resolve=True):
+    """Format a jedi completion, leaving out what the client resolves later.
+
+    Without resolve only the name of the completion is used, since its
+    label and snippet need its signatures.
+    """
     completion = {
-        "label": _label(d),
+        "label": _label(d) if resolve else d.name,
         "kind": _TYPE_MAP.get(d.type),
-        "detail": _detail(d),
-        "documentation": _utils.format_docstring(d.docstring()),
         "sortText": _sort_text(d),
         "insertText": d.name,
     }
@@ -154,8 +235,15 @@ def _format_completion(d, include_params=True):
         path = path.replace('/', '\\/')
         completion['insertText'] = path
 
+    if include_params and resolve:
+        _add_snippet(completion, d)
+
+    return completion
+
+
+def _add_snippet(completion, d):
     sig = d.get_signatures()
-    if (include_params and sig and not is_exception_class(d.name)):
+    if sig and not is_exception_class(d.name):
         positional_args = [param for param in sig[0].params
                            if '=' not in param.description and
                            param.name not in {'/', '*'}]
@@ -176,8 +264,6 @@ def _format_completion(d, include_params=True):
         else:
             completion["insertText"] = d.name + "()"
 
-    return completion
-
 
 def _label(definition):
     sig = definition.get_signatures()
@@ -1,6 +1,6 @@
 # Copyright 2017 Palantir Technologies, Inc.
 import logging
-from rols import hookimpl, uris, _utils
+from rols import hookimpl, scheduling, uris, _utils
 
 log = logging.getLogger(__name__)
 
@@ -8,6 +8,7 @@ log = logging.getLogger(__name__)
 @hookimpl
 def rols_definitions(config, document, position):
     settings = config.plugin_settings('jedi_definition')
+    scheduling.check_cancelled()
     code_position = _utils.position_to_jedi_linecolumn(document, position)
     definitions = document.rope_script().goto(
         follow_imports=settings.get('follow_imports', True),
@@ -1,13 +1,15 @@
 # Copyright 2020 Palantir Technologies, Inc.
+import io
 import logging
 
-from pyls import hookimpl, uris, _utils
+from rols import hookimpl, uris, _utils
+from rols.diff import text_edits
 
 log = logging.getLogger(__name__)
 
 
 @hookimpl
-def pyls_rename(config, workspace, document, position, new_name):  # pylint: disable=unused-argument
+def rols_rename(config, workspace, document, position, new_name):  # pylint: disable=unused-argument
     log.debug('Executing rename of %s to %s', document.word_at_position(position), new_name)
     kwargs = _utils.position_to_jedi_linecolumn(document, position)
     kwargs['new_name'] = new_name
@@ -26,22 +28,14 @@ def pyls_rename(config, workspace, document, position, new_name):  # pylint: dis
                 'uri': uri,
                 'version': doc.version if doc else None
             },
-            'edits': [
-                {
-                    'range': {
-                        'start': {'line': 0, 'character': 0},
-                        'end': {
-                            'line': _num_lines(changed_file.get_new_code()),
-                            'character': 0,
-                        },
-                    },
-                    'newText': changed_file.get_new_code(),
-                }
-            ],
+            'edits': text_edits(_old_source(doc, file_path), changed_file.get_new_code()),
         })
     return {'documentChanges': changes}
 
 
-def _num_lines(file_contents):
-    'Count the number of lines in the given string.'
-    return len(file_contents.splitlines())
+def _old_source(document, file_path):
+    'The source the edits apply to: the open document, or the file on disk.'
+    if document is not None:
+        return document.source
+    with io.open(str(file_path), 'r', encoding='utf-8', newline='') as f:
+        return f.read()
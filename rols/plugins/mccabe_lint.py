@@ -1,5 +1,4 @@
 # Copyright 2017 Palantir Technologies, Inc.
-import ast
 import logging
 
 import mccabe
@@ -18,7 +17,7 @@ def rols_lint(config, document):
     log.debug("Running mccabe lint with threshold: %s", threshold)
 
     try:
-        tree = compile(document.source, document.path, "exec", ast.PyCF_ONLY_AST)
+        tree = document.ast_tree()
     except SyntaxError:
         # We'll let the other linters point this one out
         return None
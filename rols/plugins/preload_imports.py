@@ -1,10 +1,18 @@
 # Copyright 2017 Palantir Technologies, Inc.
 import logging
+import re
+import threading
 
 from rols import hookimpl
 
 log = logging.getLogger(__name__)
 
+# The modules imported by a document, the first one of each import statement only
+IMPORT_REGEX = re.compile(r"^[ \t]*(?:from|import)[ \t]+([\w.]+)", re.MULTILINE)
+
+# Seconds to wait for the symbol index of the workspace before ranking the modules
+RANK_TIMEOUT = 1
+
 MODULES = [
     "OpenGL",
     "PIL",
@@ -64,11 +72,114 @@ def rols_settings():
     }
 
 
+_preloader = None
+_preloader_lock = threading.Lock()
+
+
 @hookimpl
-def rols_initialize(config):
-    for mod_name in config.plugin_settings("preload").get("modules", []):
+def rols_initialized(config, workspace):
+    """Start preloading once the client got its capabilities, the modules the workspace imports first."""
+    global _preloader  # pylint: disable=global-statement
+    modules = config.plugin_settings("preload").get("modules", [])
+    with _preloader_lock:
+        if _preloader is not None or not modules:
+            return
+        _preloader = Preloader(modules, workspace)
+        for doc_uri in workspace.documents:
+            _preloader.prioritize(imported_modules(workspace.get_document(doc_uri).source))
+        _preloader.start()
+
+
+@hookimpl
+def rols_document_did_open(document):
+    # The modules of an opened document are preloaded next, since they're needed to complete in it
+    with _preloader_lock:
+        preloader = _preloader
+    if preloader is not None:
+        preloader.prioritize(imported_modules(document.source))
+
+
+def imported_modules(source):
+    """Return the names of the modules imported by the source."""
+    return IMPORT_REGEX.findall(source)
+
+
+class Preloader(object):
+    """Imports the preload modules one by one in a background thread.
+
+    The modules imported by the open documents come first, then the ones
+    mentioned by the most files of the workspace, then the others in order.
+
+    Args:
+        modules (List[str]): The modules to import.
+        workspace (Workspace): The workspace the modules are ranked for, and progress reported to.
+    """
+
+    def __init__(self, modules, workspace=None):
+        self._workspace = workspace
+        self._lock = threading.Lock()
+        self._pending = list(dict.fromkeys(modules))
+        self._prioritized = []
+        self._total = len(self._pending)
+        self._thread = None
+        self.preloaded = []
+
+    def prioritize(self, names):
+        """Preload the modules with the given names, or in the given packages, before the others."""
+        names = set(names)
+        with self._lock:
+            first = [mod for mod in self._pending if mod in names or mod.split(".")[0] in names]
+            self._pending = first + [mod for mod in self._pending if mod not in first]
+            self._prioritized.extend(mod for mod in first if mod not in self._prioritized)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="rols-preload")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def join(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        self._rank_by_workspace()
+        if self._workspace is None:
+            self._preload_all(lambda *args: None)
+            return
+        with self._workspace.report_progress("Preloading modules", percentage=0) as report:
+            self._preload_all(report)
+
+    def _rank_by_workspace(self):
+        index = self._workspace.symbol_index() if self._workspace is not None else None
+        if index is None:
+            return
+        # The index of a previous session is already complete, a new one is used as far as it got
+        index.join(RANK_TIMEOUT)
+        try:
+            mentions = {mod: len(index.files_mentioning(mod.split(".")[0])) for mod in self._pending}
+        except Exception as e:  # pylint: disable=broad-except
+            log.debug("Failed to rank the preload modules: %s", e)
+            return
+        with self._lock:
+            # Stable, so unmentioned modules keep their order
+            self._pending.sort(key=lambda mod: (mod not in self._prioritized, -mentions.get(mod, 0)))
+
+    def _preload_all(self, report):
+        done = 0
+        while True:
+            with self._lock:
+                if not self._pending:
+                    break
+                mod_name = self._pending.pop(0)
+            report(mod_name, 100 * done // self._total)
+            self._preload(mod_name)
+            done += 1
+        log.debug("Preloaded %s of %s modules", len(self.preloaded), self._total)
+
+    def _preload(self, mod_name):
         try:
             __import__(mod_name)
+            self.preloaded.append(mod_name)
             log.debug("Preloaded module %s", mod_name)
         except Exception:  # pylint: disable=broad-except
             # Catch any exception since not only ImportError can be raised here
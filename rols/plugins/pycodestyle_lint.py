@@ -38,7 +38,8 @@ def rols_lint(workspace, document):
 
     c = pycodestyle.Checker(
         filename=document.uri,
-        lines=document.lines,
+        # pycodestyle may strip a BOM from the lines it was given
+        lines=list(document.lines),
         options=styleguide.options,
         report=PyCodeStyleDiagnosticReport(styleguide.options),
     )
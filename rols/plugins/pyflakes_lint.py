@@ -1,6 +1,5 @@
 # Copyright 2017 Palantir Technologies, Inc.
-from pyflakes import api as pyflakes_api
-from pyflakes import messages
+from pyflakes import checker, messages
 
 from rols import hookimpl, lsp
 
@@ -23,12 +22,36 @@ PYFLAKES_ERROR_MESSAGES = (
 @hookimpl
 def rols_lint(document):
     reporter = PyflakesDiagnosticReport(document.lines)
-    pyflakes_api.check(
-        document.source.encode("utf-8"), document.path, reporter=reporter
-    )
+    check(document, reporter)
     return reporter.diagnostics
 
 
+def check(document, reporter):
+    """Same as pyflakes.api.check, but using the trees shared by the document."""
+    try:
+        tree = document.ast_tree()
+    except SyntaxError as e:
+        if e.text is None:
+            # There's an encoding problem with the file
+            reporter.unexpectedError(document.path, 'problem decoding source')
+        else:
+            reporter.syntaxError(document.path, e.args[0], e.lineno, e.offset, e.text)
+        return
+    except Exception:  # pylint: disable=broad-except
+        reporter.unexpectedError(document.path, 'problem decoding source')
+        return
+
+    try:
+        file_tokens = document.tokens()
+    except Exception:  # pylint: disable=broad-except
+        file_tokens = ()
+
+    w = checker.Checker(tree, file_tokens=file_tokens, filename=document.path)
+    w.messages.sort(key=lambda m: m.lineno)
+    for warning in w.messages:
+        reporter.flake(warning)
+
+
 class PyflakesDiagnosticReport(object):
     def __init__(self, lines):
         self.lines = lines
@@ -3,22 +3,30 @@
 import collections
 import json
 import logging
+import os
+import shlex
 import sys
 import re
 from subprocess import Popen, PIPE
 
 from pylint.epylint import py_run
 
-from rols import hookimpl, lsp
+from rols import _utils, hookimpl, lsp
 
 log = logging.getLogger(__name__)
 
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "_pylint_worker.py")
+
+
+# Keeps pylint imported and astroid's module cache warm between lint runs
+WORKER = _utils.WorkerProcess(WORKER_SCRIPT)
+
 
 class PylintLinter(object):
     last_diags = collections.defaultdict(list)
 
     @classmethod
-    def lint(cls, document, is_saved, flags=""):
+    def lint(cls, document, is_saved, flags="", use_worker=True):
         """Plugin interface to rols linter.
 
         Args:
@@ -26,6 +34,8 @@ class PylintLinter(object):
             is_saved: Whether or not the file has been saved to disk.
             flags: Additional flags to pass to pylint. Not exposed to
                 rols_lint, but used for testing.
+            use_worker: Whether to lint in the long-lived pylint worker
+                instead of spawning pylint.
 
         Returns:
             A list of dicts with the following format:
@@ -55,20 +65,21 @@ class PylintLinter(object):
             # save.
             return cls.last_diags[document.path]
 
-        # py_run will call shlex.split on its arguments, and shlex.split does
-        # not handle Windows paths (it will try to perform escaping). Turn
-        # backslashes into forward slashes first to avoid this issue.
-        path = document.path
-        if sys.platform.startswith("win"):
-            path = path.replace("\\", "/")
-
-        pylint_call = "{} -f json {}".format(path, flags)
-        log.debug("Calling pylint with '%s'", pylint_call)
-        json_out, err = py_run(pylint_call, return_std=True)
-
-        # Get strings
-        json_out = json_out.getvalue()
-        err = err.getvalue()
+        response = None
+        if use_worker:
+            log.debug("Linting %s in the pylint worker with '%s'", document.path, flags)
+            try:
+                response = WORKER.request(
+                    {"path": document.path, "source": document.source, "args": shlex.split(flags)}
+                )
+            except _utils.WorkerTimeout:
+                # Don't spawn pylint to hang on the same file again
+                return []
+
+        if response is not None:
+            json_out, err = response["stdout"], response["stderr"]
+        else:
+            json_out, err = cls._py_run(document, flags)
 
         if err != "":
             log.error("Error calling pylint: '%s'", err)
@@ -142,6 +153,20 @@ class PylintLinter(object):
         cls.last_diags[document.path] = diagnostics
         return diagnostics
 
+    @staticmethod
+    def _py_run(document, flags):
+        # py_run will call shlex.split on its arguments, and shlex.split does
+        # not handle Windows paths (it will try to perform escaping). Turn
+        # backslashes into forward slashes first to avoid this issue.
+        path = document.path
+        if sys.platform.startswith("win"):
+            path = path.replace("\\", "/")
+
+        pylint_call = "{} -f json {}".format(path, flags)
+        log.debug("Calling pylint with '%s'", pylint_call)
+        json_out, err = py_run(pylint_call, return_std=True)
+        return json_out.getvalue(), err.getvalue()
+
 
 def _build_pylint_flags(settings):
     """Build arguments for calling pylint."""
@@ -160,6 +185,8 @@ def rols_settings():
         'args': [],
         # disabled by default as it can slow down the workflow
         'executable': None,
+        # lint in a long-lived pylint process instead of spawning pylint
+        'worker': True,
     }}}
 
 
@@ -175,7 +202,7 @@ def rols_lint(config, document, is_saved):
         pylint_executable = settings.get('executable', 'pylint')
         return pylint_lint_stdin(pylint_executable, document, flags)
     flags = _build_pylint_flags(settings)
-    return PylintLinter.lint(document, is_saved, flags=flags)
+    return PylintLinter.lint(document, is_saved, flags=flags, use_worker=settings.get('worker', True))
 
 
 def build_args_stdio(settings):
@@ -1,14 +1,38 @@
 # Copyright 2017 Palantir Technologies, Inc.
+import contextlib
+import inspect
 import logging
-from rols import hookimpl, uris, _utils
+import threading
+
+import jedi
+from jedi.file_io import FileIO
+from jedi.inference import references as jedi_references
+
+from rols import hookimpl, scheduling, uris, _utils
 
 log = logging.getLogger(__name__)
 
+# The jedi versions, from the first to the one after the last, whose private search of
+# the project files is replaced by the candidate files
+JEDI_VERSIONS = ((0, 17), (0, 20))
+
+# The files jedi searches for references from the current thread, None for all the project
+_candidates = threading.local()
+_get_module_contexts_containing_name = jedi_references.get_module_contexts_containing_name
+# Whether jedi's search was replaced, None until the first search
+_patched = None
+_patch_lock = threading.Lock()
+
 
 @hookimpl
 def rols_references(document, position, exclude_declaration=False):
+    scheduling.check_cancelled()
     code_position = _utils.position_to_jedi_linecolumn(document, position)
-    usages = document.rope_script().get_references(**code_position)
+    name = document.word_at_position(position)
+    # pylint: disable=protected-access
+    candidates = document._workspace.reference_candidates(name) if name and _patch_jedi() else None
+    with only_searching(candidates):
+        usages = document.rope_script().get_references(**code_position)
 
     if exclude_declaration:
         # Filter out if the usage is the actual declaration of the thing
@@ -22,3 +46,74 @@ def rols_references(document, position, exclude_declaration=False):
             'end': {'line': d.line - 1, 'character': d.column + len(d.name)}
         }
     } for d in usages if not d.in_builtin_module()]
+
+
+@contextlib.contextmanager
+def only_searching(paths):
+    """Make jedi search references in the given files only, rather than in the whole project.
+
+    Args:
+        paths (List[str]): The candidate files, or None to search the whole project.
+    """
+    previous = getattr(_candidates, "paths", None)
+    _candidates.paths = paths
+    try:
+        yield
+    finally:
+        _candidates.paths = previous
+
+
+def _patch_jedi():
+    """Make jedi search the candidate files, if this version of jedi searches the project like we expect.
+
+    Only the reference search of jedi is replaced, and it behaves as before
+    unless only_searching() is used on the current thread. With other jedi
+    versions, the whole project is searched.
+    """
+    global _patched  # pylint: disable=global-statement
+    with _patch_lock:
+        if _patched is None:
+            _patched = _jedi_supported()
+            if _patched:
+                jedi_references.get_module_contexts_containing_name = _module_contexts_containing_name
+            else:
+                log.info("Searching references in the whole project with jedi %s", jedi.__version__)
+        return _patched
+
+
+def _jedi_supported():
+    try:
+        version = _utils.version_tuple(jedi.__version__)[:2]
+        search_params = list(inspect.signature(_get_module_contexts_containing_name).parameters)
+        file_ios_params = list(inspect.signature(jedi_references.search_in_file_ios).parameters)
+    except (AttributeError, TypeError, ValueError):
+        return False
+    return (
+        JEDI_VERSIONS[0] <= version < JEDI_VERSIONS[1] and
+        search_params == ["inference_state", "module_contexts", "name", "limit_reduction"] and
+        file_ios_params[:4] == ["inference_state", "file_io_iterator", "name", "limit_reduction"]
+    )
+
+
+def _module_contexts_containing_name(inference_state, module_contexts, name, limit_reduction=1):
+    """Replaces jedi's walk of the project files with the candidate files, when known."""
+    paths = getattr(_candidates, "paths", None)
+    if paths is None:
+        yield from _get_module_contexts_containing_name(
+            inference_state, module_contexts, name, limit_reduction=limit_reduction
+        )
+        return
+
+    for module_context in module_contexts:
+        if not module_context.is_compiled():
+            yield module_context
+
+    # Like jedi, very short names aren't searched in other modules
+    if len(name) <= 2:
+        return
+
+    searched = {str(module_context.py__file__()) for module_context in module_contexts}
+    file_ios = (FileIO(path) for path in paths if path not in searched)
+    yield from jedi_references.search_in_file_ios(
+        inference_state, file_ios, name, limit_reduction=limit_reduction
+    )
@@ -1,10 +1,12 @@
 # Copyright 2017 Palantir Technologies, Inc.
 import logging
+import os
 
 from rope.base import libutils
 from rope.refactor.rename import Rename
 
 from rols import hookimpl, uris
+from rols.diff import text_edits
 
 log = logging.getLogger(__name__)
 
@@ -29,33 +31,30 @@ def rols_rename(config, workspace, document, position, new_name):
     log.debug(
         "Executing rename of %s to %s", document.word_at_position(position), new_name
     )
-    changeset = rename.get_changes(new_name, in_hierarchy=True, docs=True)
+    # Only look for occurrences in the files mentioning the name, when known
+    name = document.word_at_position(position)
+    candidates = workspace.reference_candidates(name) if name else None
+    resources = None
+    if candidates is not None:
+        # The index may include site-packages, which must not be renamed in
+        root = os.path.join(workspace.root_path, "")
+        resources = [
+            libutils.path_to_resource(rope_project, path)
+            for path in set(candidates) | {document.path}
+            if path.startswith(root) or path == document.path
+        ]
+    changeset = rename.get_changes(new_name, in_hierarchy=True, docs=True, resources=resources)
     log.debug("Finished rename: %s", changeset.changes)
     changes = []
     for change in changeset.changes:
-        uri = uris.from_fs_path(change.resource.path)
+        uri = uris.from_fs_path(change.resource.real_path)
         doc = workspace.get_maybe_document(uri)
         changes.append({
             'textDocument': {
                 'uri': uri,
                 'version': doc.version if doc else None
             },
-            'edits': [
-                {
-                    'range': {
-                        'start': {'line': 0, 'character': 0},
-                        'end': {
-                            'line': _num_lines(change.resource),
-                            'character': 0,
-                        },
-                    },
-                    'newText': change.new_contents,
-                }
-            ]
+            # The edits apply to the buffer of open documents, which may not be saved
+            'edits': text_edits(doc.source if doc else change.resource.read(), change.new_contents),
         })
     return {'documentChanges': changes}
-
-
-def _num_lines(resource):
-    "Count the number of lines in a `File` resource."
-    return len(resource.read().splitlines())
@@ -2,7 +2,7 @@
 import logging
 import re
 
-from rols import _utils, hookimpl
+from rols import _utils, hookimpl, scheduling
 
 log = logging.getLogger(__name__)
 
@@ -15,6 +15,7 @@ DOC_REGEX = [SPHINX, EPYDOC, GOOGLE]
 
 @hookimpl
 def rols_signature_help(document, position):
+    scheduling.check_cancelled()
     code_position = _utils.position_to_jedi_linecolumn(document, position)
     signatures = document.rope_script().get_signatures(**code_position)
 
@@ -6,6 +6,7 @@ from yapf.yapflib import file_resources
 from yapf.yapflib.yapf_api import FormatCode
 
 from rols import hookimpl
+from rols.diff import text_edits
 
 log = logging.getLogger(__name__)
 
@@ -34,8 +35,9 @@ def rols_format_range(document, range):  # pylint: disable=redefined-builtin
 
 
 def _format(document, lines=None):
+    source = document.source
     new_source, changed = FormatCode(
-        document.source,
+        source,
         lines=lines,
         filename=document.filename,
         style_config=file_resources.GetDefaultStyleForDir(
@@ -46,15 +48,4 @@ def _format(document, lines=None):
     if not changed:
         return []
 
-    # I'm too lazy at the moment to parse diffs into TextEdit items
-    # So let's just return the entire file...
-    return [
-        {
-            "range": {
-                "start": {"line": 0, "character": 0},
-                # End char 0 of the line after our document
-                "end": {"line": len(document.lines), "character": 0},
-            },
-            "newText": new_source,
-        }
-    ]
+    return text_edits(source, new_source)
@@ -1,4 +1,5 @@
 # Copyright 2017 Palantir Technologies, Inc.
+import hashlib
 import logging
 import os
 import socketserver
@@ -10,7 +11,11 @@ from pyls_jsonrpc.endpoint import Endpoint
 from pyls_jsonrpc.streams import JsonRpcStreamReader, JsonRpcStreamWriter
 
 from . import _utils, lsp, uris
+from .completion import CompletionCache
 from .config import config
+from .lint import LintExecutor
+from .scheduling import RequestScheduler
+from .stats import STATS
 from .workspace import Workspace
 
 log = logging.getLogger(__name__)
@@ -114,6 +119,9 @@ class RopeLanguageServer(MethodDispatcher):
         )
         self._dispatchers = []
         self._shutdown = False
+        self._lint_executor = LintExecutor()
+        self._request_scheduler = RequestScheduler()
+        self._completions = CompletionCache()
 
     def start(self):
         """Entry point for the server."""
@@ -126,6 +134,10 @@ class RopeLanguageServer(MethodDispatcher):
             log.debug("Ignoring non-exit method during shutdown: %s", item)
             raise KeyError
 
+        # Requests with a priority class are run on the pool of their class
+        return self._request_scheduler.schedule(item, self._handler(item))
+
+    def _handler(self, item):
         try:
             return super(RopeLanguageServer, self).__getitem__(item)
         except KeyError:
@@ -143,6 +155,8 @@ class RopeLanguageServer(MethodDispatcher):
         return None
 
     def m_exit(self, **_kwargs):
+        self._lint_executor.shutdown()
+        self._request_scheduler.shutdown()
         self._endpoint.shutdown()
         self._jsonrpc_stream_reader.close()
         self._jsonrpc_stream_writer.close()
@@ -158,7 +172,7 @@ class RopeLanguageServer(MethodDispatcher):
         hook_handlers = self.config.plugin_manager.subset_hook_caller(
             hook_name, self.config.disabled_plugins
         )
-        return hook_handlers(
+        return STATS.measure(None, hook_name, hook_handlers)(
             config=self.config, workspace=workspace, document=doc, **kwargs
         )
 
@@ -169,7 +183,7 @@ class RopeLanguageServer(MethodDispatcher):
                 "resolveProvider": False,  # We may need to make this configurable
             },
             "completionProvider": {
-                "resolveProvider": False,  # We know everything ahead of time
+                "resolveProvider": True,  # The documentation is computed on resolve
                 "triggerCharacters": ["."],
             },
             "documentFormattingProvider": True,
@@ -193,6 +207,7 @@ class RopeLanguageServer(MethodDispatcher):
             "workspace": {
                 "workspaceFolders": {"supported": True, "changeNotifications": True}
             },
+            "workspaceSymbolProvider": True,
             "experimental": merge(self._hook("rols_experimental_capabilities")),
         }
         log.info("Server capabilities: %s", server_capabilities)
@@ -255,6 +270,22 @@ class RopeLanguageServer(MethodDispatcher):
 
     def m_initialized(self, **_kwargs):
         self._hook("rols_initialized")
+        self._schedule_stats_dump()
+        # Start indexing the workspaces in the background
+        for workspace in list(self.workspaces.values()):
+            workspace.symbol_index()
+
+    def _schedule_stats_dump(self):
+        """Log the hook statistics every stats.dumpInterval seconds, if set."""
+        interval = self.config.settings().get("stats", {}).get("dumpInterval")
+        if not interval or self._shutdown:
+            return
+
+        def dump():
+            STATS.dump()
+            self._schedule_stats_dump()
+
+        _utils.SCHEDULER.call_later(interval, dump, key=(self, "stats_dump"))
 
     def code_actions(self, doc_uri, range, context):
         return flatten(
@@ -265,8 +296,18 @@ class RopeLanguageServer(MethodDispatcher):
         return flatten(self._hook("rols_code_lens", doc_uri))
 
     def completions(self, doc_uri, position):
-        completions = self._hook("rols_completions", doc_uri, position=position)
-        return {"isIncomplete": False, "items": flatten(completions)}
+        workspace = self._match_uri_to_workspace(doc_uri)
+        return self._completions.complete(
+            workspace.get_document(doc_uri),
+            position,
+            lambda: flatten(self._hook("rols_completions", doc_uri, position=position)),
+        )
+
+    def completion_item_resolve(self, completion_item):
+        doc_uri = (completion_item.get("data") or {}).get("doc_uri")
+        return self._hook(
+            "rols_completion_item_resolve", doc_uri, completion_item=completion_item
+        ) or completion_item
 
     def definitions(self, doc_uri, position):
         return flatten(self._hook("rols_definitions", doc_uri, position=position))
@@ -297,9 +338,33 @@ class RopeLanguageServer(MethodDispatcher):
         # Since we're debounced, the document may no longer be open
         workspace = self._match_uri_to_workspace(doc_uri)
         if doc_uri in workspace.documents:
-            workspace.publish_diagnostics(
-                doc_uri, flatten(self._hook("rols_lint", doc_uri, is_saved=is_saved))
+            hook_handlers = self.config.plugin_manager.subset_hook_caller(
+                "rols_lint", self.config.disabled_plugins
+            )
+            document = workspace.get_document(doc_uri)
+            # Diagnostics are published as each linter finishes
+            self._lint_executor.lint(
+                hook_handlers, workspace.publish_diagnostics, doc_uri,
+                cache_key=self._lint_cache_key(workspace, document, is_saved),
+                config=self.config, workspace=workspace, document=document, is_saved=is_saved
+            )
+
+    def _lint_cache_key(self, workspace, document, is_saved):
+        """Return a function giving the inputs of each linter for the given document."""
+        source_hash = hashlib.sha1(document.source.encode("utf-8")).hexdigest()
+        # Some linters read their settings from the workspace configuration
+        configs = [self.config]
+        if workspace._config not in (None, self.config):
+            configs.append(workspace._config)
+
+        def cache_key(plugin_name):
+            settings = tuple(
+                _utils.to_hashable(conf.plugin_settings(plugin_name, document_path=document.path))
+                for conf in configs
             )
+            return (source_hash, is_saved, settings)
+
+        return cache_key
 
     def references(self, doc_uri, position, exclude_declaration):
         return flatten(
@@ -320,9 +385,27 @@ class RopeLanguageServer(MethodDispatcher):
     def folding(self, doc_uri):
         return self._hook("rols_folding_range", doc_uri)
 
+    def workspace_symbols(self, query):
+        symbols = []
+        for workspace in list(self.workspaces.values()):
+            index = workspace.symbol_index()
+            if index is not None:
+                symbols.extend(index.search(query))
+        return symbols
+
+    def m_rols__stats(self, reset=False, **_kwargs):
+        """Return the latency statistics of the hooks and of the plugins implementing them."""
+        return STATS.snapshot(reset=reset)
+
+    def m_rols__validate_rope_project(self, **_kwargs):
+        """Have rope validate the whole project of every workspace before its next use."""
+        for workspace in self.workspaces.values():
+            workspace.invalidate_rope_project()
+
     def m_text_document__did_close(self, textDocument=None, **_kwargs):
         workspace = self._match_uri_to_workspace(textDocument["uri"])
         workspace.rm_document(textDocument["uri"])
+        self._lint_executor.forget(textDocument["uri"])
 
     def m_text_document__did_open(self, textDocument=None, **_kwargs):
         workspace = self._match_uri_to_workspace(textDocument["uri"])
@@ -345,6 +428,12 @@ class RopeLanguageServer(MethodDispatcher):
         self.lint(textDocument["uri"], is_saved=False)
 
     def m_text_document__did_save(self, textDocument=None, **_kwargs):
+        workspace = self._match_uri_to_workspace(textDocument["uri"])
+        if textDocument["uri"].endswith(CONFIG_FILEs):
+            # Settings only check their config files on disk now and then
+            self.m_workspace__did_change_watched_files(changes=[{"uri": textDocument["uri"], "type": 2}])
+        workspace.update_symbols(textDocument["uri"])
+        workspace.invalidate_rope_resource(textDocument["uri"])
         self.lint(textDocument["uri"], is_saved=True)
 
     def m_text_document__code_action(
@@ -355,6 +444,9 @@ class RopeLanguageServer(MethodDispatcher):
     def m_text_document__code_lens(self, textDocument=None, **_kwargs):
         return self.code_lens(textDocument["uri"])
 
+    def m_completion_item__resolve(self, **completionItem):
+        return self.completion_item_resolve(completionItem)
+
     def m_text_document__completion(self, textDocument=None, position=None, **_kwargs):
         return self.completions(textDocument["uri"], position)
 
@@ -403,6 +495,7 @@ class RopeLanguageServer(MethodDispatcher):
 
     def m_workspace__did_change_configuration(self, settings=None):
         self.config.update((settings or {}).get("rols", {}))
+        self._completions.clear()
         for workspace_uri in self.workspaces:
             workspace = self.workspaces[workspace_uri]
             workspace.update_config(settings)
@@ -429,6 +522,7 @@ class RopeLanguageServer(MethodDispatcher):
                 workspace_config.update(self.config._settings)
                 self.workspaces[added_uri] = Workspace(
                     added_uri, self._endpoint, workspace_config)
+                self.workspaces[added_uri].symbol_index()
 
         root_workspace_removed = any(removed_info['uri'] == self.root_uri for removed_info in removed)
         workspace_added = len(added) > 0 and 'uri' in added[0]
@@ -460,19 +554,29 @@ class RopeLanguageServer(MethodDispatcher):
 
     def m_workspace__did_change_watched_files(self, changes=None, **_kwargs):
         changed_py_files = set()
-        config_changed = False
+        changed_config_files = set()
         for d in changes or []:
             if d["uri"].endswith(PYTHON_FILE_EXTENSIONS):
                 changed_py_files.add(d["uri"])
             elif d["uri"].endswith(CONFIG_FILEs):
-                config_changed = True
+                changed_config_files.add(uris.to_fs_path(d["uri"]))
+
+        for workspace in list(self.workspaces.values()):
+            for doc_uri in changed_py_files:
+                workspace.update_symbols(doc_uri)
+                workspace.invalidate_rope_resource(doc_uri)
 
-        if config_changed:
-            self.config.settings.cache_clear()
+        if changed_config_files:
+            configs = {self.config} | {workspace._config for workspace in self.workspaces.values()}
+            for conf in configs - {None}:
+                conf.config_files_changed(changed_config_files)
         elif not changed_py_files:
             # Only externally changed python files and lint configs may result in changed diagnostics.
             return
 
+        # Linters may depend on the changed files, don't reuse their diagnostics
+        self._lint_executor.invalidate()
+
         for workspace_uri in self.workspaces:
             workspace = self.workspaces[workspace_uri]
             for doc_uri in workspace.documents:
@@ -483,6 +587,9 @@ class RopeLanguageServer(MethodDispatcher):
     def m_workspace__execute_command(self, command=None, arguments=None):
         return self.execute_command(command, arguments)
 
+    def m_workspace__symbol(self, query=None, **_kwargs):
+        return self.workspace_symbols(query or "")
+
 
 def flatten(list_of_lists):
     return [item for lst in list_of_lists for item in lst]
@@ -0,0 +1,177 @@
+"""Priority classes for the requests sent by the client.
+
+The dispatcher handles every request on the thread reading the client
+stream, so a completion request waits for any slow references or symbols
+request received before it. The RequestScheduler runs the requests of each
+priority class on a pool of its own, so keystroke-latency requests always
+find an idle worker no matter how much navigation or background work is
+queued. Requests without a priority class are still handled in order on
+the reading thread, together with the document notifications.
+
+A new interactive request for a document supersedes the pending one of the
+same method, e.g. the completion of a previous keystroke, which is
+answered as cancelled. Cancelled requests that already started stop at the
+next cancellation point, see check_cancelled().
+"""
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from pyls_jsonrpc.exceptions import JsonRpcRequestCancelled
+
+log = logging.getLogger(__name__)
+
+INTERACTIVE = "interactive"
+NAVIGATION = "navigation"
+BACKGROUND = "background"
+
+PRIORITIES = {
+    "completionItem/resolve": INTERACTIVE,
+    "textDocument/completion": INTERACTIVE,
+    "textDocument/documentHighlight": INTERACTIVE,
+    "textDocument/hover": INTERACTIVE,
+    "textDocument/signatureHelp": INTERACTIVE,
+    "textDocument/definition": NAVIGATION,
+    "textDocument/references": NAVIGATION,
+    "textDocument/rename": NAVIGATION,
+    "workspace/symbol": NAVIGATION,
+    "textDocument/codeLens": BACKGROUND,
+    "textDocument/documentSymbol": BACKGROUND,
+    "textDocument/foldingRange": BACKGROUND,
+}
+
+# Number of workers of each priority class
+WORKERS = {
+    INTERACTIVE: 4,
+    NAVIGATION: 4,
+    BACKGROUND: 2,
+}
+
+# Priority classes whose requests are superseded by newer ones for the same document
+SUPERSEDED = (INTERACTIVE,)
+
+# The request being handled by the current thread
+_current = threading.local()
+
+
+def check_cancelled():
+    """A cancellation point: stop handling the current request if it was cancelled.
+
+    Plugins call this between the expensive steps of handling a request.
+
+    Raises:
+        JsonRpcRequestCancelled: The request was cancelled or superseded.
+    """
+    request = getattr(_current, "request", None)
+    if request is not None and request.cancel_requested:
+        raise JsonRpcRequestCancelled()
+
+
+class Request(Future):
+    """The future result of a scheduled request.
+
+    Unlike a plain future it can be cancelled while running, in which case
+    it's answered with a RequestCancelled error right away and the result of
+    the handler is dropped.
+    """
+
+    def __init__(self, method):
+        super(Request, self).__init__()
+        self.method = method
+        self.cancel_requested = False
+
+    def cancel(self):
+        with self._condition:
+            if self.done():
+                return False
+            self.cancel_requested = True
+            self.set_exception(JsonRpcRequestCancelled())
+        return True
+
+    def resolve(self, result=None, exception=None):
+        """Set the result or exception of the handler, unless the request was cancelled."""
+        with self._condition:
+            if self.done():
+                return
+            if exception is not None:
+                self.set_exception(exception)
+            else:
+                self.set_result(result)
+
+
+class RequestScheduler(object):
+    """Run the requests of each priority class on a bounded pool of its own."""
+
+    def __init__(self, workers=None, priorities=None):
+        self._priorities = PRIORITIES if priorities is None else priorities
+        self._executors = {
+            priority: ThreadPoolExecutor(max_workers=count, thread_name_prefix="rols-" + priority)
+            for priority, count in (workers or WORKERS).items()
+        }
+        self._lock = threading.Lock()
+        # (method, document uri) mapped to the latest request which may be superseded
+        self._pending = {}
+
+    def priority(self, method):
+        """Return the priority class of the given method, or None if it's handled in order."""
+        return self._priorities.get(method)
+
+    def schedule(self, method, handler):
+        """Wrap the dispatcher handler of a method to run it on the pool of its priority class.
+
+        Args:
+            method (str): The JSON RPC method name.
+            handler (callable): The dispatcher handler, called with the request params.
+
+        Returns:
+            The handler itself for methods without a priority class, or a handler
+            returning a Request, which the endpoint answers the request with once done.
+        """
+        priority = self.priority(method)
+        if priority is None:
+            return handler
+        executor = self._executors[priority]
+
+        def scheduled(params):
+            log.debug("Scheduling %s as %s", method, priority)
+            request = Request(method)
+            key = None
+            if priority in SUPERSEDED:
+                key = (method, _document_uri(params))
+                with self._lock:
+                    previous = self._pending.get(key)
+                    self._pending[key] = request
+                if previous is not None and previous.cancel():
+                    log.debug("Superseded pending %s of %s", method, key[1])
+
+            executor.submit(self._run, request, key, handler, params)
+            return request
+
+        return scheduled
+
+    def _run(self, request, key, handler, params):
+        try:
+            if request.done():
+                # Cancelled while queued
+                return
+            _current.request = request
+            try:
+                request.resolve(result=handler(params))
+            except BaseException as e:  # pylint: disable=broad-except
+                request.resolve(exception=e)
+        finally:
+            _current.request = None
+            if key is not None:
+                with self._lock:
+                    if self._pending.get(key) is request:
+                        del self._pending[key]
+
+    def shutdown(self):
+        for executor in self._executors.values():
+            executor.shutdown(wait=False)
+
+
+def _document_uri(params):
+    if not isinstance(params, dict):
+        return None
+    return (params.get("textDocument") or {}).get("uri")
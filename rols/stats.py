@@ -0,0 +1,169 @@
+"""The latency of the hooks and of the hook implementations of every plugin.
+
+Every hook call made by the server, and every hook implementation called by
+pluggy or by the LintExecutor, records its wall time, CPU time and the size of
+its result into histograms, so the plugins taking most of the latency budget of
+a request can be found. The statistics are returned by the custom rols/stats
+request, and can be logged periodically.
+"""
+import bisect
+import json
+import logging
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+# The upper bounds of the buckets of the time histograms, in milliseconds
+TIME_BUCKETS = [0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000]
+# The upper bounds of the buckets of the result size histograms, in items
+SIZE_BUCKETS = [0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000]
+
+
+class Histogram(object):
+    """Counts values into buckets, the last one for the values above the largest bound."""
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0
+        self.max = 0
+
+    def add(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def as_dict(self):
+        return {
+            "total": self.total,
+            "max": self.max,
+            "buckets": [[bound, count] for bound, count in zip(self.bounds + [None], self.counts) if count],
+        }
+
+
+class CallStats(object):
+    """The calls of a hook, or of the implementation of a hook by a plugin."""
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.wall = Histogram(TIME_BUCKETS)
+        self.cpu = Histogram(TIME_BUCKETS)
+        self.size = Histogram(SIZE_BUCKETS)
+
+    def as_dict(self):
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "wallMs": self.wall.as_dict(),
+            "cpuMs": self.cpu.as_dict(),
+            "resultSize": self.size.as_dict(),
+        }
+
+
+class HookStats(object):
+    """The latency statistics of the hooks of the process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._since = time.time()
+        self._hooks = {}
+        self._plugins = {}
+
+    def reset(self):
+        with self._lock:
+            self._reset()
+
+    def _reset(self):
+        self._since = time.time()
+        self._hooks = {}
+        self._plugins = {}
+
+    def record(self, plugin_name, hook_name, wall, cpu, result, error=False):
+        """Record a call, to a plugin or to all the plugins implementing the hook if plugin_name is None.
+
+        Args:
+            plugin_name (str): The plugin of the hook implementation, or None for the whole hook call.
+            hook_name (str): The hook called.
+            wall (float): The wall time of the call, in seconds.
+            cpu (float): The CPU time of the thread during the call, in seconds.
+            result (object): What the call returned.
+            error (bool): Whether the call raised.
+        """
+        with self._lock:
+            calls = self._hooks if plugin_name is None else self._plugins.setdefault(plugin_name, {})
+            stats = calls.get(hook_name)
+            if stats is None:
+                stats = calls[hook_name] = CallStats()
+            stats.calls += 1
+            stats.errors += error
+            stats.wall.add(wall * 1000)
+            stats.cpu.add(cpu * 1000)
+            stats.size.add(result_size(result))
+
+    def measure(self, plugin_name, hook_name, function):
+        """Wrap the function so its calls are recorded."""
+        def measured(*args, **kwargs):
+            wall, cpu = time.perf_counter(), time.thread_time()
+            result, error = None, True
+            try:
+                result = function(*args, **kwargs)
+                error = False
+                return result
+            finally:
+                self.record(
+                    plugin_name, hook_name, time.perf_counter() - wall, time.thread_time() - cpu, result, error
+                )
+        measured.rols_measured = True
+        return measured
+
+    def instrument(self, plugin_manager):
+        """Record the calls of every hook implementation of the plugin manager, including the ones registered later."""
+        def before(hook_name, hook_impls, _kwargs):
+            for hook_impl in hook_impls:
+                # Wrappers return before the implementations they wrap run
+                if hook_impl.hookwrapper or getattr(hook_impl, "wrapper", False):
+                    continue
+                if not getattr(hook_impl.function, "rols_measured", False):
+                    hook_impl.function = self.measure(hook_impl.plugin_name, hook_name, hook_impl.function)
+
+        def after(_outcome, _hook_name, _hook_impls, _kwargs):
+            pass
+
+        return plugin_manager.add_hookcall_monitoring(before, after)
+
+    def snapshot(self, reset=False):
+        """Return the statistics recorded since the start, or the last reset.
+
+        Args:
+            reset (bool): Whether to start recording from scratch afterwards.
+        """
+        with self._lock:
+            snapshot = {
+                "since": self._since,
+                "hooks": {hook_name: stats.as_dict() for hook_name, stats in self._hooks.items()},
+                "plugins": {
+                    plugin_name: {hook_name: stats.as_dict() for hook_name, stats in hooks.items()}
+                    for plugin_name, hooks in self._plugins.items()
+                },
+            }
+            if reset:
+                self._reset()
+        return snapshot
+
+    def dump(self):
+        """Log the statistics recorded so far."""
+        log.info("Hook statistics: %s", json.dumps(self.snapshot(), sort_keys=True))
+
+
+def result_size(result):
+    """The number of items of a result, like completions or diagnostics."""
+    if result is None:
+        return 0
+    if isinstance(result, (list, tuple, dict)):
+        return len(result)
+    return 1
+
+
+STATS = HookStats()
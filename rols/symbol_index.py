@@ -0,0 +1,375 @@
+"""Persistent index of the symbols defined in a workspace.
+
+Answering workspace/symbol with jedi would mean inferring the names of
+every module of the workspace for each query. The SymbolIndex instead walks
+the workspace once in the background, extracts the module and class level
+definitions of each file with the ast module and stores them in a sqlite
+database, along with the modification time, size and hash of the files.
+Later scans only parse the files that changed.
+
+Symbol names are looked up through the trigrams of their lowercased name,
+so a query matching a substring of a name is answered from an index
+whatever the size of the workspace; the matches are then ranked with the
+fuzzy scorer of the completions.
+
+The index also maps every identifier to the files it occurs in, so finding
+the references of a name only needs to analyze the files mentioning it.
+"""
+import ast
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+from array import array
+
+from . import lsp, uris
+from .completion import fuzzy_score
+
+log = logging.getLogger(__name__)
+
+INDEX_FILE = "symbols.db"
+# Bump when the schema or the extracted symbols change
+SCHEMA_VERSION = 2
+# Symbols returned by a query
+MAX_RESULTS = 100
+# Candidates ranked by a query
+MAX_CANDIDATES = 5000
+# Files indexed between two commits of a scan
+BATCH_SIZE = 500
+# Directories never walked into, besides the hidden ones
+SKIPPED_DIRS = ("__pycache__", "node_modules", "site-packages")
+# Marks the start of a name, so the one and two character queries are prefix lookups
+_START = "\x00\x00"
+_IDENTIFIER = re.compile(r"[^\W\d]\w*")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, mtime REAL, size INTEGER, hash TEXT);
+CREATE TABLE IF NOT EXISTS names (id INTEGER PRIMARY KEY, name TEXT UNIQUE);
+CREATE TABLE IF NOT EXISTS trigrams (
+    trigram TEXT, name_id INTEGER, PRIMARY KEY (trigram, name_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS symbols (
+    path TEXT, name_id INTEGER, kind INTEGER, container TEXT,
+    start_line INTEGER, start_col INTEGER, end_line INTEGER, end_col INTEGER
+);
+CREATE INDEX IF NOT EXISTS symbols_path ON symbols (path);
+CREATE INDEX IF NOT EXISTS symbols_name ON symbols (name_id);
+CREATE TABLE IF NOT EXISTS refs (
+    name TEXT, path TEXT, offsets BLOB, PRIMARY KEY (name, path)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS refs_path ON refs (path);
+"""
+
+
+class SymbolIndex(object):
+    """The symbols defined in the python files under some directories.
+
+    Args:
+        db_path (str): The sqlite database to keep the index in, or ":memory:".
+        roots (List[str]): The directories to index.
+    """
+
+    def __init__(self, db_path, roots):
+        self._roots = [os.path.normpath(root) for root in roots]
+        self._lock = threading.RLock()
+        self._db = _connect(db_path)
+        self._thread = None
+        # Whether all the files under the roots were indexed
+        self.ready = False
+
+    def start(self):
+        """Scan the roots on a background thread, unless already done."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self.scan, name="rols-symbol-index")
+                self._thread.daemon = True
+                self._thread.start()
+
+    def join(self, timeout=None):
+        """Wait for the background scan to finish."""
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def scan(self):
+        """Index the files that changed under the roots and drop the deleted ones."""
+        seen = set()
+        indexed = 0
+        for path in self._walk():
+            seen.add(path)
+            with self._lock:
+                if self._update(path):
+                    indexed += 1
+                    if indexed % BATCH_SIZE == 0:
+                        self._db.commit()
+
+        with self._lock:
+            known = [path for path, in self._db.execute("SELECT path FROM files")]
+            for path in known:
+                if path not in seen and self._under_roots(path):
+                    self._remove(path)
+            self._db.commit()
+        self.ready = True
+        log.debug("Indexed %d changed files out of %d in %s", indexed, len(seen), self._roots)
+
+    def update_file(self, path):
+        """Index the given file again if it changed, or drop it if it was deleted."""
+        path = os.path.normpath(path)
+        if not self._under_roots(path):
+            return
+        with self._lock:
+            if os.path.isfile(path):
+                self._update(path)
+            else:
+                self._remove(path)
+            self._db.commit()
+
+    def update_source(self, path, source):
+        """Index the unsaved source of an open file.
+
+        The file is indexed again from the disk by the next scan or update.
+        """
+        path = os.path.normpath(path)
+        if not self._under_roots(path):
+            return
+        with self._lock:
+            row = self._db.execute("SELECT hash FROM files WHERE path = ?", (path,)).fetchone()
+            self._index(path, source.encode("utf-8"), None, None, row[0] if row else None)
+            self._db.commit()
+
+    def files_mentioning(self, name):
+        """Return the paths of the files in which the identifier occurs."""
+        with self._lock:
+            return [path for path, in self._db.execute("SELECT path FROM refs WHERE name = ?", (name,))]
+
+    def occurrences(self, name):
+        """Return the paths of the files in which the identifier occurs mapped to its offsets in them."""
+        with self._lock:
+            rows = self._db.execute("SELECT path, offsets FROM refs WHERE name = ?", (name,)).fetchall()
+        return {path: array("I", offsets).tolist() for path, offsets in rows}
+
+    def search(self, query, limit=MAX_RESULTS):
+        """Return the LSP SymbolInformation of the symbols best matching the query."""
+        candidates = _trigrams(query.lower())
+        with self._lock:
+            if candidates:
+                name_ids = " INTERSECT ".join(["SELECT name_id FROM trigrams WHERE trigram = ?"] * len(candidates))
+                rows = self._db.execute(
+                    "SELECT name, kind, container, path, start_line, start_col, end_line, end_col "
+                    "FROM symbols JOIN names ON names.id = symbols.name_id "
+                    "WHERE name_id IN (%s) LIMIT ?" % name_ids,
+                    candidates + [MAX_CANDIDATES],
+                ).fetchall()
+            else:
+                rows = self._db.execute(
+                    "SELECT name, kind, container, path, start_line, start_col, end_line, end_col "
+                    "FROM symbols JOIN names ON names.id = symbols.name_id LIMIT ?",
+                    (limit,),
+                ).fetchall()
+
+        scored = []
+        for row in rows:
+            score = fuzzy_score(query, row[0])
+            if score is not None:
+                scored.append((-score, row[0], row))
+        scored.sort(key=lambda entry: entry[:2])
+        return [_symbol_information(row) for _score, _name, row in scored[:limit]]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def _walk(self):
+        for root in self._roots:
+            for directory, dirnames, filenames in os.walk(root):
+                dirnames[:] = [name for name in dirnames if not name.startswith(".") and name not in SKIPPED_DIRS]
+                for filename in filenames:
+                    if filename.endswith((".py", ".pyi")):
+                        yield os.path.join(directory, filename)
+
+    def _under_roots(self, path):
+        return any(path.startswith(root + os.sep) for root in self._roots)
+
+    def _update(self, path):
+        """Index the file if it changed since it was indexed, returning whether it did."""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+        row = self._db.execute("SELECT mtime, size, hash FROM files WHERE path = ?", (path,)).fetchone()
+        if row is not None and row[:2] == (stat.st_mtime, stat.st_size):
+            return False
+
+        try:
+            with open(path, "rb") as f:
+                source = f.read()
+        except OSError:
+            return False
+        return self._index(path, source, stat.st_mtime, stat.st_size, row[2] if row else None)
+
+    def _index(self, path, source, mtime, size, previous_digest):
+        digest = hashlib.sha1(source).hexdigest()
+        self._db.execute(
+            "INSERT OR REPLACE INTO files (path, mtime, size, hash) VALUES (?, ?, ?, ?)",
+            (path, mtime, size, digest),
+        )
+        if digest == previous_digest:
+            # Touched but unchanged
+            return False
+
+        self._db.execute("DELETE FROM refs WHERE path = ?", (path,))
+        self._db.executemany(
+            "INSERT INTO refs (name, path, offsets) VALUES (?, ?, ?)",
+            [(name, path, array("I", offsets).tobytes())
+             for name, offsets in extract_references(source).items()],
+        )
+
+        try:
+            symbols = extract_symbols(source)
+        except (SyntaxError, ValueError, RecursionError) as e:
+            # Keep the symbols of the last version that could be parsed
+            log.debug("Failed to parse %s: %s", path, e)
+            return True
+
+        self._db.execute("DELETE FROM symbols WHERE path = ?", (path,))
+        for name, kind, container, start_line, start_col, end_line, end_col in symbols:
+            self._db.execute(
+                "INSERT INTO symbols VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (path, self._name_id(name), kind, container, start_line, start_col, end_line, end_col),
+            )
+        return True
+
+    def _remove(self, path):
+        self._db.execute("DELETE FROM symbols WHERE path = ?", (path,))
+        self._db.execute("DELETE FROM refs WHERE path = ?", (path,))
+        self._db.execute("DELETE FROM files WHERE path = ?", (path,))
+
+    def _name_id(self, name):
+        row = self._db.execute("SELECT id FROM names WHERE name = ?", (name,)).fetchone()
+        if row is not None:
+            return row[0]
+        name_id = self._db.execute("INSERT INTO names (name) VALUES (?)", (name,)).lastrowid
+        lowered = name.lower()
+        self._db.executemany(
+            "INSERT OR IGNORE INTO trigrams (trigram, name_id) VALUES (?, ?)",
+            [(trigram, name_id) for trigram in _name_trigrams(lowered)],
+        )
+        return name_id
+
+
+def extract_references(source):
+    """Return the identifiers occurring in the source mapped to their character offsets.
+
+    Identifiers are matched textually, including in strings and comments,
+    so the files found for a name are a superset of those referencing it.
+    """
+    text = source.decode("utf-8", "replace")
+    occurrences = {}
+    for match in _IDENTIFIER.finditer(text):
+        occurrences.setdefault(match.group(), []).append(match.start())
+    return occurrences
+
+
+def extract_symbols(source):
+    """Return the module and class level definitions of the source.
+
+    Returns:
+        List[tuple]: The (name, kind, container, start line, start column, end
+            line, end column) of the definitions, with zero based lines.
+    """
+    symbols = []
+    _collect(ast.parse(source).body, None, symbols)
+    return symbols
+
+
+def _collect(body, container, symbols):
+    for node in body:
+        if isinstance(node, ast.ClassDef):
+            symbols.append(_symbol(node.name, lsp.SymbolKind.Class, container, node))
+            _collect(node.body, node.name, symbols)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            kind = lsp.SymbolKind.Method if container else lsp.SymbolKind.Function
+            symbols.append(_symbol(node.name, kind, container, node))
+        elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            for target in targets:
+                for name in _assigned_names(target):
+                    if name.isupper():
+                        kind = lsp.SymbolKind.Constant
+                    else:
+                        kind = lsp.SymbolKind.Field if container else lsp.SymbolKind.Variable
+                    symbols.append(_symbol(name, kind, container, node))
+        elif isinstance(node, (ast.If, ast.Try)):
+            # e.g. definitions depending on the python version or on an import
+            for block in (node.body, node.orelse, getattr(node, "finalbody", [])):
+                _collect(block, container, symbols)
+            for handler in getattr(node, "handlers", []):
+                _collect(handler.body, container, symbols)
+
+
+def _assigned_names(target):
+    if isinstance(target, ast.Name):
+        return [target.id]
+    if isinstance(target, (ast.Tuple, ast.List)):
+        return [name for element in target.elts for name in _assigned_names(element)]
+    return []
+
+
+def _symbol(name, kind, container, node):
+    # The end positions are only known since python 3.8
+    end_line = getattr(node, "end_lineno", None) or node.lineno
+    end_col = getattr(node, "end_col_offset", None)
+    if end_col is None:
+        end_col = node.col_offset
+    return (name, kind, container, node.lineno - 1, node.col_offset, end_line - 1, end_col)
+
+
+def _symbol_information(row):
+    name, kind, container, path, start_line, start_col, end_line, end_col = row
+    symbol = {
+        "name": name,
+        "kind": kind,
+        "location": {
+            "uri": uris.from_fs_path(path),
+            "range": {
+                "start": {"line": start_line, "character": start_col},
+                "end": {"line": end_line, "character": end_col},
+            },
+        },
+    }
+    if container:
+        symbol["containerName"] = container
+    return symbol
+
+
+def _name_trigrams(lowered):
+    padded = _START + lowered
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _trigrams(lowered_query):
+    """Return the trigrams a name must have to contain the query, or prefix it for short queries."""
+    if not lowered_query:
+        return []
+    if len(lowered_query) < 3:
+        return [(_START + lowered_query)[-3:]]
+    return sorted({lowered_query[i:i + 3] for i in range(len(lowered_query) - 2)})
+
+
+def _connect(db_path):
+    try:
+        db = sqlite3.connect(db_path, check_same_thread=False, timeout=10)
+        if db.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            db.executescript(
+                "DROP TABLE IF EXISTS files; DROP TABLE IF EXISTS names; "
+                "DROP TABLE IF EXISTS trigrams; DROP TABLE IF EXISTS symbols; DROP TABLE IF EXISTS refs;"
+            )
+            db.execute("PRAGMA user_version = %d" % SCHEMA_VERSION)
+        db.executescript(_SCHEMA)
+        return db
+    except sqlite3.Error as e:
+        if db_path == ":memory:":
+            raise
+        log.warning("Failed to open the symbol index %s, keeping it in memory: %s", db_path, e)
+        return _connect(":memory:")
@@ -1,14 +1,24 @@
 # Copyright 2017 Palantir Technologies, Inc.
+import ast
+import bisect
+import collections
+import contextlib
 import io
+import itertools
 import logging
 import os
 import re
 import functools
-from threading import RLock
+import hashlib
+import tokenize
+import uuid
+from threading import RLock, get_ident
 
 import jedi
+import parso
 
 from . import _utils, lsp, uris
+from .symbol_index import INDEX_FILE, SymbolIndex
 
 log = logging.getLogger(__name__)
 
@@ -16,6 +26,18 @@ log = logging.getLogger(__name__)
 RE_START_WORD = re.compile("[A-Za-z_0-9]*$")
 RE_END_WORD = re.compile("^[A-Za-z_0-9]*")
 
+# Changed files validated one by one by rope, more validate the whole project
+MAX_ROPE_DIRTY_PATHS = 100
+
+# Edits a LineBuffer remembers, see LineBuffer.edits_since()
+MAX_BUFFER_EDITS = 64
+
+# Seconds to wait for the client to create a progress token
+PROGRESS_CREATE_TIMEOUT = 5
+
+# Environment variables that change the sys.path of an interpreter
+SYS_PATH_ENV_VARS = ("PYTHONHOME", "PYTHONNOUSERSITE", "PYTHONUSERBASE", "PYTHONSAFEPATH", "VIRTUAL_ENV")
+
 
 def lock(method):
     """Define an atomic region over a method."""
@@ -26,11 +48,63 @@ def lock(method):
     return wrapper
 
 
+class SysPathCache(object):
+    """Cache of the sys.path reported by jedi environments.
+
+    Getting the sys.path of a non-default environment goes through a jedi
+    subprocess, so the result is kept until the interpreter binary changes
+    or the cache is cleared.
+    """
+
+    def __init__(self):
+        self._cache = {}
+        self._lock = RLock()
+        self.hits = 0
+        self.misses = 0
+
+    @lock
+    def get(self, environment, environment_path=None, env_vars=None, extra_paths=()):
+        env_vars = env_vars if env_vars is not None else os.environ
+        key = (
+            environment_path,
+            tuple((name, env_vars.get(name)) for name in SYS_PATH_ENV_VARS),
+            tuple(extra_paths),
+        )
+        mtime = _mtime(environment.executable)
+
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] == mtime:
+            self.hits += 1
+            return list(cached[1])
+
+        self.misses += 1
+        path = list(extra_paths) + environment.get_sys_path()
+        self._cache[key] = (mtime, path)
+        log.debug("sys_path cache miss for %s (%s hits, %s misses)", environment_path, self.hits, self.misses)
+        return list(path)
+
+    @lock
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._cache)}
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime
+    except (OSError, TypeError):
+        return None
+
+
 class Workspace(object):
 
     M_PUBLISH_DIAGNOSTICS = "textDocument/publishDiagnostics"
     M_APPLY_EDIT = "workspace/applyEdit"
     M_SHOW_MESSAGE = "window/showMessage"
+    M_PROGRESS = "$/progress"
+    M_WORK_DONE_PROGRESS_CREATE = "window/workDoneProgress/create"
 
     def __init__(self, root_uri, endpoint, config=None):
         self._config = config
@@ -40,27 +114,67 @@ class Workspace(object):
         self._root_path = uris.to_fs_path(self._root_uri)
         self._docs = {}
 
-        # Cache jedi environments
+        # Cache jedi environments and their sys.path
         self._environments = {}
+        self._sys_paths = SysPathCache()
 
         # Whilst incubating, keep rope private
         self.__rope = None
         self.__rope_config = None
+        self._rope_lock = RLock()
+        # Files changed outside of rope, validated on the next use of the project
+        self._rope_dirty_paths = set()
+        self._rope_validate_all = False
+
+        # Built in the background on first use, see symbol_index()
+        self._symbol_index = None
+        self._symbol_index_lock = RLock()
+        # Open documents changed since the index last saw them, guarded by the symbol index lock
+        self._unindexed_docs = set()
 
     def _rope_project_builder(self, rope_config):
+        from rope.base import libutils
         from rope.base.project import Project
 
-        # TODO: we could keep track of dirty files and validate only those
-        if self.__rope is None or self.__rope_config != rope_config:
-            rope_folder = rope_config.get("ropeFolder")
-            self.__rope = Project(self._root_path, ropefolder=rope_folder)
-            self.__rope.prefs.set(
-                "extension_modules", rope_config.get("extensionModules", [])
-            )
-            self.__rope.prefs.set("ignore_syntax_errors", True)
-            self.__rope.prefs.set("ignore_bad_imports", True)
-        self.__rope.validate()
-        return self.__rope
+        with self._rope_lock:
+            if self.__rope is None or self.__rope_config != rope_config:
+                rope_folder = rope_config.get("ropeFolder")
+                self.__rope = Project(self._root_path, ropefolder=rope_folder)
+                self.__rope.prefs.set(
+                    "extension_modules", rope_config.get("extensionModules", [])
+                )
+                self.__rope.prefs.set("ignore_syntax_errors", True)
+                self.__rope.prefs.set("ignore_bad_imports", True)
+                self.__rope_config = rope_config
+            elif self._rope_validate_all:
+                log.debug("Validating the whole rope project")
+                self.__rope.validate()
+            else:
+                # Only validate the files which changed outside of rope
+                for path in self._rope_dirty_paths:
+                    # Deleted files are noticed by validating the closest existing folder
+                    while not os.path.exists(path) and path != self._root_path:
+                        path = os.path.dirname(path)
+                    resource_type = "folder" if os.path.isdir(path) else "file"
+                    self.__rope.validate(libutils.path_to_resource(self.__rope, path, type=resource_type))
+            self._rope_dirty_paths, self._rope_validate_all = set(), False
+            return self.__rope
+
+    def invalidate_rope_resource(self, doc_uri):
+        """Have rope validate a file which changed outside of it before its next use."""
+        with self._rope_lock:
+            if len(self._rope_dirty_paths) >= MAX_ROPE_DIRTY_PATHS:
+                # Too many changes, e.g. after a checkout
+                self._rope_validate_all = True
+            else:
+                path = uris.to_fs_path(doc_uri)
+                if path.startswith(os.path.join(self._root_path, "")):
+                    self._rope_dirty_paths.add(path)
+
+    def invalidate_rope_project(self):
+        """Have rope validate the whole project before its next use."""
+        with self._rope_lock:
+            self._rope_validate_all = True
 
     @property
     def documents(self):
@@ -93,16 +207,25 @@ class Workspace(object):
         self._docs[doc_uri] = self._create_document(
             doc_uri, source=source, version=version
         )
+        with self._symbol_index_lock:
+            self._unindexed_docs.add(doc_uri)
 
     def rm_document(self, doc_uri):
-        self._docs.pop(doc_uri)
+        self._docs.pop(doc_uri).clear_script_cache()
+        with self._symbol_index_lock:
+            self._unindexed_docs.discard(doc_uri)
+        # Forget the unsaved changes the index may have seen
+        self.update_symbols(doc_uri)
 
     def update_document(self, doc_uri, change, version=None):
         self._docs[doc_uri].apply_change(change)
         self._docs[doc_uri].version = version
+        with self._symbol_index_lock:
+            self._unindexed_docs.add(doc_uri)
 
     def update_config(self, settings):
         self._config.update((settings or {}).get('rols', {}))
+        self._sys_paths.clear()
         for doc_uri in self.documents:
             self.get_document(doc_uri).update_config(settings)
 
@@ -120,6 +243,57 @@ class Workspace(object):
             self.M_SHOW_MESSAGE, params={"type": msg_type, "message": message}
         )
 
+    @contextlib.contextmanager
+    def report_progress(self, title, message=None, percentage=None):
+        """Report the progress of a long running task to the client, if it supports it.
+
+        The client is asked to create the progress first, so this must not be
+        called from the thread reading the messages of the client.
+
+        Args:
+            title (str): The title of the task.
+            message (str): The initial message.
+            percentage (int): The initial percentage, if the progress is measurable.
+
+        Yields:
+            Callable: Reports a message and percentage, both optional.
+        """
+        token = self._progress_begin(title, message, percentage)
+        try:
+            yield functools.partial(self._progress_report, token)
+        finally:
+            if token is not None:
+                self._endpoint.notify(self.M_PROGRESS, params={"token": token, "value": {"kind": "end"}})
+
+    def _progress_begin(self, title, message, percentage):
+        capabilities = self._config.capabilities if self._config else {}
+        if not (capabilities or {}).get("window", {}).get("workDoneProgress"):
+            return None
+
+        token = str(uuid.uuid4())
+        try:
+            self._endpoint.request(self.M_WORK_DONE_PROGRESS_CREATE, {"token": token}).result(
+                timeout=PROGRESS_CREATE_TIMEOUT
+            )
+        except Exception as e:  # pylint: disable=broad-except
+            log.debug("Client didn't create the progress of %s: %s", title, e)
+            return None
+
+        value = {"kind": "begin", "title": title}
+        self._progress_notify(token, value, message, percentage)
+        return token
+
+    def _progress_report(self, token, message=None, percentage=None):
+        if token is not None:
+            self._progress_notify(token, {"kind": "report"}, message, percentage)
+
+    def _progress_notify(self, token, value, message, percentage):
+        if message is not None:
+            value["message"] = message
+        if percentage is not None:
+            value["percentage"] = percentage
+        self._endpoint.notify(self.M_PROGRESS, params={"token": token, "value": value})
+
     def source_roots(self, document_path):
         """Return the source roots for the given document."""
         files = (
@@ -130,6 +304,52 @@ class Workspace(object):
         )
         return list({os.path.dirname(project_file) for project_file in files}) or [self._root_path]
 
+    def symbol_index(self):
+        """Return the index of the symbols defined in the workspace.
+
+        The index is built in the background the first time it's asked for, and
+        is None if the workspace isn't on the local disk or the index is disabled.
+        """
+        with self._symbol_index_lock:
+            if self._symbol_index is None and self.is_local():
+                settings = self._config.settings() if self._config else {}
+                index_settings = settings.get("workspaceSymbols", {})
+                if not index_settings.get("enabled", True):
+                    return None
+
+                roots = [self._root_path]
+                if index_settings.get("includeSitePackages", False):
+                    environment_path = settings.get("plugins", {}).get("jedi", {}).get("environment")
+                    roots.extend(_site_packages(environment_path))
+
+                db_path = _symbol_index_path(self._root_path, settings.get("rope", {}).get("ropeFolder"))
+                self._symbol_index = SymbolIndex(db_path, roots)
+                self._symbol_index.start()
+            return self._symbol_index
+
+    def update_symbols(self, doc_uri):
+        """Index the symbols of a file again after it changed on disk."""
+        if self._symbol_index is not None:
+            self._symbol_index.update_file(uris.to_fs_path(doc_uri))
+
+    def reference_candidates(self, name):
+        """Return the paths of the files mentioning the given identifier.
+
+        The open documents are indexed with their unsaved changes first.
+        Returns None until the whole workspace has been indexed.
+        """
+        index = self._symbol_index
+        if index is None or not index.ready:
+            return None
+
+        with self._symbol_index_lock:
+            unindexed, self._unindexed_docs = self._unindexed_docs, set()
+        for doc_uri in unindexed:
+            document = self._docs.get(doc_uri)
+            if document is not None:
+                index.update_source(document.path, document.source)
+        return index.files_mentioning(name)
+
     def _create_document(self, doc_uri, source=None, version=None):
         path = uris.to_fs_path(doc_uri)
         return Document(
@@ -142,6 +362,155 @@ class Workspace(object):
         )
 
 
+def _symbol_index_path(root_path, rope_folder):
+    """Keep the symbol index in the rope folder, or in the user cache when rope doesn't have one."""
+    if rope_folder:
+        directory = os.path.join(root_path, rope_folder)
+        name = INDEX_FILE
+    else:
+        cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+        directory = os.path.join(cache_home, "rols", "symbols")
+        name = hashlib.sha1(root_path.encode("utf-8")).hexdigest() + ".db"
+
+    try:
+        os.makedirs(directory, exist_ok=True)
+    except OSError as e:
+        log.warning("Failed to create %s, keeping the symbol index in memory: %s", directory, e)
+        return ":memory:"
+    return os.path.join(directory, name)
+
+
+def _site_packages(environment_path=None):
+    try:
+        if environment_path:
+            environment = jedi.api.environment.create_environment(path=environment_path, safe=False)
+        else:
+            environment = jedi.api.environment.get_cached_default_environment()
+        sys_path = environment.get_sys_path()
+    except Exception as e:  # pylint: disable=broad-except
+        log.warning("Failed to get the site-packages of %s: %s", environment_path, e)
+        return []
+    return [path for path in sys_path if os.path.basename(path) == "site-packages" and os.path.isdir(path)]
+
+
+class LineBuffer(object):
+    """Text buffer that keeps the source split into lines.
+
+    The buffer holds the lines (with their line endings, as returned by
+    ``str.splitlines(True)``) together with the offset at which every line
+    starts, so converting between positions and offsets is a lookup and an
+    incremental edit only re-splits the lines it touches.
+    """
+
+    def __init__(self, text=u""):
+        self._lines = text.splitlines(True)
+        self._starts = [0]
+        self._starts.extend(itertools.accumulate(len(line) for line in self._lines))
+        self._text = text
+        # The number of edits made to the buffer, and the latest of them
+        self.revision = 0
+        self._edits = collections.deque(maxlen=MAX_BUFFER_EDITS)
+
+    def __len__(self):
+        return self._starts[-1]
+
+    @property
+    def lines(self):
+        """The lines of the buffer. The returned list must not be modified."""
+        return self._lines
+
+    @property
+    def text(self):
+        if self._text is None:
+            self._text = u"".join(self._lines)
+        return self._text
+
+    def line_start(self, line):
+        """Return the offset of the first character of the given line."""
+        if line >= len(self._lines):
+            return self._starts[-1]
+        return self._starts[line]
+
+    def offset_at(self, line, character):
+        return self.line_start(line) + character
+
+    def position_at(self, offset):
+        """Return the (line, character) pair for the given offset."""
+        offset = max(0, min(offset, self._starts[-1]))
+        line = bisect.bisect_right(self._starts, offset) - 1
+        if line == len(self._lines) and self._lines and not _ends_line(self._lines[-1], u""):
+            # The end of a last line without a line ending
+            line -= 1
+        return line, offset - self._starts[line]
+
+    def replace(self, start_line, start_col, end_line, end_col, text):
+        """Replace the text between the two positions with the given text."""
+        self.revision += 1
+        self._edits.append((start_line, start_col, end_line, end_col, text))
+        lines = self._lines
+        if start_line >= len(lines):
+            # An edit at the very end of the file
+            self._splice(len(lines), len(lines), text)
+            return
+
+        last = min(end_line, len(lines) - 1)
+        segment = lines[start_line][:start_col] + text
+        if end_line == last:
+            segment += lines[end_line][end_col:]
+
+        first, last = start_line, last + 1
+        # Only the touched lines are re-split, so make sure the edit didn't
+        # join them with a neighbouring line (a removed line ending, or a
+        # '\r' and '\n' that now sit next to each other).
+        while last < len(lines) and not _ends_line(segment, lines[last]):
+            segment += lines[last]
+            last += 1
+        if first > 0 and lines[first - 1].endswith("\r") and segment.startswith("\n"):
+            first -= 1
+            segment = lines[first] + segment
+
+        self._splice(first, last, segment)
+
+    def edits_since(self, revision):
+        """Return the edits made after the given revision, oldest first, or None if they're forgotten.
+
+        Returns:
+            List[tuple]: The (start line, start column, end line, end column, text) of the edits.
+        """
+        count = self.revision - revision
+        if count < 0 or count > len(self._edits):
+            return None
+        return list(self._edits)[len(self._edits) - count:]
+
+    def _splice(self, first, last, segment):
+        new_lines = segment.splitlines(True)
+        if first == len(self._lines) and self._lines and new_lines and \
+                not _ends_line(self._lines[-1], new_lines[0]):
+            # Appending to a last line that has no line ending
+            first -= 1
+            new_lines = (self._lines[first] + segment).splitlines(True)
+
+        starts = self._starts
+        delta = sum(len(line) for line in new_lines) - (starts[last] - starts[first])
+        new_starts = list(itertools.accumulate(
+            itertools.chain([starts[first]], (len(line) for line in new_lines))))
+        tail = [start + delta for start in starts[last + 1:]] if delta else starts[last + 1:]
+
+        # A new list, the previous one may still be iterated by the users of lines
+        self._lines = self._lines[:first] + new_lines + self._lines[last:]
+        starts[first:] = new_starts + tail
+        self._text = None
+
+
+def _ends_line(line, next_line):
+    """Whether ``line`` is terminated and won't be joined with ``next_line``."""
+    if not line:
+        return False
+    if line.endswith("\r"):
+        return not next_line.startswith("\n")
+    return len((line[-1] + "x").splitlines()) == 2
+
+
 class Document(object):
 
     def __init__(self, uri, workspace, source=None, version=None, local=True, extra_sys_path=None,
@@ -155,11 +524,20 @@ class Document(object):
         self._config = workspace._config
         self._workspace = workspace
         self._local = local
-        self._source = source
+        self._source = LineBuffer(source) if source is not None else None
         self._extra_sys_path = extra_sys_path or []
         self._rope_project_builder = rope_project_builder
         self._lock = RLock()
 
+        # jedi.Script objects shared by the requests of a thread on a single version of the document
+        self._scripts = {}
+        # Trees of the current version of the document, shared by all the plugins
+        self._parsed = {}
+        # The lines and parso module of the latest parse, and the number of walks of the module
+        # in progress or None if it was returned by parso_tree(). parso's diff parser updates the
+        # module in place, so it's only used for the next version when no one is using the module.
+        self._parso_module = None
+
     def __str__(self):
         return str(self.uri)
 
@@ -173,7 +551,7 @@ class Document(object):
     @property
     @lock
     def lines(self):
-        return self.source.splitlines(True)
+        return self._buffer().lines
 
     @property
     @lock
@@ -181,58 +559,154 @@ class Document(object):
         if self._source is None:
             with io.open(self.path, "r", encoding="utf-8") as f:
                 return f.read()
+        return self._source.text
+
+    @lock
+    def buffer_line(self, line):
+        """Return the buffer of the open document, its revision and the text of the given line.
+
+        Returns:
+            tuple: The LineBuffer, its revision and the line, or None if the document
+                isn't open (it's read from disk every time) or doesn't have the line.
+        """
+        if self._source is None:
+            return None
+        lines = self._source.lines
+        if line >= len(lines):
+            return None
+        return self._source, self._source.revision, lines[line]
+
+    def _buffer(self):
+        if self._source is None:
+            # Documents that aren't open are read from disk every time
+            return LineBuffer(self.source)
         return self._source
 
     def update_config(self, settings):
         self._config.update((settings or {}).get('rols', {}))
+        self.clear_script_cache()
 
     @lock
     def apply_change(self, change):
         """Apply a change to the document."""
+        self.clear_script_cache()
+        self._parsed.clear()
         text = change["text"]
         change_range = change.get("range")
 
         if not change_range:
             # The whole file has changed
-            self._source = text
+            self._source = LineBuffer(text)
             return
 
-        start_line = change_range["start"]["line"]
-        start_col = change_range["start"]["character"]
-        end_line = change_range["end"]["line"]
-        end_col = change_range["end"]["character"]
-
-        # Check for an edit occuring at the very end of the file
-        if start_line == len(self.lines):
-            self._source = self.source + text
-            return
+        if self._source is None:
+            self._source = LineBuffer(self.source)
+
+        self._source.replace(
+            change_range["start"]["line"],
+            change_range["start"]["character"],
+            change_range["end"]["line"],
+            change_range["end"]["character"],
+            text,
+        )
 
-        new = io.StringIO()
+    @lock
+    def offset_at_position(self, position):
+        """Return the byte-offset pointed at by the given position."""
+        return self._buffer().offset_at(position["line"], position["character"])
 
-        # Iterate over the existing document until we hit the edit range,
-        # at which point we write the new text, then loop until we hit
-        # the end of the range and continue writing.
-        for i, line in enumerate(self.lines):
-            if i < start_line:
-                new.write(line)
-                continue
+    @lock
+    def position_at_offset(self, offset):
+        """Return the position pointed at by the given offset."""
+        line, character = self._buffer().position_at(offset)
+        return {"line": line, "character": character}
 
-            if i > end_line:
-                new.write(line)
-                continue
+    @lock
+    def ast_tree(self):
+        """Return the stdlib AST of the document.
 
-            if i == start_line:
-                new.write(line[:start_col])
-                new.write(text)
+        Raises:
+            SyntaxError: (or any other parsing error) when the source can't be parsed.
+        """
+        return self._parse("ast", lambda source: ast.parse(source, filename=self.path))
 
-            if i == end_line:
-                new.write(line[end_col:])
+    @lock
+    def tokens(self):
+        """Return the tokens of the document as generated by ``tokenize``."""
+        return self._parse("tokens", lambda source: tuple(
+            tokenize.generate_tokens(io.StringIO(source).readline)))
 
-        self._source = new.getvalue()
+    @lock
+    def parso_tree(self):
+        """Return the parso module of the document, parso recovers from syntax errors.
 
-    def offset_at_position(self, position):
-        """Return the byte-offset pointed at by the given position."""
-        return position["character"] + len("".join(self.lines[: position["line"]]))
+        The module is never modified afterwards, the next version of the
+        document is parsed from scratch. See borrowed_parso_tree() to walk the
+        module without that cost.
+        """
+        module = self._parse("parso", self._parse_parso)
+        if self._parso_module is not None and self._parso_module[1] is module:
+            self._parso_module = self._parso_module[:2] + (None,)
+        return module
+
+    @contextlib.contextmanager
+    def borrowed_parso_tree(self):
+        """Yield the parso module of the document, to be walked within the block.
+
+        The document isn't locked during the walk. Versions parsed while the
+        module is walked are parsed from scratch, later ones reuse its
+        unchanged parts, so it must not be used after the block.
+        """
+        with self._lock:
+            module = self._parse("parso", self._parse_parso)
+            self._count_parso_walk(module, 1)
+        try:
+            yield module
+        finally:
+            with self._lock:
+                self._count_parso_walk(module, -1)
+
+    def _count_parso_walk(self, module, count):
+        if self._parso_module is not None and self._parso_module[1] is module and self._parso_module[2] is not None:
+            lines, module, walks = self._parso_module
+            self._parso_module = (lines, module, walks + count)
+
+    def _parse_parso(self, source):
+        """Parse the source, reusing the unchanged parts of the previous module."""
+        grammar = parso.load_grammar()
+        lines = parso.split_lines(source, keepends=True)
+        module = None
+        if self._parso_module is not None and self._parso_module[2] == 0:
+            old_lines, old_module, _walks = self._parso_module
+            try:
+                # pylint: disable=protected-access
+                module = grammar._diff_parser(grammar._pgen_grammar, grammar._tokenizer, old_module).update(
+                    old_lines=old_lines, new_lines=lines
+                )
+            except Exception:  # pylint: disable=broad-except
+                log.exception("Failed to reparse %s incrementally", self.uri)
+        if module is None:
+            module = grammar.parse(source)
+        if self._source is not None:
+            self._parso_module = (lines, module, 0)
+        return module
+
+    def _parse(self, kind, parser):
+        cached = self._parsed.get(kind)
+        if cached is None or cached[0] != self.version:
+            source = self.source
+            try:
+                cached = (self.version, parser(source), None)
+            except Exception as e:  # pylint: disable=broad-except
+                cached = (self.version, None, e)
+            if self._source is not None:
+                # Documents read from disk may change under our feet
+                self._parsed[kind] = cached
+
+        _version, tree, error = cached
+        if error is not None:
+            raise error.with_traceback(None)
+        return tree
 
     def word_at_position(self, position):
         """Get the word under the cursor returning the start and end positions."""
@@ -260,20 +734,26 @@ class Document(object):
 
     @lock
     def rope_script(self, position=None, use_document_path=False):
-        extra_paths = []
-        environment_path = None
-        env_vars = None
-
+        jedi_settings = {}
         if self._config:
             jedi_settings = self._config.plugin_settings('jedi', document_path=self.path)
-            environment_path = jedi_settings.get('environment')
-            extra_paths = jedi_settings.get('extra_paths') or []
-            env_vars = jedi_settings.get('env_vars')
+
+        # Scripts created for a position can't be shared between requests, and the inference
+        # state of a Script isn't thread safe, so every thread gets its own
+        key = (self.version, _utils.to_hashable(jedi_settings), use_document_path, get_ident())
+        if position is None and key in self._scripts:
+            return self._scripts[key]
+
+        environment_path = jedi_settings.get('environment')
+        extra_paths = jedi_settings.get('extra_paths') or []
+        env_vars = jedi_settings.get('env_vars')
 
         # Drop PYTHONPATH from env_vars before creating the environment because that makes
         # Jedi throw an error.
         if env_vars is None:
             env_vars = os.environ.copy()
+        else:
+            env_vars = dict(env_vars)
         env_vars.pop('PYTHONPATH', None)
 
         environment = self.get_enviroment(environment_path, env_vars=env_vars) if environment_path else None
@@ -294,8 +774,17 @@ class Document(object):
         if position:
             # Deprecated by Jedi to use in Script() constructor
             kwargs.update(_utils.position_to_jedi_linecolumn(self, position))
+            return jedi.Script(**kwargs)
 
-        return jedi.Script(**kwargs)
+        script = jedi.Script(**kwargs)
+        if self._source is not None:
+            # Documents read from disk may change under our feet
+            self._scripts[key] = script
+        return script
+
+    @lock
+    def clear_script_cache(self):
+        self._scripts.clear()
 
     def get_enviroment(self, environment_path=None, env_vars=None):
         # TODO(gatesn): #339 - make better use of jedi environments, they seem pretty powerful
@@ -313,9 +802,8 @@ class Document(object):
         return environment
 
     def sys_path(self, environment_path=None, env_vars=None):
-        # Copy our extra sys path
         # TODO: when safe to break API, use env_vars explicitly to pass to create_environment
-        path = list(self._extra_sys_path)
         environment = self.get_enviroment(environment_path=environment_path, env_vars=env_vars)
-        path.extend(environment.get_sys_path())
-        return path
+        return self._workspace._sys_paths.get(
+            environment, environment_path, env_vars=env_vars, extra_paths=self._extra_sys_path
+        )
@@ -76,3 +76,10 @@ def temp_workspace_factory(workspace):  # pylint: disable=redefined-outer-name
         return workspace
 
     return fn
+
+
+def apply_text_edits(document, edits):
+    """Apply the TextEdits to the document, as a client would, and return its new source."""
+    for edit in reversed(edits):
+        document.apply_change({"range": edit["range"], "text": edit["newText"]})
+    return document.source
@@ -3,6 +3,7 @@ from rols import uris
 from rols.plugins.autopep8_format import (rols_format_document,
                                           rols_format_range)
 from rols.workspace import Document
+from test.fixtures import apply_text_edits
 
 DOC_URI = uris.from_fs_path(__file__)
 DOC = """a =    123
@@ -40,8 +41,7 @@ def test_format(config, workspace):
     doc = Document(DOC_URI, workspace, DOC)
     res = rols_format_document(config, doc)
 
-    assert len(res) == 1
-    assert res[0]["newText"] == "a = 123\n\n\ndef func():\n    pass\n"
+    assert apply_text_edits(doc, res) == "a = 123\n\n\ndef func():\n    pass\n"
 
 
 def test_range_format(config, workspace):
@@ -53,10 +53,14 @@ def test_range_format(config, workspace):
     }
     res = rols_format_range(config, doc, def_range)
 
-    assert len(res) == 1
+    # Only the extra spaces are removed
+    assert res == [{
+        "range": {"start": {"line": 0, "character": 4}, "end": {"line": 0, "character": 7}},
+        "newText": "",
+    }]
 
     # Make sure the func is still badly formatted
-    assert res[0]["newText"] == "a = 123\n\n\n\n\ndef func():\n    pass\n"
+    assert apply_text_edits(doc, res) == "a = 123\n\n\n\n\ndef func():\n    pass\n"
 
 
 def test_no_change(config, workspace):
@@ -68,5 +72,4 @@ def test_hanging_indentation(config, workspace):
     doc = Document(DOC_URI, workspace, INDENTED_DOC)
     res = rols_format_document(config, doc)
 
-    assert len(res) == 1
-    assert res[0]['newText'] == CORRECT_INDENTED_DOC
+    assert apply_text_edits(doc, res) == CORRECT_INDENTED_DOC
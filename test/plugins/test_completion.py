@@ -1,13 +1,13 @@
 # Copyright 2017 Palantir Technologies, Inc.
 import os
 import sys
-from distutils.version import LooseVersion
 
 import pytest
 
 from rols import uris, lsp, _utils
 from rols.workspace import Document
 from rols.plugins.jedi_completion import rols_completions as rols_jedi_completions
+from rols.plugins.jedi_completion import rols_completion_item_resolve as rols_jedi_completion_item_resolve
 from rols.plugins.rope_completion import rols_completions as rols_rope_completions
 
 
@@ -146,6 +146,44 @@ def test_jedi_method_completion(config, workspace):
     assert everyone_method["insertText"] == "everyone"
 
 
+def test_jedi_completion_item_resolve(config, workspace):
+    # Over the blank line
+    com_position = {'line': 8, 'character': 0}
+    doc = Document(DOC_URI, workspace, DOC)
+    config.capabilities['textDocument'] = {'completion': {'completionItem': {
+        'snippetSupport': True,
+        'resolveSupport': {'properties': ['documentation', 'detail', 'insertText']},
+    }}}
+    config.update({'plugins': {'jedi_completion': {'include_params': True, 'resolve_at_most': 1}}})
+    completions = rols_jedi_completions(config, doc, com_position)
+
+    hello = [c for c in completions if c['label'] == 'hello'][0]
+    assert 'documentation' not in hello
+    assert hello['insertText'] == 'hello'
+
+    resolved = rols_jedi_completion_item_resolve(config, hello)
+    assert resolved['documentation'] == 'hello()'
+    assert resolved['insertText'] == 'hello()'
+
+    # Items of older completion requests aren't resolved
+    rols_jedi_completions(config, doc, com_position)
+    assert rols_jedi_completion_item_resolve(config, hello) is None
+
+
+def test_jedi_completion_snippets_without_resolve_support(config, workspace):
+    # Over the blank line
+    com_position = {'line': 8, 'character': 0}
+    doc = Document(DOC_URI, workspace, DOC)
+    config.capabilities['textDocument'] = {'completion': {'completionItem': {'snippetSupport': True}}}
+    config.update({'plugins': {'jedi_completion': {'include_params': True, 'resolve_at_most': 1}}})
+    completions = rols_jedi_completions(config, doc, com_position)
+
+    # The client can't resolve the snippets later, so every item gets its snippet
+    hello = [c for c in completions if c['label'] == 'hello()'][0]
+    assert hello['insertText'] == 'hello()'
+    assert 'params' not in hello['data']
+
+
 # @pytest.mark.skipif(PY2 or (sys.platform.startswith('linux') and os.environ.get('CI') is not None),
 #                     reason="Test in Python 3 and not on CIs on Linux because wheels don't work on them.")
 # FIXME
@@ -192,7 +230,7 @@ def test_matplotlib_completions(config, workspace):
 
 
 @pytest.mark.skipif(
-    LooseVersion(_utils.JEDI_VERSION) < LooseVersion("0.15.2"),
+    _utils.version_tuple(_utils.JEDI_VERSION) < (0, 15, 2),
     reason="This test fails with Jedi 0.15.1 or less",
 )
 def test_snippets_completion(config, workspace):
@@ -349,7 +387,9 @@ def test_jedi_completion_environment(workspace):
     # After 'import logh' with new environment
     completions = rols_jedi_completions(doc._config, doc, com_position)
     assert completions[0]['label'] == 'loghub'
-    assert 'changelog generator' in completions[0]['documentation'].lower()
+
+    resolved = rols_jedi_completion_item_resolve(doc._config, completions[0])
+    assert 'changelog generator' in resolved['documentation'].lower()
 
 
 def test_document_path_completions(tmpdir, workspace_other_root_path):
@@ -4,7 +4,7 @@ import os
 import tempfile
 
 from mock import patch
-from rols import lsp, uris
+from rols import _utils, lsp, uris
 from rols.plugins import flake8_lint
 from rols.workspace import Document
 
@@ -88,3 +88,31 @@ def test_flake8_executable_param(workspace):
 
         call_args = popen_mock.call_args.args[0]
         assert flake8_executable in call_args
+
+
+def test_flake8_daemon(workspace):
+    workspace._config.update({'plugins': {'flake8': {'daemon': True}}})
+    doc = Document('', workspace, DOC)
+    with patch('rols.plugins.flake8_lint.Popen') as popen_mock:
+        diags = flake8_lint.rols_lint(workspace, doc)
+        assert not popen_mock.called
+
+    unused_var = [d for d in diags if d['code'] == 'F841'][0]
+    assert unused_var['range']['start'] == {'line': 5, 'character': 1}
+
+
+def test_flake8_daemon_fallback(workspace):
+    workspace._config.update({'plugins': {'flake8': {'daemon': True}}})
+    doc = Document('', workspace, DOC)
+    with patch.object(flake8_lint.WORKER, 'request', return_value=None):
+        diags = flake8_lint.rols_lint(workspace, doc)
+
+    assert [d for d in diags if d['code'] == 'F841']
+
+
+def test_flake8_daemon_timeout(workspace):
+    workspace._config.update({'plugins': {'flake8': {'daemon': True}}})
+    doc = Document('', workspace, DOC)
+    with patch.object(flake8_lint.WORKER, 'request', side_effect=_utils.WorkerTimeout()):
+        # flake8 isn't spawned to hang again
+        assert flake8_lint.rols_lint(workspace, doc) == []
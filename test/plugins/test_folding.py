@@ -173,3 +173,11 @@ def test_folding_syntax_error(workspace):
         {"startLine": 27, "endLine": 28},
     ]
     assert ranges == expected
+
+
+def test_folding_no_trailing_newline(workspace):
+    doc = Document(DOC_URI, workspace, "def f():\n    x = 1\n    return x")
+    assert rols_folding_range(doc) == [{"startLine": 0, "endLine": 2}]
+    # Folded the same as with the line break
+    doc = Document(DOC_URI, workspace, DOC.rstrip("\n"))
+    assert rols_folding_range(doc) == rols_folding_range(Document(DOC_URI, workspace, DOC))
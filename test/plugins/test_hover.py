@@ -1,7 +1,8 @@
 # Copyright 2017 Palantir Technologies, Inc.
-from distutils.version import LooseVersion
+import pytest
+from pyls_jsonrpc.exceptions import JsonRpcRequestCancelled
 
-from rols import uris, _utils
+from rols import scheduling, uris, _utils
 from rols.plugins.hover import rols_hover
 from rols.workspace import Document
 
@@ -60,7 +61,7 @@ def test_hover(workspace):
 
     doc = Document(DOC_URI, workspace, DOC)
 
-    if LooseVersion(_utils.JEDI_VERSION) >= LooseVersion("0.15.0"):
+    if _utils.version_tuple(_utils.JEDI_VERSION) >= (0, 15):
         contents = [{"language": "python", "value": "main()"}, "hello world"]
     else:
         contents = "main()\n\nhello world"
@@ -68,3 +69,14 @@ def test_hover(workspace):
     assert {"contents": contents} == rols_hover(doc, hov_position)
 
     assert {"contents": ""} == rols_hover(doc, no_hov_position)
+
+
+def test_hover_cancelled(workspace, monkeypatch):
+    doc = Document(DOC_URI, workspace, DOC)
+    request = scheduling.Request("textDocument/hover")
+    request.cancel()
+    monkeypatch.setattr(scheduling._current, "request", request, raising=False)  # pylint: disable=protected-access
+    monkeypatch.setattr(doc, "rope_script", lambda: pytest.fail("Inferred the hover of a cancelled request"))
+
+    with pytest.raises(JsonRpcRequestCancelled):
+        rols_hover(doc, {'line': 3, 'character': 5})
@@ -3,9 +3,9 @@ import os
 import sys
 
 import pytest
-from pyls import uris
-from pyls.plugins.jedi_rename import pyls_rename
-from pyls.workspace import Document
+from rols import uris
+from rols.plugins.jedi_rename import rols_rename
+from rols.workspace import Document
 
 LT_PY36 = sys.version_info.major < 3 or (sys.version_info.major == 3 and sys.version_info.minor < 6)
 
@@ -38,7 +38,7 @@ def test_jedi_rename(tmp_workspace, config):  # pylint: disable=redefined-outer-
     DOC_URI = uris.from_fs_path(os.path.join(tmp_workspace.root_path, DOC_NAME))
     doc = Document(DOC_URI, tmp_workspace)
 
-    result = pyls_rename(config, tmp_workspace, doc, position, 'ShouldBeRenamed')
+    result = rols_rename(config, tmp_workspace, doc, position, 'ShouldBeRenamed')
     assert len(result.keys()) == 1
 
     changes = result.get('documentChanges')
@@ -49,11 +49,18 @@ def test_jedi_rename(tmp_workspace, config):  # pylint: disable=redefined-outer-
     assert changes[0].get('edits') == [
         {
             'range': {
-                'start': {'line': 0, 'character': 0},
-                'end': {'line': 5, 'character': 0},
+                'start': {'line': 0, 'character': 6},
+                'end': {'line': 0, 'character': 11},
             },
-            'newText': 'class ShouldBeRenamed():\n    pass\n\nclass Test2(ShouldBeRenamed):\n    pass\n',
-        }
+            'newText': 'ShouldBeRenamed',
+        },
+        {
+            'range': {
+                'start': {'line': 3, 'character': 12},
+                'end': {'line': 3, 'character': 17},
+            },
+            'newText': 'ShouldBeRenamed',
+        },
     ]
     path = os.path.join(tmp_workspace.root_path, DOC_NAME_EXTRA)
     uri_extra = uris.from_fs_path(path)
@@ -62,16 +69,17 @@ def test_jedi_rename(tmp_workspace, config):  # pylint: disable=redefined-outer-
     # but that do need to be renamed in the project have a `null` version
     # number.
     assert changes[1]['textDocument']['version'] is None
-    expected = 'from test1 import ShouldBeRenamed\nx = ShouldBeRenamed()\n'
-    if os.name == 'nt':
-        # The .write method in the temp_workspace_factory functions writes
-        # Windows-style line-endings.
-        expected = expected.replace('\n', '\r\n')
     assert changes[1].get('edits') == [
         {
             'range': {
-                'start': {'line': 0, 'character': 0},
-                'end': {'line': 2, 'character': 0}},
-            'newText': expected
-        }
+                'start': {'line': 0, 'character': 18},
+                'end': {'line': 0, 'character': 23}},
+            'newText': 'ShouldBeRenamed'
+        },
+        {
+            'range': {
+                'start': {'line': 1, 'character': 4},
+                'end': {'line': 1, 'character': 9}},
+            'newText': 'ShouldBeRenamed'
+        },
     ]
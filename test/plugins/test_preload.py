@@ -0,0 +1,46 @@
+from mock import Mock
+
+from rols.plugins import preload_imports
+from rols.plugins.preload_imports import Preloader, imported_modules
+
+
+def test_imported_modules():
+    source = "import os.path\nfrom json import loads\n    import colorsys, string\nx = 'import'\n"
+    assert imported_modules(source) == ["os.path", "json", "colorsys"]
+
+
+def test_preloader_order(workspace):
+    workspace.symbol_index = Mock(return_value=Mock(files_mentioning=lambda name: ["a"] * {"string": 2}.get(name, 0)))
+
+    preloader = Preloader(["json", "not_a_module", "string", "os.path", "colorsys"], workspace)
+    preloader.prioritize(["os"])
+    preloader.start()
+    preloader.join(10)
+
+    assert preloader.preloaded == ["os.path", "string", "json", "colorsys"]
+
+
+def test_preloader_progress(workspace):
+    workspace._config._capabilities = {"window": {"workDoneProgress": True}}
+    workspace.symbol_index = Mock(return_value=None)
+
+    preloader = Preloader(["json", "string"], workspace)
+    preloader.start()
+    preloader.join(10)
+
+    endpoint = workspace._endpoint
+    assert endpoint.request.call_args[0][0] == workspace.M_WORK_DONE_PROGRESS_CREATE
+    values = [call[1]["params"]["value"] for call in endpoint.notify.call_args_list]
+    assert [value["kind"] for value in values] == ["begin", "report", "report", "end"]
+    assert [value.get("message") for value in values[1:3]] == ["json", "string"]
+    assert values[2]["percentage"] == 50
+
+
+def test_preload_after_initialized(workspace, monkeypatch):
+    monkeypatch.setattr(preload_imports, "_preloader", None)
+    workspace.symbol_index = Mock(return_value=None)
+    config = Mock(plugin_settings=Mock(return_value={"modules": ["colorsys"]}))
+
+    preload_imports.rols_initialized(config, workspace)
+    preload_imports._preloader.join(10)
+    assert preload_imports._preloader.preloaded == ["colorsys"]
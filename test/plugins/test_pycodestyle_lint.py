@@ -96,7 +96,6 @@ def test_pycodestyle_config(workspace):
         # Now we'll add config file to ignore it
         with open(os.path.join(workspace.root_path, conf_file), "w+") as f:
             f.write(content)
-        workspace._config.settings.cache_clear()
 
         # And make sure we don't get any warnings
         diags = pycodestyle_lint.rols_lint(workspace, doc)
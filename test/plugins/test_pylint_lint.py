@@ -138,3 +138,15 @@ def test_per_file_caching(config, workspace):
 
     assert not pylint_lint.rols_lint(
         config, Document(uris.from_fs_path(__file__), workspace), False)
+
+
+def test_pylint_worker_restart(workspace):
+    flags = '--disable=invalid-name'
+    with temp_document(DOC, workspace) as doc:
+        diags = pylint_lint.PylintLinter.lint(doc, True, flags)
+        assert diags
+
+        # A dead worker is replaced on the next lint
+        pylint_lint.WORKER._process.kill()
+        pylint_lint.WORKER._process.wait()
+        assert pylint_lint.PylintLinter.lint(doc, True, flags) == diags
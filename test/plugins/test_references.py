@@ -4,6 +4,7 @@ import os
 import pytest
 
 from rols import uris
+from rols.plugins import references
 from rols.plugins.references import rols_references
 from rols.workspace import Document
 from rols._utils import PY2
@@ -63,6 +64,44 @@ def test_references(tmp_workspace):  # pylint: disable=redefined-outer-name
     assert doc2_usage_ref["range"]["end"] == {"line": 3, "character": 9}
 
 
+def test_references_indexed(tmp_workspace, monkeypatch):  # pylint: disable=redefined-outer-name
+    position = {"line": 0, "character": 8}
+    doc1_uri = uris.from_fs_path(os.path.join(tmp_workspace.root_path, DOC1_NAME))
+    doc1 = Document(doc1_uri, tmp_workspace)
+
+    index = tmp_workspace.symbol_index()
+    index.join(10)
+    assert sorted(os.path.basename(path) for path in tmp_workspace.reference_candidates("Test1")) == [
+        DOC1_NAME, DOC2_NAME
+    ]
+    assert len(rols_references(doc1, position)) == 3
+
+    # Only the candidate files are searched
+    monkeypatch.setattr(tmp_workspace, "reference_candidates", lambda name: [doc1.path])
+    assert len(rols_references(Document(doc1_uri, tmp_workspace), position)) == 1
+    monkeypatch.undo()
+
+    # Unsaved changes of open documents are indexed
+    doc2_uri = uris.from_fs_path(os.path.join(tmp_workspace.root_path, DOC2_NAME))
+    tmp_workspace.put_document(doc2_uri, "import os\n")
+    assert [os.path.basename(path) for path in tmp_workspace.reference_candidates("Test1")] == [DOC1_NAME]
+    tmp_workspace.rm_document(doc2_uri)
+    assert len(tmp_workspace.reference_candidates("Test1")) == 2
+
+
+def test_references_unsupported_jedi(tmp_workspace, monkeypatch):  # pylint: disable=redefined-outer-name
+    position = {"line": 0, "character": 8}
+    doc1_uri = uris.from_fs_path(os.path.join(tmp_workspace.root_path, DOC1_NAME))
+    search = references.jedi_references.get_module_contexts_containing_name
+    monkeypatch.setattr(references, "_patched", None)
+    monkeypatch.setattr(references.jedi, "__version__", "0.99.0")
+    monkeypatch.setattr(tmp_workspace, "reference_candidates", lambda name: [])
+
+    # The candidates are ignored and jedi left alone
+    assert len(rols_references(Document(doc1_uri, tmp_workspace), position)) == 3
+    assert references.jedi_references.get_module_contexts_containing_name is search
+
+
 @pytest.mark.skipif(PY2, reason="Jedi sometimes fails while checking pylint "
                                 "example files in the modules path")
 def test_references_builtin(tmp_workspace):  # pylint: disable=redefined-outer-name
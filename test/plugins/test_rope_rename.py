@@ -1,9 +1,10 @@
 import os
 
 import pytest
-from pyls import uris
-from pyls.plugins.rope_rename import pyls_rename
-from pyls.workspace import Document
+from rols import uris
+from rols.plugins.rope_rename import rols_rename
+from rols.workspace import Document
+from test.fixtures import apply_text_edits
 
 DOC_NAME = "test1.py"
 DOC = """class Test1():
@@ -24,7 +25,7 @@ def test_rope_rename(tmp_workspace, config):  # pylint: disable=redefined-outer-
     DOC_URI = uris.from_fs_path(os.path.join(tmp_workspace.root_path, DOC_NAME))
     doc = Document(DOC_URI, tmp_workspace)
 
-    result = pyls_rename(config, tmp_workspace, doc, position, "ShouldBeRenamed")
+    result = rols_rename(config, tmp_workspace, doc, position, "ShouldBeRenamed")
     assert len(result.keys()) == 1
 
     changes = result.get("documentChanges")
@@ -36,9 +37,45 @@ def test_rope_rename(tmp_workspace, config):  # pylint: disable=redefined-outer-
     assert changes.get("edits") == [
         {
             "range": {
-                "start": {"line": 0, "character": 0},
-                "end": {"line": 5, "character": 0},
+                "start": {"line": 0, "character": 6},
+                "end": {"line": 0, "character": 11},
             },
-            "newText": "class ShouldBeRenamed():\n    pass\n\nclass Test2(ShouldBeRenamed):\n    pass\n",
-        }
+            "newText": "ShouldBeRenamed",
+        },
+        {
+            "range": {
+                "start": {"line": 3, "character": 12},
+                "end": {"line": 3, "character": 17},
+            },
+            "newText": "ShouldBeRenamed",
+        },
     ]
+
+
+def test_rope_rename_open_document(tmp_workspace, config):  # pylint: disable=redefined-outer-name
+    doc_uri = uris.from_fs_path(os.path.join(tmp_workspace.root_path, DOC_NAME))
+    # The buffer doesn't have the changes made on disk since it was opened
+    tmp_workspace.put_document(doc_uri, DOC, version=3)
+    with open(os.path.join(tmp_workspace.root_path, DOC_NAME), "w") as f:
+        f.write(DOC + "# Saved elsewhere\n")
+    doc = tmp_workspace.get_document(doc_uri)
+
+    result = rols_rename(config, tmp_workspace, doc, {"line": 0, "character": 6}, "ShouldBeRenamed")
+    change = result["documentChanges"][0]
+    assert change["textDocument"] == {"uri": doc_uri, "version": 3}
+    # The edits apply to the buffer the version refers to
+    assert apply_text_edits(doc, change["edits"]) == DOC.replace("Test1", "ShouldBeRenamed") + "# Saved elsewhere\n"
+
+
+def test_rope_rename_outside_project(
+        tmp_workspace, config, tmpdir_factory, monkeypatch):  # pylint: disable=redefined-outer-name
+    # Installed packages, indexed with includeSitePackages, aren't renamed in
+    site_packages = tmpdir_factory.mktemp("site-packages")
+    library = site_packages.join("library.py")
+    library.write("from test1 import Test1\n\nTest1()\n")
+    doc_path = os.path.join(tmp_workspace.root_path, DOC_NAME)
+    monkeypatch.setattr(tmp_workspace, "reference_candidates", lambda name: [doc_path, str(library)])
+    doc = Document(uris.from_fs_path(doc_path), tmp_workspace)
+
+    result = rols_rename(config, tmp_workspace, doc, {"line": 0, "character": 6}, "ShouldBeRenamed")
+    assert [change["textDocument"]["uri"] for change in result["documentChanges"]] == [doc.uri]
@@ -2,6 +2,7 @@
 from rols import uris
 from rols.plugins.yapf_format import rols_format_document, rols_format_range
 from rols.workspace import Document
+from test.fixtures import apply_text_edits
 
 DOC_URI = uris.from_fs_path(__file__)
 DOC = """A = [
@@ -23,8 +24,7 @@ def test_format(workspace):
     doc = Document(DOC_URI, workspace, DOC)
     res = rols_format_document(doc)
 
-    assert len(res) == 1
-    assert res[0]["newText"] == "A = ['h', 'w', 'a']\n\nB = ['h', 'w']\n"
+    assert apply_text_edits(doc, res) == "A = ['h', 'w', 'a']\n\nB = ['h', 'w']\n"
 
 
 def test_range_format(workspace):
@@ -39,7 +39,7 @@ def test_range_format(workspace):
     assert len(res) == 1
 
     # Make sure B is still badly formatted
-    assert res[0]["newText"] == "A = ['h', 'w', 'a']\n\nB = ['h',\n\n\n'w']\n"
+    assert apply_text_edits(doc, res) == "A = ['h', 'w', 'a']\n\nB = ['h',\n\n\n'w']\n"
 
 
 def test_no_change(workspace):
@@ -56,6 +56,6 @@ def test_config_file(tmpdir, workspace):
 
     # A was split on multiple lines because of column_limit from config file
     assert (
-        rols_format_document(doc)[0]["newText"]
+        apply_text_edits(doc, rols_format_document(doc))
         == "A = [\n    'h', 'w',\n    'a'\n]\n\nB = ['h', 'w']\n"
     )
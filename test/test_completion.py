@@ -0,0 +1,107 @@
+from test.fixtures import DOC_URI
+
+from rols.completion import CompletionCache, filter_items, fuzzy_score
+from rols.workspace import Document
+
+ITEMS = [{"label": name} for name in ("numpy", "numbers", "enum", "nonlocal", "num_items(count)")]
+
+
+def _type(document, line, character, text):
+    document.apply_change({
+        "range": {
+            "start": {"line": line, "character": character},
+            "end": {"line": line, "character": character},
+        },
+        "text": text,
+    })
+
+
+def test_fuzzy_score():
+    assert fuzzy_score("", "anything") == 0
+    assert fuzzy_score("xyz", "numpy") is None
+    assert fuzzy_score("np", "numpy") is not None
+    assert fuzzy_score("num", "numpy") > fuzzy_score("nmp", "numpy")
+    assert fuzzy_score("ni", "num_items") > fuzzy_score("ni", "nomination")
+
+
+def test_filter_items():
+    labels = [item["label"] for item in filter_items(ITEMS, "num")]
+    assert labels == ["numpy", "numbers", "num_items(count)", "enum"]
+    assert [item["label"] for item in filter_items(ITEMS, "numi")] == ["num_items(count)"]
+
+
+def test_filter_items_sort_text():
+    items = filter_items(ITEMS, "num")
+    # Clients sort by sortText, so it follows the ranking
+    assert [item["sortText"] for item in items] == sorted(item["sortText"] for item in items)
+    assert len(set(item["sortText"] for item in items)) == len(items)
+    assert all("sortText" not in item for item in ITEMS)
+
+
+def test_narrowing_reuses_candidates(workspace):
+    document = Document(DOC_URI, workspace, "import os\nn\nprint(1)\n")
+    cache = CompletionCache()
+    compute_calls = []
+
+    def compute():
+        compute_calls.append(document.source)
+        return list(ITEMS)
+
+    result = cache.complete(document, {"line": 1, "character": 1}, compute)
+    assert result == {"isIncomplete": False, "items": ITEMS}
+
+    _type(document, 1, 1, "um")
+    result = cache.complete(document, {"line": 1, "character": 3}, compute)
+    assert [item["label"] for item in result["items"]] == ["numpy", "numbers", "num_items(count)", "enum"]
+    assert len(compute_calls) == 1
+
+    # Editing elsewhere changes the context
+    _type(document, 2, 0, "x")
+    cache.complete(document, {"line": 1, "character": 3}, compute)
+    assert len(compute_calls) == 2
+
+    # So does deleting from the completed word
+    document.apply_change({
+        "range": {"start": {"line": 1, "character": 2}, "end": {"line": 1, "character": 3}},
+        "text": "",
+    })
+    cache.complete(document, {"line": 1, "character": 2}, compute)
+    assert len(compute_calls) == 3
+    assert (cache.hits, cache.misses) == (1, 3)
+
+
+def test_incomplete_results(workspace):
+    document = Document(DOC_URI, workspace, "n")
+    cache = CompletionCache(max_items=2)
+
+    result = cache.complete(document, {"line": 0, "character": 1}, lambda: list(ITEMS))
+    assert result["isIncomplete"]
+    assert len(result["items"]) == 2
+
+    _type(document, 0, 1, "umb")
+    result = cache.complete(document, {"line": 0, "character": 4}, lambda: [])
+    assert not result["isIncomplete"]
+    assert [item["label"] for item in result["items"]] == ["numbers"]
+
+
+def test_context_follows_the_edits(workspace):
+    document = Document(DOC_URI, workspace, "x = n\n")
+    cache = CompletionCache()
+    compute_calls = []
+
+    def compute():
+        compute_calls.append(document.source)
+        return list(ITEMS)
+
+    cache.complete(document, {"line": 0, "character": 5}, compute)
+    # Typing after the cursor changes the context
+    _type(document, 0, 5, ")")
+    cache.complete(document, {"line": 0, "character": 5}, compute)
+    assert len(compute_calls) == 2
+
+    # Narrowing one character at a time, more times than the buffer remembers edits
+    for character in range(5, 5 + 100):
+        _type(document, 0, character, "u")
+        cache.complete(document, {"line": 0, "character": character + 1}, compute)
+    assert len(compute_calls) == 2
+    assert cache.hits == 100
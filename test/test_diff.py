@@ -0,0 +1,76 @@
+import random
+
+from rols.diff import diff_sequences, split_lines, text_edits
+
+
+def _apply(source, edits):
+    lines = split_lines(source)
+    starts = [0]
+    for line in lines:
+        starts.append(starts[-1] + len(line))
+
+    def offset(position):
+        if position["line"] >= len(lines):
+            return len(source)
+        return starts[position["line"]] + position["character"]
+
+    for edit in reversed(edits):
+        start, end = offset(edit["range"]["start"]), offset(edit["range"]["end"])
+        source = source[:start] + edit["newText"] + source[end:]
+    return source
+
+
+def test_split_lines():
+    assert split_lines("") == []
+    assert split_lines("a\nb\r\n\rc") == ["a\n", "b\r\n", "\r", "c"]
+    # Only the LSP line endings split lines
+    assert split_lines("a\x0cb c\n") == ["a\x0cb c\n"]
+
+
+def test_diff_sequences():
+    # The example of Myers' paper, with 5 insertions and deletions
+    hunks = diff_sequences("abcabba", "cbabac")
+    assert hunks == [(0, 2, 0, 0), (3, 3, 1, 2), (5, 6, 4, 4), (7, 7, 5, 6)]
+    assert _apply_hunks("abcabba", "cbabac", hunks) == "cbabac"
+    assert diff_sequences("same", "same") == []
+    assert diff_sequences("abc", "abXc") == [(2, 2, 2, 3)]
+    # Past the maximum distance the changed region is replaced at once
+    assert diff_sequences("aXbYc", "aZbWc", max_distance=2) == [(1, 4, 1, 4)]
+
+
+def _apply_hunks(a, b, hunks):
+    result, i = "", 0
+    for i1, i2, j1, j2 in hunks:
+        result += a[i:i1] + b[j1:j2]
+        i = i2
+    return result + a[i:]
+
+
+def test_text_edits():
+    old = "import os\n\nclass Test1():\n    pass\n"
+    new = "import os\n\nclass Renamed():\n    pass\n"
+    assert text_edits(old, new) == [{
+        "range": {"start": {"line": 2, "character": 6}, "end": {"line": 2, "character": 11}},
+        "newText": "Renamed",
+    }]
+    assert text_edits(old, new, by_line=True) == [{
+        "range": {"start": {"line": 2, "character": 0}, "end": {"line": 3, "character": 0}},
+        "newText": "class Renamed():\n",
+    }]
+    assert text_edits(old, old) == []
+
+    # The end of a file without a final line ending
+    assert text_edits("a = 1\nb", "a = 1\nb = 2") == [{
+        "range": {"start": {"line": 1, "character": 1}, "end": {"line": 1, "character": 1}},
+        "newText": " = 2",
+    }]
+
+
+def test_text_edits_apply():
+    rand = random.Random(0)
+    alphabet = ["a", "b", "x ", "\n", "\r\n", "\r"]
+    for _ in range(2000):
+        old = "".join(rand.choice(alphabet) for _ in range(rand.randint(0, 12)))
+        new = "".join(rand.choice(alphabet) for _ in range(rand.randint(0, 12)))
+        assert _apply(old, text_edits(old, new)) == new
+        assert _apply(old, text_edits(old, new, by_line=True)) == new
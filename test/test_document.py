@@ -1,6 +1,10 @@
 # Copyright 2017 Palantir Technologies, Inc.
 from test.fixtures import DOC, DOC_URI
 
+import threading
+
+import pytest
+
 from rols.workspace import Document
 
 
@@ -73,6 +77,7 @@ def test_document_multiline_edit(workspace):
         "    print b\n"
     ]
     doc = Document('file:///uri', workspace, u''.join(old))
+    lines = doc.lines
     doc.apply_change({'text': u'print a, b', 'range': {
         'start': {'line': 1, 'character': 4},
         'end': {'line': 2, 'character': 11}
@@ -81,6 +86,8 @@ def test_document_multiline_edit(workspace):
         "def hello(a, b):\n",
         "    print a, b\n"
     ]
+    # The lines returned before the edit don't change
+    assert lines == old
 
 
 def test_document_end_of_file_edit(workspace):
@@ -98,3 +105,114 @@ def test_document_end_of_file_edit(workspace):
         "print 'b'\n",
         "o",
     ]
+
+
+def test_position_at_offset(doc):
+    assert doc.position_at_offset(8) == {"line": 0, "character": 8}
+    assert doc.position_at_offset(11) == {"line": 1, "character": 0}
+    assert doc.position_at_offset(16) == {"line": 2, "character": 4}
+    assert doc.position_at_offset(51) == {"line": 4, "character": 0}
+
+
+def test_document_crlf_edit(workspace):
+    doc = Document('file:///uri', workspace, u'a\r\nb\r\nc\r\n')
+    doc.apply_change({'text': u'', 'range': {
+        'start': {'line': 0, 'character': 1},
+        'end': {'line': 1, 'character': 1}
+    }})
+    assert doc.lines == ["a\r\n", "c\r\n"]
+    assert doc.offset_at_position({"line": 1, "character": 1}) == 4
+
+
+def test_document_join_lines_edit(workspace):
+    doc = Document('file:///uri', workspace, u'ab\ncd\nef\n')
+    doc.apply_change({'text': u'', 'range': {
+        'start': {'line': 0, 'character': 2},
+        'end': {'line': 1, 'character': 0}
+    }})
+    assert doc.lines == ["abcd\n", "ef\n"]
+    assert doc.offset_at_position({"line": 1, "character": 0}) == 5
+    assert doc.source == u"abcd\nef\n"
+
+
+def test_document_script_cache(workspace):
+    doc = Document('file:///uri', workspace, u'import sys\n', version=1)
+    script = doc.rope_script()
+    assert doc.rope_script() is script
+    assert doc.rope_script(use_document_path=True) is not script
+
+    # jedi's inference state isn't thread safe
+    scripts = []
+    thread = threading.Thread(target=lambda: scripts.append(doc.rope_script()))
+    thread.start()
+    thread.join()
+    assert scripts[0] is not script
+
+    doc.apply_change({'text': u'import os\n'})
+    doc.version = 2
+    assert doc.rope_script() is not script
+
+
+def test_document_shared_trees(workspace):
+    doc = Document('file:///uri', workspace, u'import sys\n', version=1)
+    tree = doc.ast_tree()
+    assert doc.ast_tree() is tree
+    assert doc.parso_tree() is doc.parso_tree()
+    assert doc.tokens()[0].string == 'import'
+
+    doc.apply_change({'text': u'def f(:\n'})
+    doc.version = 2
+    with pytest.raises(SyntaxError):
+        doc.ast_tree()
+    assert doc.parso_tree().get_code() == u'def f(:\n'
+
+
+def test_document_incremental_parso_tree(workspace):
+    doc = Document('file:///uri', workspace, u'def f():\n    return 1\n\n\ndef g():\n    pass\n', version=1)
+    with doc.borrowed_parso_tree() as tree:
+        g = tree.children[1]
+
+    doc.apply_change({
+        'range': {'start': {'line': 1, 'character': 11}, 'end': {'line': 1, 'character': 12}},
+        'text': u'2 +',
+    })
+    doc.version = 2
+    with doc.borrowed_parso_tree() as new_tree:
+        assert new_tree.get_code() == doc.source
+        # The unchanged function is reused from the previous tree
+        assert new_tree.children[1] is g
+        assert new_tree.children[0].get_code() == u'def f():\n    return 2 +\n'
+
+
+def test_document_parso_tree_not_modified(workspace):
+    source = u'def f():\n    return 1\n\n\ndef g():\n    pass\n'
+    doc = Document('file:///uri', workspace, source, version=1)
+    tree = doc.parso_tree()
+    change = {'range': {'start': {'line': 1, 'character': 11}, 'end': {'line': 1, 'character': 12}}, 'text': u'2'}
+
+    # Returned trees are left untouched by the next versions
+    doc.apply_change(change)
+    doc.version = 2
+    assert doc.parso_tree().get_code() == doc.source
+    assert tree.get_code() == source
+
+    # Trees being walked don't block the edits, and are left untouched by them
+    walking = threading.Event()
+    reparsed = []
+
+    def edit():
+        walking.wait()
+        doc.apply_change(dict(change, text=u'3'))
+        doc.version = 3
+        with doc.borrowed_parso_tree() as new_tree:
+            reparsed.append(new_tree)
+
+    thread = threading.Thread(target=edit)
+    with doc.borrowed_parso_tree() as walked:
+        thread.start()
+        walking.set()
+        thread.join(10)
+        assert not thread.is_alive()
+        assert walked.get_code() == source.replace('1', '2')
+        assert reparsed[0] is not walked
+        assert reparsed[0].get_code() == source.replace('1', '3')
@@ -0,0 +1,183 @@
+import threading
+
+import pluggy
+
+from rols import ROLS, hookimpl, hookspecs
+from rols.lint import LintExecutor
+from rols.stats import STATS
+
+DOC_URI = "file:///test.py"
+
+
+class FastLinter(object):
+    @hookimpl
+    def rols_lint(self, document):
+        return [{"source": "fast", "message": document}]
+
+
+class SlowLinter(object):
+    def __init__(self):
+        self.release = threading.Event()
+
+    @hookimpl
+    def rols_lint(self, document, is_saved):
+        self.release.wait(5)
+        return [{"source": "slow", "message": document, "saved": is_saved}]
+
+
+class BrokenLinter(object):
+    @hookimpl
+    def rols_lint(self):
+        raise ValueError("broken")
+
+
+def _plugin_manager(*plugins):
+    pm = pluggy.PluginManager(ROLS)
+    pm.add_hookspecs(hookspecs)
+    for plugin in plugins:
+        pm.register(plugin, name=plugin.__class__.__name__)
+    return pm
+
+
+def _publisher():
+    published = []
+    event = threading.Event()
+
+    def publish(doc_uri, diagnostics):
+        published.append((doc_uri, sorted(d["source"] for d in diagnostics)))
+        event.set()
+
+    return published, event, publish
+
+
+def test_lint_publishes_progressively():
+    slow = SlowLinter()
+    pm = _plugin_manager(FastLinter(), slow)
+    published, event, publish = _publisher()
+    executor = LintExecutor()
+
+    executor.lint(pm.hook.rols_lint, publish, DOC_URI,
+                  config=None, workspace=None, document="doc", is_saved=True)
+    assert event.wait(5)
+    assert published == [(DOC_URI, ["fast"])]
+
+    event.clear()
+    slow.release.set()
+    assert event.wait(5)
+    assert published[-1] == (DOC_URI, ["fast", "slow"])
+    executor.shutdown()
+
+
+def test_lint_ignores_broken_linters():
+    pm = _plugin_manager(FastLinter(), BrokenLinter())
+    published, _event, publish = _publisher()
+    executor = LintExecutor()
+
+    executor.lint(pm.hook.rols_lint, publish, DOC_URI,
+                  config=None, workspace=None, document="doc", is_saved=True)
+    executor.shutdown()
+    executor._executor.shutdown(wait=True)
+    assert published[-1] == (DOC_URI, ["fast"])
+
+
+def test_lint_drops_stale_runs():
+    slow = SlowLinter()
+    pm = _plugin_manager(slow)
+    published, _event, publish = _publisher()
+    executor = LintExecutor()
+
+    executor.lint(pm.hook.rols_lint, publish, DOC_URI,
+                  config=None, workspace=None, document="old", is_saved=True)
+    executor.forget(DOC_URI)
+    slow.release.set()
+    executor._executor.shutdown(wait=True)
+    assert not published
+
+
+class CountingLinter(object):
+    def __init__(self):
+        self.calls = 0
+
+    @hookimpl
+    def rols_lint(self, document):
+        self.calls += 1
+        return [{"source": "counting", "message": document}]
+
+
+def test_lint_reuses_unchanged_inputs():
+    counting = CountingLinter()
+    pm = _plugin_manager(counting)
+    published, event, publish = _publisher()
+    executor = LintExecutor()
+
+    def lint(key):
+        event.clear()
+        executor.lint(pm.hook.rols_lint, publish, DOC_URI, cache_key=lambda name: key,
+                      config=None, workspace=None, document="doc", is_saved=True)
+        assert event.wait(5)
+
+    lint("v1")
+    lint("v1")
+    assert counting.calls == 1
+    assert published[-1] == (DOC_URI, ["counting"])
+
+    lint("v2")
+    assert counting.calls == 2
+
+    executor.invalidate()
+    lint("v2")
+    assert counting.calls == 3
+    executor.shutdown()
+
+
+def test_lint_statistics():
+    pm = _plugin_manager(FastLinter(), BrokenLinter())
+    _published, _event, publish = _publisher()
+    executor = LintExecutor()
+    STATS.reset()
+
+    executor.lint(pm.hook.rols_lint, publish, DOC_URI,
+                  config=None, workspace=None, document="doc", is_saved=True)
+    executor._executor.shutdown(wait=True)
+
+    stats = STATS.snapshot(reset=True)
+    assert stats["plugins"]["FastLinter"]["rols_lint"]["calls"] == 1
+    assert stats["plugins"]["BrokenLinter"]["rols_lint"]["errors"] == 1
+    # The whole run, until the last linter finished
+    assert stats["hooks"]["rols_lint"]["calls"] == 1
+    assert stats["hooks"]["rols_lint"]["resultSize"]["buckets"] == [[1, 1]]
+
+
+def test_lint_drops_runs_of_closed_documents():
+    slow = SlowLinter()
+    published, event, publish = _publisher()
+    executor = LintExecutor()
+
+    executor.lint(_plugin_manager(slow).hook.rols_lint, publish, DOC_URI,
+                  config=None, workspace=None, document="old", is_saved=False)
+    executor.forget(DOC_URI)
+    executor.lint(_plugin_manager(FastLinter()).hook.rols_lint, publish, DOC_URI,
+                  config=None, workspace=None, document="new", is_saved=False)
+    assert event.wait(5)
+
+    # The run from before the document was closed finishes last
+    slow.release.set()
+    executor._executor.shutdown(wait=True)
+    assert published == [(DOC_URI, ["fast"])]
+
+
+class WrapperLinter(object):
+    @hookimpl(hookwrapper=True)
+    def rols_lint(self):
+        yield
+
+
+def test_lint_skips_hook_wrappers():
+    pm = _plugin_manager(FastLinter(), WrapperLinter())
+    published, _event, publish = _publisher()
+    executor = LintExecutor()
+
+    executor.lint(pm.hook.rols_lint, publish, DOC_URI,
+                  config=None, workspace=None, document="doc", is_saved=True)
+    executor._executor.shutdown(wait=True)
+    assert published == [(DOC_URI, ["fast"])]
@@ -0,0 +1,118 @@
+import glob
+import os
+import sys
+
+import pluggy
+import pytest
+
+from rols import ROLS, hookspecs
+from rols.config import manifest
+from rols.config.plugins import LazyPlugin, missing_requirements, read_plugin_metadata
+
+PLUGIN = '''
+import json
+
+from rols import hookimpl
+
+ENABLED = False
+
+
+@hookimpl
+def rols_settings():
+    """Disabled by default."""
+    return {"plugins": {"lazy_example": {"enabled": ENABLED, "args": ("-x",)}}}
+
+
+@hookimpl(tryfirst=True)
+def rols_hover(document, position, extra=None):
+    return {"contents": json.dumps([document, position, extra])}
+'''
+
+
+@pytest.fixture
+def plugin_module(tmpdir, monkeypatch):
+    tmpdir.join('lazy_example.py').write(PLUGIN)
+    monkeypatch.syspath_prepend(str(tmpdir))
+    yield 'lazy_example'
+    sys.modules.pop('lazy_example', None)
+
+
+def test_lazy_plugin(plugin_module):
+    metadata = read_plugin_metadata(plugin_module)
+    assert metadata['requires'] == ['json', 'rols']
+    assert not missing_requirements(metadata)
+
+    pm = pluggy.PluginManager(ROLS)
+    pm.add_hookspecs(hookspecs)
+    plugin = LazyPlugin(metadata)
+    pm.register(plugin, name='lazy_example')
+
+    # The literal settings don't need the module
+    settings = pm.hook.rols_settings(config=None)
+    assert settings == [{'plugins': {'lazy_example': {'enabled': False, 'args': ('-x',)}}}]
+    assert pm.hook.rols_hover.get_hookimpls()[0].tryfirst
+    assert plugin_module not in sys.modules
+
+    # Disabled plugins are never imported
+    hover = pm.subset_hook_caller('rols_hover', [plugin])
+    assert hover(config=None, workspace=None, document='doc', position=1) is None
+    assert plugin_module not in sys.modules
+
+    # The first call to one of its hooks imports it, with the arguments of the real function
+    hover = pm.hook.rols_hover(config=None, workspace=None, document='doc', position=1)
+    assert hover == {'contents': '["doc", 1, null]'}
+    assert plugin.imported and plugin_module in sys.modules
+
+
+def test_missing_requirements(plugin_module, tmpdir):
+    tmpdir.join(plugin_module + '.py').write(PLUGIN.replace('import json', 'import not_installed_module'))
+    assert missing_requirements(read_plugin_metadata(plugin_module)) == ['not_installed_module']
+
+
+def test_rols_plugins_metadata():
+    plugins_dir = os.path.join(os.path.dirname(hookspecs.__file__), 'plugins')
+    for path in glob.glob(os.path.join(plugins_dir, '[!_]*.py')):
+        module_name = 'rols.plugins.' + os.path.basename(path)[:-3]
+        metadata = read_plugin_metadata(module_name)
+        assert metadata is not None, module_name
+        for hook in metadata['hooks']:
+            if hook['function'] == 'rols_settings':
+                assert 'result' in hook, module_name
+
+
+def test_plugin_manifest(plugin_module, tmpdir, tmpdir_factory, monkeypatch):
+    dist_info = tmpdir.mkdir('lazy_example-1.0.dist-info')
+    dist_info.join('METADATA').write('Metadata-Version: 2.1\nName: lazy-example\nVersion: 1.0\n')
+    dist_info.join('entry_points.txt').write(
+        '[rols_test]\nlazy_example = lazy_example\nbroken = lazy_example:missing_attribute\n'
+    )
+    cache_dir = str(tmpdir_factory.mktemp('cache'))
+
+    plugins = manifest.plugin_manifest('rols_test', cache_dir)
+    assert [(plugin['name'], plugin['value']) for plugin in plugins] == [
+        ('lazy_example', 'lazy_example'), ('broken', 'lazy_example:missing_attribute')
+    ]
+    assert plugins[0]['metadata']['hooks'][0]['function'] == 'rols_settings'
+    # Tuples wouldn't survive the manifest, those settings are left to the plugin
+    assert 'result' not in plugins[0]['metadata']['hooks'][0]
+    assert plugins[1]['metadata'] is None
+    with pytest.raises(ImportError):
+        manifest.load_entry_point(plugins[1]['value'])
+
+    # Later launches read the manifest without scanning the distributions
+    def no_scan(_group):
+        raise AssertionError('Distributions scanned again')
+
+    monkeypatch.setattr(manifest, 'entry_points', no_scan)
+    assert manifest.plugin_manifest('rols_test', cache_dir) == plugins
+
+    # Editing the plugin describes it again
+    tmpdir.join(plugin_module + '.py').write(PLUGIN.replace('("-x",)', '["-x"]'))
+    os.utime(str(tmpdir.join(plugin_module + '.py')), (1, 1))
+    settings = manifest.plugin_manifest('rols_test', cache_dir)[0]['metadata']['hooks'][0]
+    assert settings['result']['plugins']['lazy_example']['args'] == ['-x']
+
+    # Installing a distribution lists the entry points again
+    os.utime(str(tmpdir), (1, 1))
+    with pytest.raises(AssertionError):
+        manifest.plugin_manifest('rols_test', cache_dir)
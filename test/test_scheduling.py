@@ -0,0 +1,86 @@
+import threading
+
+import pytest
+from pyls_jsonrpc.exceptions import JsonRpcRequestCancelled
+
+from rols.scheduling import BACKGROUND, INTERACTIVE, RequestScheduler, check_cancelled
+
+DOC_URI = "file:///test.py"
+
+
+def test_unscheduled_methods_run_in_order():
+    def handler(params):
+        return params
+
+    scheduler = RequestScheduler()
+    assert scheduler.schedule("textDocument/didChange", handler) is handler
+    scheduler.shutdown()
+
+
+def test_interactive_requests_skip_background_queue():
+    scheduler = RequestScheduler(
+        workers={INTERACTIVE: 1, BACKGROUND: 1},
+        priorities={"slow": BACKGROUND, "fast": INTERACTIVE},
+    )
+    release = threading.Event()
+
+    slow = scheduler.schedule("slow", lambda params: release.wait(5))
+    fast = scheduler.schedule("fast", lambda params: params)
+
+    slow_futures = [slow(None), slow(None)]
+    assert fast("done").result(timeout=5) == "done"
+    assert not any(future.done() for future in slow_futures)
+
+    release.set()
+    assert all(future.result(timeout=5) for future in slow_futures)
+    scheduler.shutdown()
+
+
+def test_newer_requests_supersede_pending_ones():
+    scheduler = RequestScheduler(workers={INTERACTIVE: 1}, priorities={"complete": INTERACTIVE})
+    started, release = threading.Event(), threading.Event()
+    checked = []
+
+    def handler(params):
+        started.set()
+        release.wait(5)
+        try:
+            check_cancelled()
+        except JsonRpcRequestCancelled:
+            checked.append(params["n"])
+            raise
+        return params["n"]
+
+    complete = scheduler.schedule("complete", handler)
+    params = {"textDocument": {"uri": DOC_URI}}
+    running = complete(dict(params, n=1))
+    assert started.wait(5)
+    queued = complete(dict(params, n=2))
+    latest = complete(dict(params, n=3))
+    other_doc = complete({"textDocument": {"uri": "file:///other.py"}, "n": 4})
+
+    for request in (running, queued):
+        with pytest.raises(JsonRpcRequestCancelled):
+            request.result(timeout=5)
+
+    release.set()
+    assert latest.result(timeout=5) == 3
+    assert other_doc.result(timeout=5) == 4
+    assert checked == [1]
+    scheduler.shutdown()
+
+
+def test_cancel_request():
+    scheduler = RequestScheduler(workers={BACKGROUND: 1}, priorities={"slow": BACKGROUND})
+    release = threading.Event()
+    slow = scheduler.schedule("slow", lambda params: release.wait(5))
+
+    request = slow(None)
+    assert request.cancel()
+    assert not request.cancel()
+    with pytest.raises(JsonRpcRequestCancelled):
+        request.result(timeout=5)
+
+    release.set()
+    assert slow(None).result(timeout=5)
+    scheduler.shutdown()
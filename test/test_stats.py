@@ -0,0 +1,68 @@
+import time
+
+import pluggy
+import pytest
+
+from rols import ROLS, hookimpl, hookspecs
+from rols.stats import HookStats, Histogram, result_size
+from test.fixtures import DOC_URI
+
+
+class SlowPlugin(object):
+
+    @hookimpl
+    def rols_document_symbols(self, document):
+        time.sleep(0.01)
+        return [document, document]
+
+    @hookimpl
+    def rols_hover(self):
+        raise ValueError("Broken hover")
+
+
+def test_histogram():
+    histogram = Histogram([1, 10])
+    for value in [0.5, 1, 5, 50]:
+        histogram.add(value)
+    assert histogram.as_dict() == {"total": 56.5, "max": 50, "buckets": [[1, 2], [10, 1], [None, 1]]}
+
+
+def test_result_size():
+    assert [result_size(result) for result in [None, [], [1, 2], {"a": 1}, "text"]] == [0, 0, 2, 1, 1]
+
+
+def test_plugin_stats():
+    pm = pluggy.PluginManager(ROLS)
+    pm.add_hookspecs(hookspecs)
+    stats = HookStats()
+    stats.instrument(pm)
+    pm.register(SlowPlugin(), name="slow")
+
+    pm.hook.rols_document_symbols(config=None, workspace=None, document="doc")
+    pm.hook.rols_document_symbols(config=None, workspace=None, document="doc")
+    with pytest.raises(ValueError):
+        pm.hook.rols_hover(config=None, workspace=None, document="doc", position=None)
+
+    plugin_stats = stats.snapshot(reset=True)["plugins"]["slow"]
+    symbols = plugin_stats["rols_document_symbols"]
+    assert symbols["calls"] == 2 and symbols["errors"] == 0
+    assert symbols["wallMs"]["total"] >= 20
+    # Sleeping doesn't use the CPU
+    assert symbols["cpuMs"]["total"] < symbols["wallMs"]["total"]
+    assert symbols["resultSize"]["buckets"] == [[2, 2]]
+    assert plugin_stats["rols_hover"]["errors"] == 1
+    assert not stats.snapshot()["plugins"]
+
+
+def test_stats_request(rols):
+    rols.m_rols__stats(reset=True)
+    rols.m_text_document__did_open(textDocument={"uri": DOC_URI, "version": 1, "text": "import os\n"})
+    rols.config.plugin_manager.register(SlowPlugin(), name="slow")
+    try:
+        rols.m_text_document__document_symbol(textDocument={"uri": DOC_URI})
+    finally:
+        rols.config.plugin_manager.unregister(name="slow")
+
+    stats = rols.m_rols__stats()
+    assert stats["hooks"]["rols_document_symbols"]["calls"] == 1
+    assert stats["plugins"]["slow"]["rols_document_symbols"]["calls"] == 1
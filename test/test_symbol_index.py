@@ -0,0 +1,116 @@
+import os
+
+from rols import lsp, uris
+from rols.symbol_index import SymbolIndex, extract_symbols
+
+SOURCE = """import os
+
+MAX_SIZE = 10
+counter, (first, second) = 0, (1, 2)
+
+
+def top_level():
+    def nested():
+        pass
+
+
+class Workspace(object):
+    root = None
+
+    async def symbols(self):
+        pass
+
+    class Inner:
+        pass
+
+
+if os.name == "nt":
+    def windows_only():
+        pass
+"""
+
+
+def _names(symbols):
+    return [(name, kind, container) for name, kind, container, _sl, _sc, _el, _ec in symbols]
+
+
+def test_extract_symbols():
+    assert _names(extract_symbols(SOURCE)) == [
+        ("MAX_SIZE", lsp.SymbolKind.Constant, None),
+        ("counter", lsp.SymbolKind.Variable, None),
+        ("first", lsp.SymbolKind.Variable, None),
+        ("second", lsp.SymbolKind.Variable, None),
+        ("top_level", lsp.SymbolKind.Function, None),
+        ("Workspace", lsp.SymbolKind.Class, None),
+        ("root", lsp.SymbolKind.Field, "Workspace"),
+        ("symbols", lsp.SymbolKind.Method, "Workspace"),
+        ("Inner", lsp.SymbolKind.Class, "Workspace"),
+        ("windows_only", lsp.SymbolKind.Function, None),
+    ]
+    top_level = extract_symbols(SOURCE)[4]
+    assert top_level[3:] == (6, 0, 8, 12)
+
+
+def test_index_search(tmpdir):
+    module = tmpdir.ensure("pkg", "module.py")
+    module.write(SOURCE)
+    tmpdir.ensure(".hidden", "ignored.py").write("def top_level_hidden(): pass\n")
+
+    index = SymbolIndex(str(tmpdir.join("symbols.db")), [str(tmpdir)])
+    index.start()
+    index.join(10)
+
+    results = index.search("works")
+    assert results[0]["name"] == "Workspace"
+    assert results[0]["location"]["uri"] == uris.from_fs_path(str(module))
+    assert [s["name"] for s in index.search("top_level")] == ["top_level"]
+    assert [s["name"] for s in index.search("sy")] == ["symbols"]
+    assert index.search("sy")[0]["containerName"] == "Workspace"
+    assert not index.search("nested")
+
+
+def test_index_updates(tmpdir):
+    module = tmpdir.join("module.py")
+    module.write("def old_name(): pass\n")
+    db_path = str(tmpdir.join("symbols.db"))
+
+    index = SymbolIndex(db_path, [str(tmpdir)])
+    index.scan()
+    assert index.search("old_name")
+
+    module.write("def new_name(): pass\n")
+    os.utime(str(module), (1, 1))
+    index.update_file(str(module))
+    assert not index.search("old_name")
+    assert index.search("new_name")
+
+    # Broken files keep their last symbols
+    module.write("def broken(:\n")
+    os.utime(str(module), (2, 2))
+    index.update_file(str(module))
+    assert index.search("new_name")
+    index.close()
+
+    # The index persists, and deleted files are dropped by the next scan
+    index = SymbolIndex(db_path, [str(tmpdir)])
+    assert index.search("new_name")
+    module.remove()
+    index.scan()
+    assert not index.search("new_name")
+
+
+def test_index_references(tmpdir):
+    tmpdir.join("a.py").write("def spam():\n    return spam\n")
+    tmpdir.join("b.py").write("from a import spam  # spam\n")
+    tmpdir.join("c.py").write("eggs = 1\n")
+    index = SymbolIndex(":memory:", [str(tmpdir)])
+    index.scan()
+
+    assert sorted(os.path.basename(path) for path in index.files_mentioning("spam")) == ["a.py", "b.py"]
+    assert index.occurrences("spam")[str(tmpdir.join("a.py"))] == [4, 23]
+
+    # Unsaved sources replace the content of the file until it's indexed from the disk again
+    index.update_source(str(tmpdir.join("c.py")), "spam = 1\n")
+    assert len(index.files_mentioning("spam")) == 3
+    index.update_file(str(tmpdir.join("c.py")))
+    assert len(index.files_mentioning("spam")) == 2
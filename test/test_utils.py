@@ -1,7 +1,9 @@
 # Copyright 2017 Palantir Technologies, Inc.
+import threading
 import time
 
 import mock
+import pytest
 from flaky import flaky
 
 from rols import _utils
@@ -58,6 +60,36 @@ def test_debounce_keyed_by():
     assert len(obj.mock_calls) == 4
 
 
+def test_scheduler_replaces_keyed_calls():
+    scheduler = _utils.Scheduler()
+    obj = mock.Mock()
+    done = threading.Event()
+
+    scheduler.call_later(0.05, obj, 1, key="a")
+    scheduler.call_later(0.05, obj, 2, key="a")
+    scheduler.call_later(0.01, obj, 3, key="b")
+    scheduler.call_later(0.1, done.set)
+
+    assert done.wait(5)
+    assert obj.mock_calls == [mock.call(3), mock.call(2)]
+
+
+def test_scheduler_cancel():
+    scheduler = _utils.Scheduler()
+    obj = mock.Mock()
+    done = threading.Event()
+
+    key = scheduler.call_later(0.05, obj)
+    assert scheduler.deadline(key) is not None
+    assert scheduler.cancel(key)
+    assert not scheduler.cancel(key)
+    assert scheduler.deadline(key) is None
+
+    scheduler.call_later(0.1, done.set)
+    assert done.wait(5)
+    assert not obj.mock_calls
+
+
 def test_list_to_string():
     assert _utils.list_to_string("string") == "string"
     assert _utils.list_to_string(["a", "r", "r", "a", "y"]) == "a,r,r,a,y"
@@ -80,6 +112,13 @@ def test_merge_dicts():
     ) == {"a": False, "b": {"x": 123, "y": [], "z": 987}}
 
 
+def test_version_tuple():
+    assert _utils.version_tuple("0.17.2") == (0, 17, 2)
+    assert _utils.version_tuple("0.18.0rc1") == (0, 18, 0)
+    assert _utils.version_tuple("1.0.dev3") == (1, 0)
+    assert _utils.version_tuple("0.15.2") >= (0, 15)
+
+
 def test_clip_column():
     assert _utils.clip_column(0, [], 0) == 0
     assert _utils.clip_column(2, ["123"], 0) == 2
@@ -90,3 +129,37 @@ def test_clip_column():
     assert _utils.clip_column(2, ["123\n", "123"], 0) == 2
     assert _utils.clip_column(3, ["123\n", "123"], 0) == 3
     assert _utils.clip_column(4, ["123\n", "123"], 1) == 3
+
+
+def test_to_hashable():
+    value = {"b": [1, {"c": None}], "a": "x"}
+    assert _utils.to_hashable(value) == (("a", "x"), ("b", (1, (("c", None),))))
+    assert hash(_utils.to_hashable(value)) == hash(_utils.to_hashable(dict(value)))
+
+
+WORKER_SCRIPT = """
+import json
+import sys
+import time
+
+for line in sys.stdin:
+    message = json.loads(line)
+    time.sleep(message["sleep"])
+    sys.stdout.write(json.dumps(message) + "\\n")
+    sys.stdout.flush()
+"""
+
+
+def test_worker_process_timeout(tmpdir):
+    script = tmpdir.join("worker.py")
+    script.write(WORKER_SCRIPT)
+    worker = _utils.WorkerProcess(str(script), timeout=1)
+    try:
+        assert worker.request({"sleep": 0}) == {"sleep": 0}
+
+        # A hanging worker is killed, and started again for the next request
+        with pytest.raises(_utils.WorkerTimeout):
+            worker.request({"sleep": 30})
+        assert worker.request({"sleep": 0}) == {"sleep": 0}
+    finally:
+        worker.stop()
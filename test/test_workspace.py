@@ -1,11 +1,15 @@
 # Copyright 2017 Palantir Technologies, Inc.
+import configparser
 import os
 import pathlib
 import sys
 
 import pytest
+from mock import Mock
 
 from rols import uris
+from rols.config import config as config_module
+from rols.workspace import SysPathCache
 
 PY2 = sys.version_info.major == 2
 
@@ -76,6 +80,39 @@ def test_root_project_with_no_setup_py(rols):
     assert workspace_root in test_doc.sys_path()
 
 
+def test_sys_path_cache(rols, tmpdir):
+    test_uri = uris.from_fs_path(os.path.join(rols.workspace.root_path, "test.py"))
+    rols.workspace.put_document(test_uri, "assert True")
+    test_doc = rols.workspace.get_document(test_uri)
+    sys_paths = rols.workspace._sys_paths
+
+    misses = sys_paths.misses
+    assert test_doc.sys_path() == test_doc.sys_path()
+    assert sys_paths.misses == misses + 1
+    assert sys_paths.hits >= 1
+
+    rols.workspace.update_config({})
+    test_doc.sys_path()
+    assert sys_paths.misses == misses + 2
+
+
+def test_sys_path_cache_interpreter_changed(tmpdir):
+    executable = tmpdir.join("python")
+    executable.write("")
+    environment = Mock(executable=str(executable))
+    environment.get_sys_path.return_value = ["/lib"]
+
+    sys_paths = SysPathCache()
+    assert sys_paths.get(environment, str(executable), extra_paths=["/src"]) == ["/src", "/lib"]
+    assert sys_paths.get(environment, str(executable), extra_paths=["/src"]) == ["/src", "/lib"]
+    assert environment.get_sys_path.call_count == 1
+
+    os.utime(str(executable), (0, 0))
+    sys_paths.get(environment, str(executable), extra_paths=["/src"])
+    assert environment.get_sys_path.call_count == 2
+    assert sys_paths.stats() == {"hits": 1, "misses": 2, "size": 1}
+
+
 def test_multiple_workspaces(tmpdir, rols):
     workspace1_dir = tmpdir.mkdir("workspace1")
     workspace2_dir = tmpdir.mkdir("workspace2")
@@ -235,6 +272,61 @@ def test_workspace_loads_pycodestyle_config(rols, tmpdir):
     assert seetings['plugins']['pycodestyle']['maxLineLength'] == 20
 
 
+def test_settings_resolved_per_directory(rols, tmpdir, monkeypatch):
+    package = tmpdir.mkdir('package')
+    config = rols.workspace._config
+    # Check the config files on disk every time
+    monkeypatch.setattr(config_module, 'CHECK_INTERVAL', 0)
+
+    # Config files are only parsed when they change
+    parsed = []
+    read = configparser.RawConfigParser.read
+    monkeypatch.setattr(configparser.RawConfigParser, 'read', lambda self, f: parsed.append(f) or read(self, f))
+
+    settings = config.settings(document_path=str(package.join('a.py')))
+    assert 'maxLineLength' not in settings.get('plugins', {}).get('pycodestyle', {})
+    assert config.settings(document_path=str(package.join('b.py'))) is settings
+
+    # A new config file is seen from the files below it
+    cfg = tmpdir.join('setup.cfg')
+    cfg.write("[pycodestyle]\nmax-line-length = 100\n")
+    settings = config.settings(document_path=str(package.join('a.py')))
+    assert settings['plugins']['pycodestyle']['maxLineLength'] == 100
+    assert config.settings(document_path=str(package.join('b.py'))) is settings
+    assert parsed.count(str(cfg)) == 1
+
+    # And a changed one too
+    cfg.write("[pycodestyle]\nmax-line-length = 120\n")
+    os.utime(str(cfg), (1, 1))
+    assert config.settings(document_path=str(package.join('a.py')))['plugins']['pycodestyle']['maxLineLength'] == 120
+
+    # Watched files events drop the settings of the directories below the file
+    settings = config.settings(document_path=str(package.join('a.py')))
+    rols.m_workspace__did_change_watched_files(changes=[{'uri': uris.from_fs_path(str(cfg)), 'type': 2}])
+    assert config.settings(document_path=str(package.join('a.py'))) is not settings
+    assert parsed.count(str(cfg)) == 3
+
+
+def test_settings_checked_now_and_then(rols, tmpdir, monkeypatch):
+    config = rols.workspace._config
+    doc_path = str(tmpdir.mkdir('package').join('a.py'))
+    cfg = tmpdir.join('setup.cfg')
+    cfg.write("[pycodestyle]\nmax-line-length = 100\n")
+    settings = config.settings(document_path=doc_path)
+
+    # The config files aren't looked at on disk within the interval
+    stats = []
+    stat = os.stat
+    monkeypatch.setattr(os, 'stat', lambda path, *args, **kwargs: stats.append(path) or stat(path, *args, **kwargs))
+    cfg.write("[pycodestyle]\nmax-line-length = 120\n")
+    assert config.settings(document_path=doc_path) is settings
+    assert not stats
+
+    # Saving the config file in the editor is seen right away
+    rols.m_text_document__did_save(textDocument={'uri': uris.from_fs_path(str(cfg))})
+    assert config.settings(document_path=doc_path)['plugins']['pycodestyle']['maxLineLength'] == 120
+
+
 def test_settings_of_added_workspace(rols, tmpdir):
     test_uri = str(tmpdir.mkdir('Test123'))
     rols.root_uri = test_uri
@@ -253,3 +345,74 @@ def test_settings_of_added_workspace(rols, tmpdir):
     workspace1_object = rols.workspaces[workspace1['uri']]
     workspace1_jedi_settings = workspace1_object._config.plugin_settings('jedi')
     assert workspace1_jedi_settings == server_settings['rols']['plugins']['jedi']
+
+
+def test_workspaces_share_plugins(rols, tmpdir):
+    workspace1 = {'uri': str(tmpdir.mkdir('NewTest456'))}
+    rols.m_workspace__did_change_workspace_folders({'added': [workspace1]})
+    workspace_config = rols.workspaces[workspace1['uri']]._config
+
+    # Plugins are loaded once, but every workspace has its own settings
+    assert workspace_config is not rols.config
+    assert workspace_config.plugin_manager is rols.config.plugin_manager
+
+    plugin = Mock()
+    rols.config.plugin_manager.register(plugin, name='shared_plugin')
+    try:
+        workspace_config.update({'plugins': {'shared_plugin': {'enabled': False}}})
+        rols.config.update({})
+        assert workspace_config.disabled_plugins == [plugin]
+        assert rols.config.disabled_plugins == []
+    finally:
+        rols.config.plugin_manager.unregister(name='shared_plugin')
+
+
+def test_workspace_symbols(rols, tmpdir):
+    tmpdir.join("module.py").write("class Indexed(object):\n    pass\n")
+    rols.config.update({"rope": {"ropeFolder": ".ropeproject"}})
+
+    rols.m_initialized()
+    rols.workspace.symbol_index().join(10)
+    assert tmpdir.join(".ropeproject", "symbols.db").check()
+    assert [s["name"] for s in rols.m_workspace__symbol(query="index")] == ["Indexed"]
+
+    tmpdir.join("module.py").write("class Renamed(object):\n    pass\n")
+    os.utime(str(tmpdir.join("module.py")), (0, 0))
+    rols.m_text_document__did_save(textDocument={"uri": uris.from_fs_path(str(tmpdir.join("module.py")))})
+    assert [s["name"] for s in rols.m_workspace__symbol(query="renamed")] == ["Renamed"]
+
+
+def test_rope_project_validation(rols, tmpdir, monkeypatch):
+    module = tmpdir.join("module.py")
+    module.write("def old(): pass\n")
+    module_uri = uris.from_fs_path(str(module))
+    workspace = rols.workspace
+
+    project = workspace._rope_project_builder({})
+    assert workspace._rope_project_builder({}) is project
+    resource = project.get_file("module.py")
+    assert "old" in project.get_pymodule(resource)
+
+    validated = []
+    monkeypatch.setattr(project, "validate", lambda folder=None: validated.append(folder))
+
+    rols.m_text_document__did_save(textDocument={"uri": module_uri})
+    workspace._rope_project_builder({})
+    assert validated == [resource]
+
+    # Nothing changed since
+    workspace._rope_project_builder({})
+    assert len(validated) == 1
+
+    # Too many changes validate the whole project
+    rols.m_workspace__did_change_watched_files(changes=[
+        {"uri": uris.from_fs_path(str(tmpdir.join("m%d.py" % i))), "type": 2} for i in range(150)
+    ])
+    workspace._rope_project_builder({})
+    assert validated[1:] == [None]
+
+    # On request
+    rols.m_rols__validate_rope_project()
+    workspace._rope_project_builder({})
+    workspace._rope_project_builder({})
+    assert validated[1:] == [None, None]